@@ -0,0 +1,643 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén histórico en SQLite de todo lo que descarga el scraper.
+
+Los `data/<slug>.json` se sobrescriben en cada run: la clasificación de
+jornadas pasadas, las correcciones de resultados y las temporadas anteriores
+se pierden. El almacén las conserva en tablas indexadas:
+
+- `grupos`, `equipos`: lo descubierto de cada club (club_map); `equipos.club`
+  es la `clave_acceso` del club, porque con `--clubs` conviven varios.
+- `partidos`: todos los partidos de cada grupo, no sólo los del club, por
+  `codacta` (los que aún no tienen acta, con una clave `sin-acta:...`).
+  Cada jornada descargada sustituye a la guardada: lo que la federación
+  mueve o borra desaparece. Si un resultado cambia se anota en
+  `correcciones`.
+- `clasificaciones`: una foto de la tabla por grupo y jornada.
+- `jugadores`, `plantillas`, `alineaciones`: plantillas y actas.
+- `actas`: qué actas se han descargado ya. Los totales por jugador, equipo
+  y temporada (partidos, titularidades, goles, tarjetas, minutos) se
+  calculan al consultarlos agrupando `alineaciones`, así que un acta que se
+  vuelve a descargar corregida los corrige también.
+
+Las escrituras son upserts que sólo tocan las filas que cambian, así que un
+run sin novedades deja el fichero intacto (importa porque se versiona). Los
+`todos_partidos` de los JSON salen de las respuestas del propio run
+(`partido_de_fila`), no del histórico; la clasificación sí se exporta desde
+aquí (`clasificacion`).
+
+`Almacen()` sin ruta vive en memoria: es lo que usan los runs con cassette
+para no ensuciar el histórico con respuestas grabadas.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from modelos import FilaClasificacion, Jugador, Partido
+
+logger = logging.getLogger(__name__)
+
+# Un script por versión del esquema; `user_version` dice cuáles faltan. Cada
+# uno se aplica sentencia a sentencia en una sola transacción junto con el
+# cambio de `user_version` (ver `Almacen._migrar`), así que no pueden llevar
+# `;` dentro de literales ni triggers.
+_MIGRACIONES: List[str] = []
+
+_MIGRACIONES.append("""
+CREATE TABLE IF NOT EXISTS grupos (
+    cod_grupo      TEXT PRIMARY KEY,
+    cod_temporada  TEXT NOT NULL,
+    nombre         TEXT,
+    cod_competicion TEXT
+);
+
+CREATE TABLE IF NOT EXISTS equipos (
+    codequipo      TEXT NOT NULL,
+    cod_temporada  TEXT NOT NULL,
+    slug           TEXT NOT NULL,
+    cod_grupo      TEXT NOT NULL,
+    nombre         TEXT,
+    categoria      TEXT,
+    PRIMARY KEY (codequipo, cod_temporada)
+);
+CREATE INDEX IF NOT EXISTS idx_equipos_slug ON equipos (slug, cod_temporada);
+
+CREATE TABLE IF NOT EXISTS partidos (
+    codacta        TEXT PRIMARY KEY,
+    cod_temporada  TEXT NOT NULL,
+    cod_grupo      TEXT NOT NULL,
+    jornada        INTEGER,
+    fecha          TEXT,
+    hora           TEXT,
+    cod_local      TEXT,
+    cod_visitante  TEXT,
+    local          TEXT,
+    visitante      TEXT,
+    campo          TEXT,
+    resultado      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_partidos_grupo ON partidos (cod_grupo, jornada);
+CREATE INDEX IF NOT EXISTS idx_partidos_fecha ON partidos (fecha);
+CREATE INDEX IF NOT EXISTS idx_partidos_local ON partidos (cod_local);
+CREATE INDEX IF NOT EXISTS idx_partidos_visitante ON partidos (cod_visitante);
+
+CREATE TABLE IF NOT EXISTS correcciones (
+    codacta        TEXT NOT NULL,
+    anterior       TEXT,
+    resultado      TEXT,
+    detectada      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_correcciones_acta ON correcciones (codacta);
+
+CREATE TABLE IF NOT EXISTS clasificaciones (
+    cod_grupo      TEXT NOT NULL,
+    jornada        INTEGER NOT NULL,
+    posicion       INTEGER NOT NULL,
+    equipo         TEXT NOT NULL,
+    codequipo      TEXT,
+    puntos         INTEGER,
+    pj             INTEGER,
+    pg             INTEGER,
+    pe             INTEGER,
+    pp             INTEGER,
+    gf             INTEGER,
+    gc             INTEGER,
+    racha          TEXT,
+    PRIMARY KEY (cod_grupo, jornada, posicion)
+);
+
+CREATE TABLE IF NOT EXISTS jugadores (
+    codjugador     TEXT PRIMARY KEY,
+    nombre         TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS plantillas (
+    codequipo      TEXT NOT NULL,
+    cod_temporada  TEXT NOT NULL,
+    codjugador     TEXT NOT NULL,
+    PRIMARY KEY (codequipo, cod_temporada, codjugador)
+);
+
+CREATE TABLE IF NOT EXISTS alineaciones (
+    codacta        TEXT NOT NULL,
+    codequipo      TEXT NOT NULL,
+    codjugador     TEXT NOT NULL,
+    dorsal         TEXT,
+    PRIMARY KEY (codacta, codjugador)
+);
+CREATE INDEX IF NOT EXISTS idx_alineaciones_jugador ON alineaciones (codjugador);
+""")
+
+# v2: estadísticas de jugador acumuladas desde las actas. Lo que el acta no
+# trae se queda en NULL (no es lo mismo que cero).
+_MIGRACIONES.append("""
+ALTER TABLE alineaciones ADD COLUMN titular INTEGER;
+ALTER TABLE alineaciones ADD COLUMN goles INTEGER;
+ALTER TABLE alineaciones ADD COLUMN amarillas INTEGER;
+ALTER TABLE alineaciones ADD COLUMN rojas INTEGER;
+ALTER TABLE alineaciones ADD COLUMN minutos INTEGER;
+
+CREATE TABLE IF NOT EXISTS actas (
+    codacta        TEXT PRIMARY KEY,
+    cod_temporada  TEXT NOT NULL,
+    sumada         TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS estadisticas (
+    codjugador     TEXT NOT NULL,
+    codequipo      TEXT NOT NULL,
+    cod_temporada  TEXT NOT NULL,
+    partidos       INTEGER NOT NULL,
+    titularidades  INTEGER,
+    goles          INTEGER,
+    amarillas      INTEGER,
+    rojas          INTEGER,
+    minutos        INTEGER,
+    PRIMARY KEY (codequipo, cod_temporada, codjugador)
+);
+""")
+
+# v3: varios clubes en el mismo histórico (`scraper.py --clubs`).
+_MIGRACIONES.append("""
+ALTER TABLE equipos ADD COLUMN club TEXT;
+CREATE INDEX IF NOT EXISTS idx_equipos_club ON equipos (club, cod_temporada);
+""")
+
+# v4: los totales se calculan desde `alineaciones` (`estadisticas_equipo`);
+# la tabla de sumas acumuladas no se corregía al cambiar un acta.
+_MIGRACIONES.append("""
+DROP TABLE IF EXISTS estadisticas;
+CREATE INDEX IF NOT EXISTS idx_alineaciones_equipo ON alineaciones (codequipo);
+""")
+
+VERSION_ESQUEMA = len(_MIGRACIONES)
+
+_ADD_COLUMN = re.compile(r"ALTER TABLE (\w+) ADD COLUMN (\w+)", re.IGNORECASE)
+
+_COLUMNAS_ALINEACION = (
+    "codacta", "codequipo", "codjugador", "dorsal",
+    "titular", "goles", "amarillas", "rojas", "minutos",
+)
+
+# Columnas de `alineaciones` que se suman en `estadisticas_equipo` (acta → total).
+_ACUMULABLES = {
+    "titular": "titularidades",
+    "goles": "goles",
+    "amarillas": "amarillas",
+    "rojas": "rojas",
+    "minutos": "minutos",
+}
+
+# Prefijo de `codacta` para los partidos que la API da sin acta todavía.
+SIN_ACTA = "sin-acta:"
+
+_COLUMNAS_PARTIDO = (
+    "codacta", "cod_temporada", "cod_grupo", "jornada", "fecha", "hora",
+    "cod_local", "cod_visitante", "local", "visitante", "campo", "resultado",
+)
+
+
+def _upsert(tabla: str, columnas: Iterable[str], clave: Iterable[str]) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE que no escribe si la fila no cambia."""
+    columnas = list(columnas)
+    clave = list(clave)
+    resto = [c for c in columnas if c not in clave]
+    marcadores = ", ".join(f":{c}" for c in columnas)
+    if not resto:
+        return f"INSERT OR IGNORE INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores})"
+    asignaciones = ", ".join(f"{c} = excluded.{c}" for c in resto)
+    distinto = " OR ".join(f"{c} IS NOT excluded.{c}" for c in resto)
+    return (
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores}) "
+        f"ON CONFLICT ({', '.join(clave)}) DO UPDATE SET {asignaciones} WHERE {distinto}"
+    )
+
+
+def clave_sin_acta(cod_grupo: str, jornada, cod_local: str, cod_visitante: str) -> str:
+    """`codacta` sintético de un partido sin acta: grupo, jornada y equipos."""
+    return f"{SIN_ACTA}{cod_grupo}:{jornada}:{cod_local}:{cod_visitante}"
+
+
+def partido_de_fila(
+    fila: Dict,
+    codequipo: str,
+    maps_url: Callable[[str], Optional[str]] = lambda campo: None,
+) -> Partido:
+    """Fila de `partidos` (dict o Row) → `Partido` visto desde `codequipo`."""
+    codacta = fila["codacta"]
+    return Partido(
+        jornada=fila["jornada"],
+        id_partido=None if str(codacta).startswith(SIN_ACTA) else codacta,
+        fecha=fila["fecha"],
+        hora=fila["hora"],
+        local=fila["local"],
+        visitante=fila["visitante"],
+        campo=fila["campo"] or "",
+        resultado=fila["resultado"],
+        es_local=fila["cod_local"] == str(codequipo),
+        maps_url=maps_url(fila["campo"] or ""),
+    )
+
+
+class Almacen:
+    """
+    Conexión al histórico. Una sola conexión compartida, protegida con un
+    lock: las escrituras del scraper son pocas y cortas.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(
+            str(self.path) if self.path else ":memory:", check_same_thread=False
+        )
+        self._con.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._migrar()
+
+    def _migrar(self) -> None:
+        version = self._con.execute("PRAGMA user_version").fetchone()[0]
+        if version > VERSION_ESQUEMA:
+            raise RuntimeError(
+                f"{self.path}: esquema v{version} más nuevo que este scraper (v{VERSION_ESQUEMA})"
+            )
+        for numero in range(version + 1, VERSION_ESQUEMA + 1):
+            # No `executescript`: confirma lo pendiente antes de empezar y deja
+            # la migración a medias si algo falla en mitad del script.
+            self._con.execute("BEGIN")
+            try:
+                for sentencia in _MIGRACIONES[numero - 1].split(";"):
+                    if sentencia.strip() and not self._columna_existente(sentencia):
+                        self._con.execute(sentencia)
+                self._con.execute(f"PRAGMA user_version = {numero}")
+            except BaseException:
+                self._con.rollback()
+                raise
+            self._con.commit()
+
+    def _columna_existente(self, sentencia: str) -> bool:
+        """
+        Si `sentencia` es un `ADD COLUMN` de una columna que ya está. Los
+        `ALTER TABLE` no tienen `IF NOT EXISTS`: un histórico que una versión
+        anterior migró a medias no debe quedarse fallando con "duplicate
+        column" para siempre.
+        """
+        m = _ADD_COLUMN.search(sentencia)
+        if not m:
+            return False
+        tabla, columna = m.groups()
+        return any(
+            fila["name"] == columna
+            for fila in self._con.execute(f"PRAGMA table_info({tabla})")
+        )
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._con.close()
+
+    @contextmanager
+    def _transaccion(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._con:
+            yield self._con
+
+    # -- escritura --------------------------------------------------------
+
+    def guardar_club_map(self, club_map: Dict) -> None:
+        """Grupos y equipos descubiertos (`club_map.json`)."""
+        cod_temporada = str(club_map.get("cod_temporada") or "")
+        club = str(club_map.get("clave_acceso_club") or "") or None
+        grupos = {}
+        equipos = []
+        for e in club_map.get("equipos") or []:
+            cod_grupo = str(e.get("cod_grupo") or "")
+            grupos[cod_grupo] = {
+                "cod_grupo": cod_grupo,
+                "cod_temporada": cod_temporada,
+                "nombre": e.get("nombre_grupo"),
+                "cod_competicion": e.get("cod_competicion"),
+            }
+            equipos.append({
+                "codequipo": str(e.get("codequipo") or ""),
+                "cod_temporada": cod_temporada,
+                "slug": e.get("slug"),
+                "cod_grupo": cod_grupo,
+                "nombre": e.get("nombre_equipo"),
+                "categoria": e.get("categoria"),
+                "club": club,
+            })
+        with self._transaccion() as con:
+            con.executemany(
+                _upsert("grupos", ("cod_grupo", "cod_temporada", "nombre", "cod_competicion"), ("cod_grupo",)),
+                list(grupos.values()),
+            )
+            con.executemany(
+                _upsert(
+                    "equipos",
+                    ("codequipo", "cod_temporada", "slug", "cod_grupo", "nombre", "categoria", "club"),
+                    ("codequipo", "cod_temporada"),
+                ),
+                equipos,
+            )
+
+    def guardar_partidos(self, partidos: List[Dict]) -> int:
+        """
+        Upsert de partidos (dicts con las columnas de `partidos`). Anota en
+        `correcciones` cualquier resultado que cambie. Devuelve cuántas filas
+        se insertaron o cambiaron.
+        """
+        if not partidos:
+            return 0
+        with self._transaccion() as con:
+            return self._upsert_partidos(con, partidos)
+
+    def guardar_jornada(self, cod_grupo: str, jornada, partidos: List[Dict]) -> int:
+        """
+        Como `guardar_partidos`, pero la jornada descargada sustituye a la
+        guardada: se borran los partidos del grupo y jornada que ya no vienen
+        (movidos a otra jornada o eliminados). Una jornada vacía no borra nada:
+        puede ser una respuesta incompleta.
+        """
+        if not partidos:
+            return 0
+        with self._transaccion() as con:
+            cambios = self._upsert_partidos(con, partidos)
+            antes = con.total_changes
+            con.execute(
+                f"DELETE FROM partidos WHERE cod_grupo = ? AND jornada IS ? AND codacta NOT IN "
+                f"({', '.join('?' * len(partidos))})",
+                [str(cod_grupo), jornada] + [p["codacta"] for p in partidos],
+            )
+            borrados = con.total_changes - antes
+        if borrados:
+            logger.info(f"🗑️  {borrados} partido(s) que ya no están en la jornada {jornada} del grupo {cod_grupo}")
+        return cambios + borrados
+
+    def _upsert_partidos(self, con: sqlite3.Connection, partidos: List[Dict]) -> int:
+        ahora = datetime.now().isoformat(timespec="seconds")
+        previos = {
+            fila["codacta"]: fila["resultado"]
+            for fila in con.execute(
+                f"SELECT codacta, resultado FROM partidos WHERE codacta IN "
+                f"({', '.join('?' * len(partidos))})",
+                [p["codacta"] for p in partidos],
+            )
+        }
+        correcciones = [
+            (p["codacta"], previos[p["codacta"]], p["resultado"], ahora)
+            for p in partidos
+            if previos.get(p["codacta"]) and previos[p["codacta"]] != p["resultado"]
+        ]
+        antes = con.total_changes
+        con.executemany(_upsert("partidos", _COLUMNAS_PARTIDO, ("codacta",)), partidos)
+        cambios = con.total_changes - antes
+        if correcciones:
+            con.executemany(
+                "INSERT INTO correcciones (codacta, anterior, resultado, detectada) "
+                "VALUES (?, ?, ?, ?)",
+                correcciones,
+            )
+            logger.info(f"✎ {len(correcciones)} resultado(s) corregido(s) por la federación")
+        return cambios
+
+    def guardar_clasificacion(self, cod_grupo: str, jornada: int, filas: List[FilaClasificacion]) -> None:
+        """Foto de la clasificación del grupo en una jornada (sustituye la anterior)."""
+        if not filas:
+            return
+        registros = [
+            {
+                "cod_grupo": str(cod_grupo), "jornada": int(jornada),
+                "posicion": f.posicion, "equipo": f.equipo, "codequipo": f.codequipo,
+                "puntos": f.puntos, "pj": f.pj, "pg": f.pg, "pe": f.pe, "pp": f.pp,
+                "gf": f.gf, "gc": f.gc, "racha": json.dumps(f.racha),
+            }
+            for f in filas
+        ]
+        with self._transaccion() as con:
+            con.executemany(
+                _upsert("clasificaciones", registros[0].keys(), ("cod_grupo", "jornada", "posicion")),
+                registros,
+            )
+            # Filas sobrantes si el grupo ha perdido equipos (retirados).
+            con.execute(
+                "DELETE FROM clasificaciones WHERE cod_grupo = ? AND jornada = ? AND posicion > ?",
+                (str(cod_grupo), int(jornada), len(registros)),
+            )
+
+    def guardar_plantilla(self, codequipo: str, cod_temporada: str, plantilla: List[Jugador]) -> None:
+        with self._transaccion() as con:
+            con.executemany(
+                _upsert("jugadores", ("codjugador", "nombre"), ("codjugador",)),
+                [{"codjugador": j.id, "nombre": j.nombre} for j in plantilla],
+            )
+            con.executemany(
+                _upsert("plantillas", ("codequipo", "cod_temporada", "codjugador"),
+                        ("codequipo", "cod_temporada", "codjugador")),
+                [
+                    {"codequipo": str(codequipo), "cod_temporada": str(cod_temporada), "codjugador": j.id}
+                    for j in plantilla
+                ],
+            )
+
+    @property
+    def persistente(self) -> bool:
+        """¿Sobrevive al run? (Con el almacén en memoria no hay nada que acumular.)"""
+        return self.path is not None
+
+    def actas_sin_sumar(self, codactas: Iterable[str]) -> List[str]:
+        """Las `codactas` que aún no se han descargado, en el mismo orden."""
+        codactas = [str(c) for c in codactas]
+        if not codactas:
+            return []
+        with self._lock:
+            sumadas = {
+                fila[0] for fila in self._con.execute(
+                    f"SELECT codacta FROM actas WHERE codacta IN ({', '.join('?' * len(codactas))})",
+                    codactas,
+                )
+            }
+        return [c for c in codactas if c not in sumadas]
+
+    def guardar_acta(self, codacta: str, cod_temporada: str, alineaciones: List[Dict]) -> bool:
+        """
+        Guarda las alineaciones de un acta (dicts con codequipo, codjugador,
+        nombre, dorsal y, si el acta los trae, titular, goles, amarillas,
+        rojas y minutos). Sustituyen a las que hubiera del acta: si la
+        federación la corrige, los totales de `estadisticas_equipo` cambian
+        con ella. Un acta sin alineaciones no borra las guardadas. Devuelve
+        True si el acta era nueva.
+        """
+        codacta = str(codacta)
+        cod_temporada = str(cod_temporada)
+        filas = [{c: a.get(c) for c in _COLUMNAS_ALINEACION} for a in alineaciones]
+        for f in filas:
+            f["codacta"] = codacta
+            if f["titular"] is not None:
+                f["titular"] = int(bool(f["titular"]))
+        with self._transaccion() as con:
+            # El nombre del acta ("APELLIDOS, NOMBRE") sólo si no lo hay de la plantilla.
+            con.executemany(
+                "INSERT OR IGNORE INTO jugadores (codjugador, nombre) VALUES (:codjugador, :nombre)",
+                [{"codjugador": a["codjugador"], "nombre": a.get("nombre") or ""} for a in alineaciones],
+            )
+            con.executemany(
+                _upsert("alineaciones", _COLUMNAS_ALINEACION, ("codacta", "codjugador")), filas
+            )
+            if filas:
+                con.execute(
+                    f"DELETE FROM alineaciones WHERE codacta = ? AND codjugador NOT IN "
+                    f"({', '.join('?' * len(filas))})",
+                    [codacta] + [f["codjugador"] for f in filas],
+                )
+            nueva = con.execute(
+                "INSERT OR IGNORE INTO actas (codacta, cod_temporada, sumada) VALUES (?, ?, ?)",
+                (codacta, cod_temporada, datetime.now().isoformat(timespec="seconds")),
+            ).rowcount == 1
+        return nueva
+
+    # -- consultas --------------------------------------------------------
+
+    def partidos_equipo(
+        self,
+        cod_grupo: str,
+        codequipo: str,
+        maps_url: Callable[[str], Optional[str]] = lambda campo: None,
+    ) -> List[Partido]:
+        """Partidos de un equipo en su grupo, por jornada (vista de `todos_partidos`)."""
+        codequipo = str(codequipo)
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT * FROM partidos WHERE cod_grupo = ? AND (cod_local = ? OR cod_visitante = ?) "
+                "ORDER BY jornada, fecha",
+                (str(cod_grupo), codequipo, codequipo),
+            ).fetchall()
+        return [partido_de_fila(f, codequipo, maps_url) for f in filas]
+
+    def partidos_grupo(self, cod_grupo: str) -> List[Dict]:
+        """Todos los partidos guardados de un grupo (también los de los rivales)."""
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT * FROM partidos WHERE cod_grupo = ? ORDER BY jornada, fecha, hora",
+                (str(cod_grupo),),
+            ).fetchall()
+        return [dict(f) for f in filas]
+
+    def partidos_club_entre(
+        self, cod_temporada: str, desde: str, hasta: str, club: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Partidos de los equipos guardados entre dos fechas `YYYY-MM-DD`
+        (inclusive); con `club` (clave_acceso), sólo los de ese club.
+        """
+        filtro, params = "", [str(cod_temporada), desde, hasta]
+        if club is not None:
+            filtro = "AND e.club = ? "
+            params.append(str(club))
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT p.*, e.slug, e.club FROM partidos p "
+                "JOIN equipos e ON e.cod_temporada = p.cod_temporada "
+                " AND e.codequipo IN (p.cod_local, p.cod_visitante) "
+                "WHERE p.cod_temporada = ? AND p.fecha BETWEEN ? AND ? "
+                + filtro
+                + "ORDER BY p.fecha, p.hora",
+                params,
+            ).fetchall()
+        return [dict(f) for f in filas]
+
+    def clasificacion(self, cod_grupo: str, jornada: Optional[int] = None) -> List[FilaClasificacion]:
+        """Clasificación del grupo en `jornada` (por defecto la última guardada)."""
+        with self._lock:
+            if jornada is None:
+                fila = self._con.execute(
+                    "SELECT MAX(jornada) FROM clasificaciones WHERE cod_grupo = ?", (str(cod_grupo),)
+                ).fetchone()
+                jornada = fila[0]
+            if jornada is None:
+                return []
+            filas = self._con.execute(
+                "SELECT * FROM clasificaciones WHERE cod_grupo = ? AND jornada = ? ORDER BY posicion",
+                (str(cod_grupo), int(jornada)),
+            ).fetchall()
+        return [
+            FilaClasificacion(
+                posicion=f["posicion"], equipo=f["equipo"], puntos=f["puntos"],
+                pj=f["pj"], pg=f["pg"], pe=f["pe"], pp=f["pp"], codequipo=f["codequipo"],
+                gf=f["gf"], gc=f["gc"], racha=json.loads(f["racha"] or "[]"),
+            )
+            for f in filas
+        ]
+
+    def plantilla(self, codequipo: str, cod_temporada: str) -> Set[str]:
+        """codjugador de los jugadores ya vistos en la plantilla del equipo esta temporada."""
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT codjugador FROM plantillas WHERE codequipo = ? AND cod_temporada = ?",
+                (str(codequipo), str(cod_temporada)),
+            ).fetchall()
+        return {f[0] for f in filas}
+
+    def nombres_plantilla(self, codequipo: str, cod_temporada: str) -> Dict[str, str]:
+        """codjugador → nombre de los jugadores vistos en la plantilla del equipo esta temporada."""
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT j.codjugador, j.nombre FROM plantillas p "
+                "JOIN jugadores j ON j.codjugador = p.codjugador "
+                "WHERE p.codequipo = ? AND p.cod_temporada = ? ORDER BY j.nombre",
+                (str(codequipo), str(cod_temporada)),
+            ).fetchall()
+        return {f[0]: f[1] for f in filas}
+
+    def apariciones_jugador(self, codjugador: str) -> List[Dict]:
+        """Partidos en los que aparece un jugador en el acta, del más antiguo al más reciente."""
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT a.codacta, a.codequipo, a.dorsal, p.fecha, p.jornada, p.local, "
+                "p.visitante, p.resultado FROM alineaciones a "
+                "LEFT JOIN partidos p ON p.codacta = a.codacta "
+                "WHERE a.codjugador = ? ORDER BY p.fecha",
+                (str(codjugador),),
+            ).fetchall()
+        return [dict(f) for f in filas]
+
+    def estadisticas_equipo(self, codequipo: str, cod_temporada: str) -> Dict[str, Dict]:
+        """
+        codjugador → nombre y totales de la temporada con este equipo. Lo
+        que ningún acta ha traído queda en None (SUM de sólo NULL), no a cero.
+        """
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT a.codjugador, j.nombre, COUNT(*) AS partidos, "
+                + ", ".join(f"SUM(a.{c}) AS {total}" for c, total in _ACUMULABLES.items())
+                + " FROM alineaciones a "
+                "JOIN actas t ON t.codacta = a.codacta "
+                "LEFT JOIN jugadores j ON j.codjugador = a.codjugador "
+                "WHERE a.codequipo = ? AND t.cod_temporada = ? "
+                "GROUP BY a.codjugador ORDER BY partidos DESC, j.nombre",
+                (str(codequipo), str(cod_temporada)),
+            ).fetchall()
+        return {
+            f["codjugador"]: {
+                "nombre": f["nombre"],
+                "partidos": f["partidos"],
+                **{col: f[col] for col in _ACUMULABLES.values()},
+            }
+            for f in filas
+        }
+
+    def correcciones(self, codacta: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            if codacta is None:
+                filas = self._con.execute("SELECT * FROM correcciones ORDER BY detectada").fetchall()
+            else:
+                filas = self._con.execute(
+                    "SELECT * FROM correcciones WHERE codacta = ? ORDER BY detectada", (str(codacta),)
+                ).fetchall()
+        return [dict(f) for f in filas]
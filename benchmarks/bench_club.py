@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark end-to-end de un run de club (`procesar_club` + `generar_home`).
+
+Uso:
+    python benchmarks/bench_club.py [--escalas 1,17,200,2000] [--cassette C.json.gz]
+                                    [--latencia lognormal:0.08,0.5] [--dormir]
+                                    [--comparar benchmarks/resultados/ANTERIOR.json]
+
+Cada escala se ejecuta en un subproceso propio (el pico de RSS es por
+proceso) contra el stand-in local `ffcv_stub.py` con un club sintético de N
+equipos. Con `--cassette`, la escala `17` reproduce el run real grabado con
+`scraper.py --record` en lugar del club sintético.
+
+Por escala se mide: tiempo total, peticiones, bytes recibidos (en red,
+comprimidos si el servidor comprime), tiempo en `time.sleep` del scraper
+(backoff + pausas de cortesía), pico de RSS y el desglose por fase. Por defecto los sleeps se contabilizan sin dormir — así
+la escala 2000 termina en minutos; `--dormir` los ejecuta de verdad.
+
+El resultado se guarda en `benchmarks/resultados/<fecha>-<commit>.json` para
+compararlo entre commits con `--comparar`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+RESULTADOS_DIR = Path(__file__).resolve().parent / "resultados"
+
+# Fase → funciones de `scraper` cuyo tiempo se le atribuye. Las funciones se
+# envuelven en el módulo, así que process_team las llama ya instrumentadas.
+FASES = {
+    "descubrimiento": ["cargar_o_descubrir_club_map"],
+    "calendario": ["obtener_partidos_via_api"],
+    "clasificacion": ["_cod_jornada_mas_reciente", "obtener_clasificacion_via_api"],
+    "actas": ["obtener_dorsales_via_api"],
+    "plantilla": ["obtener_plantilla_via_api"],
+    "json": ["generar_json"],
+    "ics": ["generar_calendario_ics"],
+    "html": ["renderizar_paginas"],
+    "home": ["generar_home"],
+}
+
+
+class _RelojMedido:
+    """Sustituto de `time` dentro de `scraper`: cuenta (y opcionalmente hace) los sleeps."""
+
+    def __init__(self, dormir: bool):
+        self._dormir = dormir
+        self.segundos = 0.0
+        self.llamadas = 0
+
+    def sleep(self, segundos: float) -> None:
+        self.segundos += segundos
+        self.llamadas += 1
+        if self._dormir:
+            time.sleep(segundos)
+
+    def __getattr__(self, nombre):
+        return getattr(time, nombre)
+
+
+def _instrumentar_fases(scraper) -> Dict[str, Dict[str, float]]:
+    tiempos: Dict[str, Dict[str, float]] = {f: {"segundos": 0.0, "llamadas": 0} for f in FASES}
+
+    def envolver(fase: str, fn):
+        def medida(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tiempos[fase]["segundos"] += time.perf_counter() - t0
+                tiempos[fase]["llamadas"] += 1
+        return medida
+
+    for fase, nombres in FASES.items():
+        for nombre in nombres:
+            setattr(scraper, nombre, envolver(fase, getattr(scraper, nombre)))
+    return tiempos
+
+
+def _instrumentar_sesion(scraper) -> Dict[str, int]:
+    contadores = {"peticiones": 0, "bytes": 0}
+    sesion = scraper._get_session()
+    get_original = sesion.get
+
+    def get_medido(url, params=None, **kwargs):
+        response = get_original(url, params=params, **kwargs)
+        contadores["peticiones"] += 1
+        # En red, como la telemetría: con gzip/br cuenta lo comprimido.
+        contadores["bytes"] += scraper._bytes_en_red(response)
+        return response
+
+    sesion.get = get_medido
+    return contadores
+
+
+def ejecutar_escala(n_equipos: int, args) -> Dict:
+    """Un run completo del club en este proceso. Devuelve las métricas."""
+    logging.disable(logging.WARNING if not args.verbose else logging.NOTSET)
+
+    import cassette
+    import ffcv_stub
+
+    servidor = None
+    origen = "sintetico"
+    if args.cassette and n_equipos == 17:
+        origen = f"cassette:{args.cassette.name}"
+    else:
+        servidor = ffcv_stub.arrancar_en_hilo(
+            ffcv_stub.FixturesSinteticos(n_equipos),
+            ffcv_stub.ConfigFallos(latencia=args.latencia),
+        )
+        os.environ["FFCV_API_BASE"] = servidor.url_base
+        os.environ["FFCV_WEB_BASE"] = servidor.url_web
+
+    import scraper
+
+    if servidor is None:
+        scraper.instalar_sesion(cassette.SesionReproductora(
+            cassette.Cassette.cargar(args.cassette), error_cls=scraper.FFCVAPIError,
+        ))
+
+    club_config = scraper.load_club_config() if servidor is None else None
+    if club_config is None:
+        club_config = {
+            "club": {"nombre": "C.F. Extramurs Valencia", "codigo_club": 4740, "clave_acceso": 4189},
+            "temporada": {"codigo": 21, "nombre": "2025-2026"},
+            "sitio": {"url_base": "https://wakkos.github.io/cf-extramurs"},
+        }
+
+    salida = Path(tempfile.mkdtemp(prefix=f"bench-club-{n_equipos}-"))
+    scraper.BASE_DIR = salida
+    scraper.DATA_DIR = salida / "data"
+
+    reloj = _RelojMedido(args.dormir)
+    scraper.time = reloj
+    fases = _instrumentar_fases(scraper)
+    red = _instrumentar_sesion(scraper)
+
+    t0 = time.perf_counter()
+    scraper.procesar_club(club_config)
+    with open(scraper.DATA_DIR / "club_map.json", "r", encoding="utf-8") as f:
+        club_map = json.load(f)
+    scraper.generar_home(club_config, club_map)
+    total = time.perf_counter() - t0
+
+    if servidor is not None:
+        servidor.shutdown()
+
+    equipos = len(club_map.get("equipos") or [])
+    return {
+        "equipos": n_equipos,
+        "equipos_procesados": equipos,
+        "origen": origen,
+        "latencia": args.latencia,
+        "sleeps_reales": args.dormir,
+        "segundos_total": round(total, 3),
+        "peticiones": red["peticiones"],
+        "bytes_recibidos": red["bytes"],
+        "segundos_en_sleep": round(reloj.segundos, 3),
+        "llamadas_sleep": reloj.llamadas,
+        # ru_maxrss es KB en Linux y bytes en macOS.
+        "pico_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+        ),
+        "fases": {
+            f: {"segundos": round(v["segundos"], 3), "llamadas": int(v["llamadas"])}
+            for f, v in fases.items()
+        },
+    }
+
+
+def _commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def _imprimir(resultados: List[Dict]) -> None:
+    print(f"\n{'equipos':>8s} {'total s':>9s} {'peticiones':>11s} {'MB':>8s} "
+          f"{'sleep s':>9s} {'RSS MB':>8s}  fase más lenta")
+    for r in resultados:
+        lenta = max(r["fases"].items(), key=lambda kv: kv[1]["segundos"])
+        print(
+            f"{r['equipos']:8d} {r['segundos_total']:9.2f} {r['peticiones']:11d} "
+            f"{r['bytes_recibidos'] / 1e6:8.2f} {r['segundos_en_sleep']:9.1f} "
+            f"{r['pico_rss_mb']:8.1f}  {lenta[0]} ({lenta[1]['segundos']:.2f}s)"
+        )
+
+
+def _comparar(actual: List[Dict], anterior_path: Path) -> None:
+    with open(anterior_path, "r", encoding="utf-8") as f:
+        anterior = {r["equipos"]: r for r in json.load(f)["escalas"]}
+    print(f"\nComparación con {anterior_path.name}:")
+    for r in actual:
+        prev = anterior.get(r["equipos"])
+        if not prev:
+            continue
+        partes = []
+        for clave in ("segundos_total", "peticiones", "bytes_recibidos", "segundos_en_sleep", "pico_rss_mb"):
+            a, b = prev[clave], r[clave]
+            delta = (b - a) / a * 100 if a else 0.0
+            partes.append(f"{clave} {delta:+.1f}%")
+        print(f"  {r['equipos']:5d} equipos: " + ", ".join(partes))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end de un run de club")
+    parser.add_argument("--escalas", default="1,17,200,2000")
+    parser.add_argument("--cassette", type=Path, help="cassette real para la escala 17")
+    parser.add_argument("--latencia", default=None, help="distribución de latencia del stand-in")
+    parser.add_argument("--dormir", action="store_true", help="ejecutar los sleeps del scraper")
+    parser.add_argument("--comparar", type=Path, help="JSON de resultados anterior")
+    parser.add_argument("--salida", type=Path, help="ruta del JSON de resultados")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--_hijo", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._hijo is not None:
+        # Proceso hijo: una sola escala, métricas por stdout.
+        print(json.dumps(ejecutar_escala(args._hijo, args)))
+        return
+
+    resultados: List[Dict] = []
+    for n in (int(x) for x in args.escalas.split(",") if x.strip()):
+        print(f"⏱  Escala {n} equipo(s)...", flush=True)
+        cmd = [sys.executable, __file__, "--_hijo", str(n)]
+        if args.cassette:
+            cmd += ["--cassette", str(args.cassette)]
+        if args.latencia:
+            cmd += ["--latencia", args.latencia]
+        if args.dormir:
+            cmd.append("--dormir")
+        if args.verbose:
+            cmd.append("--verbose")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr[-4000:], file=sys.stderr)
+            raise SystemExit(f"❌ Falló la escala {n}")
+        resultados.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    _imprimir(resultados)
+
+    commit = _commit_actual()
+    salida = args.salida or RESULTADOS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "fecha": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "escalas": resultados,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Resultados guardados en {salida}")
+
+    if args.comparar:
+        _comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark de `parseo`: fechas y marcadores tal como llegan de la API.
+
+Uso:
+    python benchmarks/bench_parseo.py [--n 20000] [--repeticiones 5]
+
+Genera `--n` fechas mezclando los formatos que aceptamos (mayoría
+`dd-mm-yyyy`, como en la API real) y mide:
+  - frío: caché vacía, cada string se parsea por primera vez;
+  - caliente: mismas strings otra vez, servidas desde la memoización;
+  - referencia: `datetime.strptime` sobre el formato canónico.
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import parseo  # noqa: E402
+
+_MESES = [
+    "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+    "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+]
+_DIAS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+
+def generar_fechas(n: int, semilla: int = 21) -> list:
+    rnd = random.Random(semilla)
+    inicio = date(2025, 9, 1)
+    fechas = []
+    for _ in range(n):
+        d = inicio + timedelta(days=rnd.randrange(300))
+        formato = rnd.random()
+        if formato < 0.85:
+            fechas.append(d.strftime("%d-%m-%Y"))
+        elif formato < 0.92:
+            fechas.append(f"{_DIAS[d.weekday()]}, {d.day:02d} De {_MESES[d.month - 1].capitalize()}")
+        elif formato < 0.97:
+            fechas.append(d.strftime("%d/%m/%Y"))
+        else:
+            fechas.append(d.strftime("%d/%m"))
+    return fechas
+
+
+def medir(fn, datos, repeticiones: int) -> float:
+    """Mejor tiempo (s) de `repeticiones` pasadas de fn sobre todos los datos."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for x in datos:
+            fn(x)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    parseo.configurar_temporada("2025-2026")
+    fechas = generar_fechas(args.n)
+    canonicas = [f for f in fechas if len(f) == 10 and f[2] == "-"]
+    marcadores = [f"{random.randrange(10)} - {random.randrange(10)}" for _ in range(args.n)]
+
+    def frio(x):
+        parseo._parse_fecha.cache_clear()
+        return parseo.parse_fecha(x)
+
+    resultados = {
+        "fechas (frío, sin caché)": (medir(frio, fechas, args.repeticiones), len(fechas)),
+        "fechas (caliente)": (medir(parseo.parse_fecha, fechas, args.repeticiones), len(fechas)),
+        "strptime canónico (referencia)": (
+            medir(lambda x: datetime.strptime(x, "%d-%m-%Y"), canonicas, args.repeticiones),
+            len(canonicas),
+        ),
+        "marcadores (caliente)": (
+            medir(parseo.normalizar_resultado, marcadores, args.repeticiones),
+            len(marcadores),
+        ),
+    }
+
+    print(f"{'caso':34s} {'n':>7s} {'total ms':>10s} {'µs/op':>8s}")
+    for nombre, (segundos, n) in resultados.items():
+        print(f"{nombre:34s} {n:7d} {segundos * 1000:10.2f} {segundos / n * 1e6:8.3f}")
+    info = parseo._parse_fecha.cache_info()
+    print(f"\ncaché fechas: {info.currsize} entradas, {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
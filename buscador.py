@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de búsqueda del sitio, precalculado para buscar en el navegador.
+
+Cubre jugadores de las plantillas del club, equipos del club, rivales y
+campos. Se escribe al final del run en `data/buscar/`, repartido en
+fragmentos para que el navegador sólo descargue los que necesita la
+consulta:
+
+- `indice.json`: versión, número de documentos y el hash de cada
+  fragmento (la home lo pide con `?v=<hash>`, así que la caché del
+  navegador y del service worker nunca sirve uno viejo).
+- `<clave>.json`: `{"p": {token: [ids]}, "g": {trigrama: [ids]}}`, los
+  tokens y trigramas que empiezan por `clave` (dos caracteres). Sólo ids.
+- `docs-<n>.json`: los documentos `[tipo, nombre, detalle, url]` con ids
+  de `n * DOCUMENTOS_POR_FRAGMENTO` en adelante. Cada documento está una
+  sola vez; el navegador pide los bloques de los resultados que enseña.
+
+Los ids siguen el orden de los resultados a igual relevancia (tipo y
+nombre), así que el navegador ordena sin tener los documentos.
+
+El texto se pliega igual que en el navegador (`plegar`): NFKD sin marcas
+diacríticas, minúsculas y sólo `[a-z0-9]`. Se busca primero por prefijo
+de palabra ("gar" → "García"). Si salen pocos resultados, se busca por
+trigramas, que toleran erratas y trozos de palabra ("arcia"). Los tokens
+sólo numéricos (años, números de los slugs) no se indexan.
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+DIR_BUSCAR = "buscar"
+INDICE = "indice.json"
+INDICE_VERSION = 2
+LONGITUD_CLAVE = 2
+DOCUMENTOS_POR_FRAGMENTO = 256
+PREFIJO_DOCUMENTOS = "docs-"
+
+# Tipos de documento (el orden es el de los resultados a igual relevancia).
+EQUIPO = "e"
+JUGADOR = "j"
+RIVAL = "r"
+CAMPO = "c"
+_ORDEN_TIPOS = (EQUIPO, JUGADOR, RIVAL, CAMPO)
+
+_RE_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def plegar(texto: str) -> str:
+    """'Ñoño García-López' → 'nono garcia lopez' (igual que `plegar` en la home)."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    # Categoría M completa, como `\p{M}` en el navegador.
+    sin_marcas = "".join(c for c in descompuesto if not unicodedata.category(c).startswith("M"))
+    return _RE_NO_ALFANUMERICO.sub(" ", sin_marcas.lower()).strip()
+
+
+def tokens(texto: str) -> List[str]:
+    """Palabras plegadas que se indexan (las sólo numéricas no)."""
+    return [t for t in plegar(texto).split() if not t.isdigit()]
+
+
+def trigramas(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+@dataclass(slots=True)
+class Documento:
+    """
+    Un resultado de búsqueda. `texto` es lo que se indexa (por defecto el
+    nombre); `detalle` es la línea secundaria y `url` es relativa a la
+    raíz del club.
+    """
+
+    tipo: str
+    nombre: str
+    detalle: str
+    url: str
+    texto: str = ""
+
+    def a_json(self) -> List[str]:
+        return [self.tipo, self.nombre, self.detalle, self.url]
+
+
+def ordenar(documentos: Iterable[Documento]) -> List[Documento]:
+    """Orden de los ids: por tipo y, dentro de cada tipo, por nombre plegado."""
+    return sorted(documentos, key=lambda d: (_ORDEN_TIPOS.index(d.tipo), plegar(d.nombre), d.url))
+
+
+def construir(documentos: List[Documento]) -> Dict[str, Dict]:
+    """Fragmentos por clave: {clave: {"p", "g"}}. Los ids son el orden de `documentos`."""
+    fragmentos: Dict[str, Dict] = {}
+
+    def anotar(seccion: str, termino: str, ident: int) -> None:
+        f = fragmentos.setdefault(termino[:LONGITUD_CLAVE], {"p": {}, "g": {}})
+        ids = f[seccion].setdefault(termino, [])
+        if not ids or ids[-1] != ident:
+            ids.append(ident)
+
+    for ident, doc in enumerate(documentos):
+        for token in dict.fromkeys(tokens(doc.texto or doc.nombre)):
+            if len(token) >= LONGITUD_CLAVE:
+                anotar("p", token, ident)
+            for trigrama in sorted(trigramas(token)):
+                anotar("g", trigrama, ident)
+
+    for f in fragmentos.values():
+        for seccion in ("p", "g"):
+            f[seccion] = dict(sorted(f[seccion].items()))
+    return fragmentos
+
+
+def bloques(documentos: List[Documento]) -> List[List[List[str]]]:
+    """Los documentos en bloques de `DOCUMENTOS_POR_FRAGMENTO`, por id."""
+    return [
+        [d.a_json() for d in documentos[i:i + DOCUMENTOS_POR_FRAGMENTO]]
+        for i in range(0, len(documentos), DOCUMENTOS_POR_FRAGMENTO)
+    ]
+
+
+def _escribir(path: Path, datos: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(datos)
+    os.replace(tmp, path)
+
+
+def escribir(directorio: Path, documentos: Iterable[Documento]) -> Dict:
+    """
+    Escribe los fragmentos y bloques que cambian, luego `indice.json` y por
+    último borra los que ya no existen. Devuelve {documentos, fragmentos,
+    bytes, escritos}.
+    """
+    documentos = ordenar(documentos)
+    fragmentos = construir(documentos)
+    por_bloque = {f"{PREFIJO_DOCUMENTOS}{n}.json": b for n, b in enumerate(bloques(documentos))}
+    ficheros = {f"{clave}.json": contenido for clave, contenido in fragmentos.items()}
+    ficheros.update(por_bloque)
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    hashes: Dict[str, str] = {}
+    total = escritos = 0
+    for nombre, contenido in sorted(ficheros.items()):
+        datos = json.dumps(contenido, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        hashes[nombre] = hashlib.sha256(datos).hexdigest()[:10]
+        total += len(datos)
+        path = directorio / nombre
+        if not path.exists() or path.read_bytes() != datos:
+            _escribir(path, datos)
+            escritos += 1
+
+    indice = {
+        "version": INDICE_VERSION,
+        "documentos": len(documentos),
+        "longitud_clave": LONGITUD_CLAVE,
+        "documentos_por_fragmento": DOCUMENTOS_POR_FRAGMENTO,
+        "fragmentos": {clave: hashes[f"{clave}.json"] for clave in sorted(fragmentos)},
+        "bloques": [hashes[nombre] for nombre in por_bloque],
+    }
+    _escribir(directorio / INDICE, json.dumps(indice, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    for path in directorio.glob("*.json"):
+        if path.name != INDICE and path.name not in ficheros:
+            path.unlink()
+    return {"documentos": len(documentos), "fragmentos": len(ficheros), "bytes": total, "escritos": escritos}
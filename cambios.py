@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Feed de cambios entre runs.
+
+Cada vez que se regenera `data/<slug>.json`, `diferencias` lo compara con
+la versión anterior y saca los eventos: partidos nuevos, resultados nuevos
+(o corregidos), partidos reprogramados (fecha, hora o campo), movimientos
+en la clasificación y jugadores nuevos en la plantilla. Un partido que
+aparece ya con resultado da sólo el evento `resultado` (con `anterior`
+nulo). Los partidos se identifican por `id_partido`; uno que antes no
+tenía acta se busca por jornada, local y visitante, para que recibir el
+acta no lo haga pasar por nuevo. `publicar` los añade con
+un número de secuencia a:
+
+- `data/changes.json`: todos los equipos del club, los últimos
+  `MAX_CAMBIOS` eventos.
+- `data/changes/<slug>.json`: los de un equipo, los últimos
+  `MAX_CAMBIOS_EQUIPO`.
+
+Los `seq` son del club: en el feed de un equipo hay huecos (eventos de
+otros equipos). Un consumidor guarda el último `seq` que ha visto y se
+queda con los eventos posteriores. Si su `seq` es menor que
+`recortado_hasta` (el último evento que ya no está en el feed) se ha
+perdido alguno y le toca releer los `data/<slug>.json` completos.
+
+La primera vez que se genera un equipo no hay eventos: no hay con qué
+comparar.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from modelos import Jugador
+
+FEED = "changes.json"
+DIR_EQUIPOS = "changes"
+FEED_VERSION = 1
+MAX_CAMBIOS = 500
+MAX_CAMBIOS_EQUIPO = 100
+
+_CAMPOS_HORARIO = ("fecha", "hora", "campo")
+
+# Los equipos pueden procesarse en hilos distintos; el feed es uno.
+_LOCK = threading.Lock()
+
+
+def _partidos(data: Dict) -> Dict[str, Dict]:
+    return {
+        str(p["id_partido"]): p
+        for p in data.get("todos_partidos") or []
+        if p.get("id_partido")
+    }
+
+
+def _clave_sin_acta(p: Dict) -> tuple:
+    return (p.get("jornada"), p.get("local"), p.get("visitante"))
+
+
+def _clave_fila(fila: Dict) -> str:
+    return str(fila.get("codequipo") or fila.get("equipo"))
+
+
+def diferencias(anterior: Optional[Dict], nuevo: Dict, jugadores_nuevos: Iterable[Jugador] = ()) -> List[Dict]:
+    """Eventos entre dos versiones del JSON de un equipo (sin `seq` ni fecha)."""
+    if anterior is None:
+        return []
+    eventos: List[Dict] = []
+
+    previos = _partidos(anterior)
+    sin_acta = {
+        _clave_sin_acta(p): p
+        for p in anterior.get("todos_partidos") or []
+        if not p.get("id_partido")
+    }
+    for id_partido, p in _partidos(nuevo).items():
+        viejo = previos.get(id_partido) or sin_acta.get(_clave_sin_acta(p))
+        partido = {
+            "id_partido": id_partido,
+            "jornada": p.get("jornada"),
+            "local": p.get("local"),
+            "visitante": p.get("visitante"),
+        }
+        ahora = {k: p.get(k) for k in _CAMPOS_HORARIO}
+        if viejo is None:
+            if p.get("resultado"):
+                eventos.append({"tipo": "resultado", **partido, "resultado": p["resultado"], "anterior": None})
+            else:
+                eventos.append({"tipo": "nuevo", **partido, "ahora": ahora})
+            continue
+        if p.get("resultado") and p.get("resultado") != viejo.get("resultado"):
+            eventos.append({
+                "tipo": "resultado", **partido,
+                "resultado": p["resultado"], "anterior": viejo.get("resultado"),
+            })
+        antes = {k: viejo.get(k) for k in _CAMPOS_HORARIO}
+        if antes != ahora:
+            eventos.append({"tipo": "reprogramado", **partido, "antes": antes, "ahora": ahora})
+
+    posiciones = {_clave_fila(f): f.get("posicion") for f in anterior.get("clasificacion") or []}
+    for fila in nuevo.get("clasificacion") or []:
+        antes = posiciones.get(_clave_fila(fila))
+        if antes is not None and antes != fila.get("posicion"):
+            eventos.append({
+                "tipo": "clasificacion",
+                "codequipo": fila.get("codequipo"),
+                "equipo": fila.get("equipo"),
+                "antes": antes,
+                "ahora": fila.get("posicion"),
+                "puntos": fila.get("puntos"),
+            })
+
+    for jugador in jugadores_nuevos:
+        eventos.append({"tipo": "jugador", "id": jugador.id, "nombre": jugador.nombre})
+    return eventos
+
+
+def _leer(path: Path) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == FEED_VERSION:
+            return data
+    except (OSError, json.JSONDecodeError):
+        pass
+    return {"version": FEED_VERSION, "ultimo_seq": 0, "recortado_hasta": 0, "cambios": []}
+
+
+def _escribir(path: Path, feed: Dict, maximo: int, **opciones) -> None:
+    if len(feed["cambios"]) > maximo:
+        feed["recortado_hasta"] = feed["cambios"][-maximo - 1]["seq"]
+        feed["cambios"] = feed["cambios"][-maximo:]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(feed, f, ensure_ascii=False, **opciones)
+    os.replace(tmp, path)
+
+
+def publicar(dir_datos: Path, slug: str, eventos: List[Dict]) -> None:
+    """Numera `eventos` del equipo `slug` y los añade al feed del club y al del equipo."""
+    if not eventos:
+        return
+    with _LOCK:
+        path_feed = dir_datos / FEED
+        feed = _leer(path_feed)
+        fecha = datetime.now().isoformat(timespec="seconds")
+        numerados = [
+            {"seq": feed["ultimo_seq"] + i, "fecha": fecha, "equipo": slug, **evento}
+            for i, evento in enumerate(eventos, 1)
+        ]
+        feed["ultimo_seq"] = numerados[-1]["seq"]
+        feed["cambios"].extend(numerados)
+        _escribir(path_feed, feed, MAX_CAMBIOS, indent=2)
+
+        path_equipo = dir_datos / DIR_EQUIPOS / f"{slug}.json"
+        feed_equipo = _leer(path_equipo)
+        feed_equipo["ultimo_seq"] = feed["ultimo_seq"]
+        feed_equipo["cambios"].extend(numerados)
+        _escribir(path_equipo, feed_equipo, MAX_CAMBIOS_EQUIPO, separators=(",", ":"))
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Transporte record/replay para `fetch_json`.
+
+- Grabación: `SesionGrabadora` es una `requests.Session` normal que, además,
+  apunta cada respuesta (status, cuerpo y validadores) en un cassette.
+- Reproducción: `SesionReproductora` no toca la red; sirve las respuestas del
+  cassette en el mismo orden en que se grabaron, con latencia artificial
+  opcional.
+
+Ambas se instalan como sesión compartida del scraper, así que `fetch_json`
+(reintentos, detección de respuestas transitorias, 429...) se ejecuta igual
+que contra la API real. El cassette es un JSON comprimido con gzip:
+
+    {
+      "version": 1,
+      "creado": "2026-10-19T07:00:00",
+      "interacciones": {
+        "filtros/jornadas_fetch.php?cod_grupo=905025285": [
+          {"status": 200, "body": "...", "headers": {"ETag": "..."}},
+          ...
+        ]
+      }
+    }
+
+Las claves no incluyen el host: un cassette grabado contra ffcv.es sirve
+igual cuando `FFCV_API_BASE` apunta a un stand-in local.
+"""
+
+import gzip
+import json
+import logging
+import random
+import time
+from datetime import datetime
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+# Cabeceras de respuesta que merece la pena conservar (validadores y tipo).
+_CABECERAS_GRABADAS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+
+def clave_peticion(url: str, params: Optional[Dict] = None) -> str:
+    """
+    Clave estable de una petición: ruta relativa a `/api/` + query ordenada.
+    `https://ffcv.es/competiciones/api/filtros/jornadas_fetch.php` con
+    `{"cod_grupo": 1}` → `filtros/jornadas_fetch.php?cod_grupo=1`.
+    """
+    partes = urlsplit(url)
+    ruta = partes.path
+    if "/api/" in ruta:
+        ruta = ruta.rsplit("/api/", 1)[1]
+    ruta = ruta.lstrip("/")
+    query = dict(p.split("=", 1) for p in partes.query.split("&") if "=" in p)
+    query.update({k: str(v) for k, v in (params or {}).items() if v is not None})
+    if not query:
+        return ruta
+    return f"{ruta}?{urlencode(sorted(query.items()))}"
+
+
+def parse_latencia(texto: Optional[str]) -> Tuple[float, float]:
+    """'0.05' → (0.05, 0.05); '0.02-0.2' → (0.02, 0.2). Segundos."""
+    if not texto:
+        return 0.0, 0.0
+    minimo, _, maximo = str(texto).partition("-")
+    lo = float(minimo)
+    hi = float(maximo) if maximo else lo
+    if hi < lo:
+        raise ValueError(f"Latencia inválida: {texto}")
+    return lo, hi
+
+
+class Cassette:
+    """Colección de respuestas grabadas, indexadas por `clave_peticion`."""
+
+    def __init__(self, path: Path, interacciones: Optional[Dict[str, List[Dict]]] = None):
+        self.path = Path(path)
+        self.interacciones: Dict[str, List[Dict]] = interacciones or {}
+        self._cursores: Dict[str, int] = {}
+
+    @classmethod
+    def cargar(cls, path: Path) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Versión de cassette no soportada: {data.get('version')}")
+        cassette = cls(path, data.get("interacciones") or {})
+        logger.info(
+            f"✓ Cassette cargado: {path} ({len(cassette.interacciones)} peticiones distintas, "
+            f"{cassette.total_respuestas} respuestas)"
+        )
+        return cassette
+
+    @property
+    def total_respuestas(self) -> int:
+        return sum(len(v) for v in self.interacciones.values())
+
+    def guardar(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": CASSETTE_VERSION,
+            "creado": datetime.now().isoformat(),
+            "interacciones": self.interacciones,
+        }
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(
+            f"✓ Cassette guardado: {self.path} ({self.total_respuestas} respuestas, "
+            f"{self.path.stat().st_size / 1024:.1f} KB)"
+        )
+
+    def anotar(self, clave: str, response: requests.Response) -> None:
+        self.interacciones.setdefault(clave, []).append({
+            "status": response.status_code,
+            "body": response.text,
+            "headers": {
+                h: response.headers[h] for h in _CABECERAS_GRABADAS if h in response.headers
+            },
+        })
+
+    def siguiente(self, clave: str) -> Optional[Dict]:
+        """
+        Devuelve la siguiente respuesta grabada para `clave`. Se sirven en
+        orden de grabación; agotadas, se repite la última (un run puede pedir
+        la misma URL más veces que el run grabado).
+        """
+        grabadas = self.interacciones.get(clave)
+        if not grabadas:
+            return None
+        idx = self._cursores.get(clave, 0)
+        self._cursores[clave] = idx + 1
+        return grabadas[min(idx, len(grabadas) - 1)]
+
+
+class SesionGrabadora(requests.Session):
+    """Session real que apunta cada respuesta GET en el cassette."""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def get(self, url, params=None, **kwargs):
+        response = super().get(url, params=params, **kwargs)
+        self.cassette.anotar(clave_peticion(url, params), response)
+        return response
+
+
+class SesionReproductora(requests.Session):
+    """
+    Session sin red que responde desde el cassette. Una petición no grabada
+    lanza `error_cls` (FFCVAPIError en el scraper) para fallar rápido sin
+    pasar por los reintentos de red.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latencia: Tuple[float, float] = (0.0, 0.0),
+        error_cls: type = RuntimeError,
+    ):
+        super().__init__()
+        self.cassette = cassette
+        self.latencia = latencia
+        self.error_cls = error_cls
+        self._rng = random.Random(0)
+
+    def get(self, url, params=None, **kwargs):
+        clave = clave_peticion(url, params)
+        entrada = self.cassette.siguiente(clave)
+        if entrada is None:
+            raise self.error_cls(f"Petición no grabada en {self.cassette.path.name}: {clave}")
+
+        lo, hi = self.latencia
+        if hi > 0:
+            time.sleep(lo if lo == hi else self._rng.uniform(lo, hi))
+
+        response = requests.Response()
+        response.status_code = entrada["status"]
+        try:
+            response.reason = HTTPStatus(entrada["status"]).phrase
+        except ValueError:
+            response.reason = ""
+        response._content = entrada["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.headers.update(entrada.get("headers") or {})
+        response.url = url
+        return response
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Caché local de escudos de equipos y rivales.
+
+La API da los escudos como rutas de ffcv.es (`/pnfg/pimg/Clubes/...`): en
+`club_map.json` los de los equipos del club y, si la clasificación los trae,
+los de los rivales. Enlazarlos tal cual hace que cada visita dependa del
+servidor de la federación. `CacheEscudos` los descarga una vez por temporada
+a `Images/escudos/` y las páginas los sirven desde ahí. Los escudos ya
+llevan la huella en el nombre y se enlazan tal cual; los sprites, que
+cambian de contenido con el mismo nombre, pasan por `recursos.py` como el
+resto de `Images/` (ver `servido_tal_cual`):
+
+- Cada URL se descarga una sola vez por temporada. Los que dan 404 o 410
+  se apuntan como ausentes y no se vuelven a pedir; cualquier otro error
+  (de red, 408, 429, 5xx...) corta la tanda y lo pendiente queda para el
+  siguiente run.
+- Se deduplican por contenido: dos URLs con la misma imagen (el escudo
+  genérico de la federación, el de un club con varios equipos) comparten
+  fichero, `<huella del original>.<ext>`.
+- Con Pillow se guarda una variante reducida (`LADO_VARIANTE` px de lado
+  mayor, PNG optimizado) en lugar del original. Sin Pillow, el original.
+- Opcionalmente (`sprites=True`, requiere Pillow), un sprite por grupo con
+  los escudos de su clasificación: una sola imagen por página en lugar de
+  una por fila.
+
+`Images/escudos/indice.json` guarda URL → huella, las variantes y los
+sprites. Al cambiar de temporada se vacía el directorio.
+"""
+
+import io
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from jinja2 import pass_context
+
+import recursos
+
+try:  # Pillow es opcional: sin él no hay variantes reducidas ni sprites.
+    from PIL import Image
+    PIL_DISPONIBLE = True
+except ImportError:
+    Image = None
+    PIL_DISPONIBLE = False
+
+logger = logging.getLogger(__name__)
+
+DIR_ESCUDOS = "Images/escudos"
+INDICE = "indice.json"
+INDICE_VERSION = 1
+# Los escudos se pintan a 20px CSS; 64px cubren pantallas de hasta 3x.
+LADO_VARIANTE = 64
+
+_FIRMAS = (
+    (b"\x89PNG", ".png"),
+    (b"\xff\xd8", ".jpg"),
+    (b"GIF8", ".gif"),
+)
+
+
+def _extension(datos: bytes, url: str) -> str:
+    """Extensión por el contenido; si no se reconoce, la de la URL."""
+    for firma, ext in _FIRMAS:
+        if datos.startswith(firma):
+            return ext
+    if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+        return ".webp"
+    if b"<svg" in datos[:512]:
+        return ".svg"
+    ext = os.path.splitext(url.split("?")[0])[1].lower()
+    return ext if ext in recursos.EXTENSIONES_IMAGEN else ".jpg"
+
+
+def _variante(datos: bytes) -> Optional[bytes]:
+    """PNG de `LADO_VARIANTE` px de lado mayor. None sin Pillow o si no es un mapa de bits legible."""
+    if not PIL_DISPONIBLE:
+        return None
+    try:
+        with Image.open(io.BytesIO(datos)) as imagen:
+            imagen = imagen.convert("RGBA")
+            imagen.thumbnail((LADO_VARIANTE, LADO_VARIANTE))
+            salida = io.BytesIO()
+            imagen.save(salida, format="PNG", optimize=True)
+    except (OSError, ValueError):
+        return None
+    return salida.getvalue()
+
+
+def _sprite(ficheros: List[Path]) -> Optional[bytes]:
+    """Tira horizontal de celdas de `LADO_VARIANTE` px con cada escudo centrado."""
+    if not PIL_DISPONIBLE or not ficheros:
+        return None
+    lado = LADO_VARIANTE
+    lienzo = Image.new("RGBA", (lado * len(ficheros), lado), (0, 0, 0, 0))
+    for i, path in enumerate(ficheros):
+        try:
+            with Image.open(path) as imagen:
+                imagen = imagen.convert("RGBA")
+                imagen.thumbnail((lado, lado))
+                lienzo.paste(imagen, (i * lado + (lado - imagen.width) // 2, (lado - imagen.height) // 2))
+        except (OSError, ValueError):
+            return None
+    salida = io.BytesIO()
+    lienzo.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
+
+def _escribir(path: Path, datos: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(datos)
+    os.replace(tmp, path)
+
+
+def servido_tal_cual(ruta: str) -> bool:
+    """
+    Si `ruta` (relativa a la raíz) es un escudo de la caché: su nombre ya es
+    la huella del contenido, así que no se publica otra copia en `assets/`.
+    """
+    directorio, _, nombre = ruta.rpartition("/")
+    return directorio == DIR_ESCUDOS and not nombre.startswith("sprite-")
+
+
+@dataclass(slots=True)
+class TablaEscudos:
+    """
+    Lo que necesitan las plantillas para pintar escudos (la reciben los
+    procesos de renderizado): URL remota → copia local (relativa a `raiz`) y
+    los sprites por grupo.
+    """
+
+    raiz: Path
+    base_remota: str
+    locales: Dict[str, str] = field(default_factory=dict)
+    # cod_grupo → {"ruta", "total", "posiciones": {url: índice}}
+    sprites: Dict[str, Dict] = field(default_factory=dict)
+
+    def remota(self, url: str) -> str:
+        return url if "://" in url else f"{self.base_remota}/{url.lstrip('/')}"
+
+
+def funciones_jinja(manifiesto: Optional[recursos.Manifiesto], tabla: Optional[TablaEscudos]) -> Dict:
+    """
+    Globales de Jinja para los escudos:
+
+    - `escudo(url)`: `src` de la imagen; la copia local si la hay, si no la
+      URL de ffcv.es.
+    - `escudo_sprite(url, cod_grupo)`: el `style` que recorta el escudo del
+      sprite del grupo, o "" si el grupo no tiene sprite o no lo incluye.
+    """
+
+    def _relativa(contexto, local: str) -> Optional[str]:
+        destino = contexto.get("_destino")
+        if not destino:
+            return None
+        pagina = Path(destino)
+        ruta = Path(os.path.relpath(tabla.raiz / local, pagina.parent)).as_posix()
+        return manifiesto.url(ruta, pagina) if manifiesto is not None else ruta
+
+    @pass_context
+    def escudo(contexto, url):
+        if not url or tabla is None:
+            return url
+        local = tabla.locales.get(url)
+        return (local and _relativa(contexto, local)) or tabla.remota(url)
+
+    @pass_context
+    def escudo_sprite(contexto, url, cod_grupo):
+        sprite = (tabla.sprites.get(str(cod_grupo)) if tabla else None) or {}
+        indice = sprite.get("posiciones", {}).get(url)
+        href = _relativa(contexto, sprite["ruta"]) if indice is not None else None
+        if href is None:
+            return ""
+        total = sprite["total"]
+        x = 100 * indice / (total - 1) if total > 1 else 0
+        return (
+            f"background-image:url('{href}');background-size:{total * 100}% 100%;"
+            f"background-position:{x:g}% 0"
+        )
+
+    return {"escudo": escudo, "escudo_sprite": escudo_sprite}
+
+
+class CacheEscudos:
+    """Escudos descargados de una raíz de salida y su índice."""
+
+    def __init__(self, raiz: Path):
+        self.raiz = raiz
+        self.directorio = raiz / DIR_ESCUDOS
+        self.path = self.directorio / INDICE
+        self.cod_temporada: Optional[str] = None
+        self.urls: Dict[str, str] = {}
+        self.ausentes: Set[str] = set()
+        self.ficheros: Dict[str, Dict] = {}
+        self.sprites: Dict[str, Dict] = {}
+        # Anotados en este run (pendientes de descargar) y URLs por grupo.
+        self.pedidos: Set[str] = set()
+        self.grupos: Dict[str, Set[str]] = {}
+        # Tras un error de red no se vuelve a intentar en el mismo run.
+        self.sin_red = False
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Índice de escudos ilegible ({e}); se rehace")
+            else:
+                if data.get("version") == INDICE_VERSION:
+                    self.cod_temporada = data.get("cod_temporada")
+                    self.urls = data.get("urls") or {}
+                    self.ausentes = set(data.get("ausentes") or [])
+                    self.ficheros = data.get("ficheros") or {}
+                    self.sprites = data.get("sprites") or {}
+
+    def _vaciar(self, cod_temporada: str) -> None:
+        if self.cod_temporada is not None:
+            logger.info(f"🛡️  Temporada nueva ({cod_temporada}): se vacía la caché de escudos")
+        if self.directorio.is_dir():
+            for path in self.directorio.iterdir():
+                if path.is_file() and path.name != INDICE:
+                    path.unlink()
+        self.cod_temporada = cod_temporada
+        self.urls, self.ausentes, self.ficheros, self.sprites = {}, set(), {}, {}
+
+    def anotar(self, url: Optional[str], cod_temporada: str, cod_grupo: Optional[str] = None) -> None:
+        """Pide el escudo `url` para este run (y, si se da, lo apunta al sprite de `cod_grupo`)."""
+        if not url:
+            return
+        if str(cod_temporada) != self.cod_temporada:
+            self._vaciar(str(cod_temporada))
+        self.pedidos.add(url)
+        if cod_grupo is not None:
+            self.grupos.setdefault(str(cod_grupo), set()).add(url)
+
+    def _vigente(self, huella: str) -> bool:
+        fichero = self.ficheros.get(huella)
+        return bool(fichero) and (self.directorio / fichero["fichero"]).exists()
+
+    def _guardar_escudo(self, url: str, datos: bytes) -> None:
+        huella = recursos.huella(datos)
+        self.urls[url] = huella
+        if self._vigente(huella):
+            return
+        variante = _variante(datos)
+        if variante is not None:
+            nombre, datos = f"{huella}.png", variante
+        else:
+            nombre = f"{huella}{_extension(datos, url)}"
+        _escribir(self.directorio / nombre, datos)
+        self.ficheros[huella] = {"fichero": nombre, "bytes": len(datos), "reducido": variante is not None}
+
+    def _reducir_pendientes(self) -> None:
+        """Originales guardados sin Pillow: se reducen en cuanto está disponible."""
+        if not PIL_DISPONIBLE:
+            return
+        for huella, fichero in self.ficheros.items():
+            path = self.directorio / fichero["fichero"]
+            if fichero.get("reducido") or path.suffix == ".svg" or not path.exists():
+                continue
+            variante = _variante(path.read_bytes())
+            if variante is None:
+                continue
+            _escribir(self.directorio / f"{huella}.png", variante)
+            if path.name != f"{huella}.png":
+                path.unlink()
+            self.ficheros[huella] = {"fichero": f"{huella}.png", "bytes": len(variante), "reducido": True}
+
+    def _actualizar_sprites(self) -> int:
+        generados = 0
+        for cod_grupo, urls in sorted(self.grupos.items()):
+            miembros = sorted({self.urls[u] for u in urls if u in self.urls and self._vigente(self.urls[u])})
+            previo = self.sprites.get(cod_grupo)
+            if previo and previo["miembros"] == miembros and (self.directorio / previo["fichero"]).exists():
+                continue
+            datos = _sprite([self.directorio / self.ficheros[h]["fichero"] for h in miembros])
+            if datos is None:
+                continue
+            nombre = f"sprite-{cod_grupo}.png"
+            _escribir(self.directorio / nombre, datos)
+            self.sprites[cod_grupo] = {"fichero": nombre, "miembros": miembros}
+            generados += 1
+        return generados
+
+    def actualizar(self, descargar: Callable[[str], Optional[bytes]], sprites: bool = False) -> Dict[str, int]:
+        """
+        Descarga los escudos anotados que aún no están en la caché y, con
+        `sprites`, rehace los sprites de los grupos anotados cuyo contenido
+        ha cambiado. `descargar(url)` devuelve los bytes, o None si el
+        escudo no existe; cualquier excepción corta las descargas de este
+        run (lo pendiente se reintenta en el siguiente). Guarda el índice.
+        """
+        descargados = 0
+        pendientes = [] if self.sin_red else sorted(
+            u for u in self.pedidos
+            if u not in self.ausentes and not (u in self.urls and self._vigente(self.urls[u]))
+        )
+        for url in pendientes:
+            try:
+                datos = descargar(url)
+            except Exception as e:
+                logger.warning(
+                    f"🛡️  No se pudo descargar el escudo {url} ({e}); "
+                    f"{len(pendientes) - descargados} pendiente(s) para el siguiente run"
+                )
+                self.sin_red = True
+                break
+            if not datos:
+                self.ausentes.add(url)
+                continue
+            self._guardar_escudo(url, datos)
+            descargados += 1
+
+        self._reducir_pendientes()
+        generados = self._actualizar_sprites() if sprites else 0
+        if descargados or generados or not self.path.exists():
+            self.guardar()
+        return {"descargados": descargados, "sprites": generados, "ficheros": len(self.ficheros)}
+
+    def guardar(self) -> None:
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDICE_VERSION,
+                "cod_temporada": self.cod_temporada,
+                "urls": dict(sorted(self.urls.items())),
+                "ausentes": sorted(self.ausentes),
+                "ficheros": dict(sorted(self.ficheros.items())),
+                "sprites": dict(sorted(self.sprites.items())),
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def tabla(self, base_remota: str) -> TablaEscudos:
+        """URL → copia local de lo que hay en la caché, y los sprites vigentes."""
+        locales = {
+            url: f"{DIR_ESCUDOS}/{self.ficheros[h]['fichero']}"
+            for url, h in self.urls.items()
+            if h in self.ficheros
+        }
+        sprites = {}
+        for cod_grupo, sprite in self.sprites.items():
+            indices = {h: i for i, h in enumerate(sprite["miembros"])}
+            sprites[cod_grupo] = {
+                "ruta": f"{DIR_ESCUDOS}/{sprite['fichero']}",
+                "total": len(sprite["miembros"]),
+                "posiciones": {url: indices[h] for url, h in self.urls.items() if h in indices},
+            }
+        return TablaEscudos(self.raiz, base_remota.rstrip("/"), locales, sprites)
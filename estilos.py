@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Hojas de estilo compartidas y CSS crítico en línea.
+
+Cada tipo de página (dashboard, plantilla, home) tiene su CSS en
+`templates/estilos/<tipo>.css`. `publicar` lo escribe como
+`assets/estilos/<tipo>.<hash>.css` (`recursos.Recursos`): un nombre que
+cambia cuando cambia el contenido, así que el navegador puede cachearlo
+indefinidamente y las ~35 páginas de equipo de un mismo tipo comparten una
+sola descarga.
+
+Las plantillas no enlazan la hoja directamente sino con un marcador
+`<link rel="stylesheet" data-estilos="<tipo>">`. `aplicar` lo sustituye,
+página a página, por:
+
+- un `<style>` con las reglas críticas: las que afectan a lo que hay por
+  encima del pliegue (entre `<body>` y el comentario `<!-- pliegue -->`, o
+  todo el body si la plantilla no lo marca). Se decide por las etiquetas,
+  clases e ids presentes en ese trozo de HTML.
+- el `<link>` a la hoja, que se carga sin bloquear el pintado
+  (`media="print"` y `onload`) y con `<noscript>` de respaldo.
+
+No se junta todo en una hoja única: las plantillas definen de forma
+distinta los mismos selectores (`body`, `.header`, `.btn`...).
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import postproceso
+from recursos import Recursos
+
+MARCA_PLIEGUE = "<!-- pliegue -->"
+
+_RE_ENLACE = re.compile(r"""<link\b[^>]*\bdata-estilos=["']([\w-]+)["'][^>]*>""", re.IGNORECASE)
+_RE_ESTILO = re.compile(r"<style\b[^>]*>(.*?)</style\s*>", re.IGNORECASE | re.DOTALL)
+_RE_ETIQUETA = re.compile(r"<([a-zA-Z][\w-]*)")
+_RE_ATRIBUTO = re.compile(r"""\b(class|id)\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+_RE_COMENTARIO = re.compile(r"/\*.*?\*/", re.DOTALL)
+# Lo que no restringe qué elementos casan a efectos del pliegue:
+# pseudoclases/pseudoelementos (con su argumento) y selectores de atributo.
+_RE_PSEUDO = re.compile(r"::?[\w-]+(\([^)]*\))?")
+_RE_ATRIBUTO_CSS = re.compile(r"\[[^\]]*\]")
+_RE_COMBINADOR = re.compile(r"[\s>+~]+")
+_RE_TIPO = re.compile(r"^[a-zA-Z][\w-]*")
+
+# Bloques @ cuyo contenido son reglas (y se filtran regla a regla).
+_AGRUPADORES = ("@media", "@supports")
+
+
+@dataclass(slots=True)
+class Regla:
+    """Una regla CSS: selector (o @-prelude) y declaraciones, o reglas hijas."""
+
+    prelude: str
+    cuerpo: str = ""
+    hijas: Optional[List["Regla"]] = None
+
+
+@dataclass(slots=True)
+class Hoja:
+    """Hoja publicada de un tipo de página (`bruto`: bytes de la fuente)."""
+
+    tipo: str
+    ruta: Path
+    css: str
+    bruto: int
+
+
+def parsear(css: str) -> List[Regla]:
+    """Reglas de primer nivel de `css`; @media/@supports con sus reglas hijas."""
+    css = _RE_COMENTARIO.sub("", css)
+    reglas: List[Regla] = []
+    i = 0
+    while i < len(css):
+        llave = css.find("{", i)
+        if llave < 0:
+            break
+        prelude = " ".join(css[i:llave].split())
+        # Cierre del bloque, contando llaves anidadas.
+        nivel, j = 1, llave + 1
+        while j < len(css) and nivel:
+            if css[j] == "{":
+                nivel += 1
+            elif css[j] == "}":
+                nivel -= 1
+            j += 1
+        interior = css[llave + 1:j - 1]
+        if prelude.lower().startswith(_AGRUPADORES):
+            reglas.append(Regla(prelude, hijas=parsear(interior)))
+        else:
+            reglas.append(Regla(prelude, " ".join(interior.split())))
+        i = j
+    return reglas
+
+
+def serializar(reglas: List[Regla]) -> str:
+    partes = []
+    for r in reglas:
+        if r.hijas is not None:
+            partes.append(f"{r.prelude}{{{serializar(r.hijas)}}}")
+        else:
+            partes.append(f"{r.prelude}{{{r.cuerpo}}}")
+    return postproceso.minificar_css("\n".join(partes))
+
+
+def _partir_selectores(prelude: str) -> List[str]:
+    """'a, b:is(.x, .y)' → ['a', 'b:is(.x, .y)'] (comas fuera de paréntesis)."""
+    partes, nivel, actual = [], 0, []
+    for c in prelude:
+        if c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+        elif c == "," and nivel == 0:
+            partes.append("".join(actual))
+            actual = []
+            continue
+        actual.append(c)
+    partes.append("".join(actual))
+    return [p.strip() for p in partes if p.strip()]
+
+
+def _selector_presente(selector: str, tags: Set[str], clases: Set[str], ids: Set[str]) -> bool:
+    """¿Aparecen en el HTML todas las etiquetas, clases e ids que nombra el selector?"""
+    selector = _RE_ATRIBUTO_CSS.sub("", _RE_PSEUDO.sub("", selector))
+    for compuesto in _RE_COMBINADOR.split(selector.strip()):
+        if not compuesto:
+            continue
+        tipo = _RE_TIPO.match(compuesto)
+        if tipo and tipo.group(0).lower() not in tags:
+            return False
+        if any(c not in clases for c in re.findall(r"\.([\w-]+)", compuesto)):
+            return False
+        if any(i not in ids for i in re.findall(r"#([\w-]+)", compuesto)):
+            return False
+    return True
+
+
+def _tokens_html(html: str) -> Tuple[Set[str], Set[str], Set[str]]:
+    tags = {t.lower() for t in _RE_ETIQUETA.findall(html)} | {"html", "body"}
+    clases: Set[str] = set()
+    ids: Set[str] = set()
+    for nombre, valor in _RE_ATRIBUTO.findall(html):
+        if nombre.lower() == "class":
+            clases.update(valor.split())
+        else:
+            ids.add(valor.strip())
+    return tags, clases, ids
+
+
+def _filtrar(reglas: List[Regla], tags: Set[str], clases: Set[str], ids: Set[str]) -> List[Regla]:
+    salida = []
+    for r in reglas:
+        if r.hijas is not None:
+            hijas = _filtrar(r.hijas, tags, clases, ids)
+            if hijas:
+                salida.append(Regla(r.prelude, hijas=hijas))
+        elif not r.prelude.startswith("@") and any(
+            _selector_presente(s, tags, clases, ids) for s in _partir_selectores(r.prelude)
+        ):
+            salida.append(r)
+    return salida
+
+
+def criticas(reglas: List[Regla], html: str) -> List[Regla]:
+    """Las reglas de `reglas` que afectan a algún elemento de `html`."""
+    return _filtrar(reglas, *_tokens_html(html))
+
+
+def _sobre_el_pliegue(html: str) -> str:
+    inicio = html.lower().find("<body")
+    fin = html.find(MARCA_PLIEGUE)
+    return html[max(inicio, 0):fin if fin > 0 else len(html)]
+
+
+def publicar(dir_fuentes: Path, recursos: Recursos, minificar: bool = True) -> Dict[str, Hoja]:
+    """Publica cada `dir_fuentes/<tipo>.css` como recurso con huella. Devuelve las hojas por tipo."""
+    hojas: Dict[str, Hoja] = {}
+    for fuente in sorted(dir_fuentes.glob("*.css")):
+        tipo = fuente.stem
+        css = fuente.read_text(encoding="utf-8")
+        bruto = len(css.encode("utf-8"))
+        if minificar:
+            css = postproceso.minificar_css(css) + "\n"
+        publicada = recursos.publicar_datos(f"estilos/{fuente.name}", css.encode("utf-8"))
+        hojas[tipo] = Hoja(tipo, recursos.raiz / publicada, css, bruto)
+    return hojas
+
+
+# Reglas parseadas por hoja (por proceso; el nombre lleva el hash).
+_REGLAS: Dict[Path, List[Regla]] = {}
+
+
+def _reglas(hoja: Hoja) -> List[Regla]:
+    if hoja.ruta not in _REGLAS:
+        _REGLAS[hoja.ruta] = parsear(hoja.css)
+    return _REGLAS[hoja.ruta]
+
+
+def aplicar(html: str, destino: Path, hojas: Dict[str, Hoja]) -> str:
+    """
+    Sustituye cada marcador `<link data-estilos="<tipo>">` de `html` (la
+    página que se escribirá en `destino`) por el CSS crítico en línea y el
+    enlace no bloqueante a la hoja del tipo. Un tipo sin hoja se deja tal
+    cual.
+    """
+    pliegue = None
+
+    def sustituir(m: re.Match) -> str:
+        nonlocal pliegue
+        hoja = hojas.get(m.group(1))
+        if hoja is None:
+            return m.group(0)
+        if pliegue is None:
+            pliegue = _sobre_el_pliegue(html)
+        href = Path(os.path.relpath(hoja.ruta, destino.parent)).as_posix()
+        critico = serializar(criticas(_reglas(hoja), pliegue))
+        return (
+            f"<style>{critico}</style>\n"
+            f'<link rel="stylesheet" href="{href}" media="print" onload="this.media=\'all\'">\n'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+        )
+
+    return _RE_ENLACE.sub(sustituir, html).replace(MARCA_PLIEGUE, "")
+
+
+def bytes_css_en_linea(html: str) -> int:
+    """Bytes de CSS que la página lleva dentro (bloques `<style>`)."""
+    return sum(len(m.group(1).encode("utf-8")) for m in _RE_ESTILO.finditer(html))
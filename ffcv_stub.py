@@ -0,0 +1,733 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in local de la API FFCV con latencia e inyección de fallos.
+
+Implementa los endpoints que usa el scraper (jornadas_fetch,
+resultados_por_grupo_jornada_data, clasificaciones_ajax, ficha_partido_ajax,
+ver_equipo, ajax_club_equipos, competiciones_fetch, grupos_fetch,
+datos_campo) y las imágenes de escudos (`/pnfg/pimg/...`) sirviendo datos de:
+
+  - un cassette grabado con `scraper.py --record` (`--cassette`), o
+  - un club sintético de N equipos generado de forma determinista
+    (`--sintetico N`), útil para medir escalas que no existen en la realidad.
+
+Sobre esos datos se inyectan, con las tasas configuradas, los mismos fallos
+que produce el proxy real: 429, respuestas `degraded_empty`, sesión upstream
+caducada y 500. Así se puede medir cómo afectan concurrencia, caché y backoff
+al tiempo total sin tocar ffcv.es.
+
+Uso:
+    python ffcv_stub.py --sintetico 17 --latencia lognormal:0.08,0.5 --tasa-429 0.01
+    FFCV_API_BASE=http://127.0.0.1:8765/competiciones/api \
+    FFCV_WEB_BASE=http://127.0.0.1:8765 python scraper.py
+
+Las respuestas válidas llevan `ETag` (y un 304 si el cliente manda
+`If-None-Match` coincidente) y van con gzip si el cliente lo acepta;
+`--sin-validadores` / `--sin-compresion` lo desactivan para comparar.
+
+`GET /_stub/estadisticas` devuelve los contadores por endpoint y
+`GET /_stub/reset` los pone a cero.
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from cassette import Cassette, clave_peticion
+
+logger = logging.getLogger(__name__)
+
+RUTA_API = "/competiciones/api"
+RUTA_IMAGENES = "/pnfg/pimg/"
+
+# PNG 1x1 transparente: las actas sintéticas llevan foto para ejercitar la
+# cosecha de fotos sin inflar el tamaño de las respuestas.
+_FOTO_DATA_URI = "data:image/png;base64," + base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6300010000000500010d0a2db40000"
+    "000049454e44ae426082"
+)).decode("ascii")
+
+
+def _png_liso(rgb: Tuple[int, int, int], lado: int) -> bytes:
+    """PNG RGB de `lado`×`lado` de un solo color (escudo sintético)."""
+    def bloque(tipo: bytes, datos: bytes) -> bytes:
+        return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+
+    fila = b"\x00" + bytes(rgb) * lado
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + bloque(b"IHDR", struct.pack(">IIBBBBB", lado, lado, 8, 2, 0, 0, 0))
+        + bloque(b"IDAT", zlib.compress(fila * lado))
+        + bloque(b"IEND", b"")
+    )
+
+
+# Colores de los escudos sintéticos de los rivales: pocos, para que haya
+# imágenes repetidas con URLs distintas (como el escudo genérico real).
+_COLORES_ESCUDO = [(200, 30, 30), (30, 90, 200), (20, 140, 60), (230, 180, 20), (90, 90, 90)]
+_ESCUDO_CLUB = "/pnfg/pimg/Clubes/extramurs.jpg"
+
+
+# ---------------------------------------------------------------------------
+# Latencia y fallos
+# ---------------------------------------------------------------------------
+
+def parse_distribucion(texto: Optional[str]) -> Callable[[random.Random], float]:
+    """
+    Distribución de latencia en segundos:
+        "fija:0.05"              siempre 50 ms
+        "uniforme:0.02,0.2"      uniforme entre 20 y 200 ms
+        "lognormal:0.08,0.5"     mediana 80 ms, sigma 0.5 (cola larga)
+    Vacío o None → sin latencia.
+    """
+    if not texto:
+        return lambda rng: 0.0
+    tipo, _, valores = texto.partition(":")
+    nums = [float(v) for v in valores.split(",") if v]
+    if tipo == "fija" and len(nums) == 1:
+        return lambda rng: nums[0]
+    if tipo == "uniforme" and len(nums) == 2:
+        return lambda rng: rng.uniform(nums[0], nums[1])
+    if tipo == "lognormal" and len(nums) == 2:
+        mu = math.log(nums[0])
+        return lambda rng: rng.lognormvariate(mu, nums[1])
+    raise ValueError(f"Distribución de latencia inválida: {texto}")
+
+
+class ConfigFallos:
+    """Tasas (0..1) de cada fallo inyectado y distribución de latencia."""
+
+    def __init__(
+        self,
+        latencia: Optional[str] = None,
+        tasa_429: float = 0.0,
+        tasa_degradada: float = 0.0,
+        tasa_sesion: float = 0.0,
+        tasa_500: float = 0.0,
+        semilla: int = 0,
+    ):
+        self.latencia = parse_distribucion(latencia)
+        self.tasa_429 = tasa_429
+        self.tasa_degradada = tasa_degradada
+        self.tasa_sesion = tasa_sesion
+        self.tasa_500 = tasa_500
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+
+    def sortear(self) -> Tuple[float, Optional[str]]:
+        """Devuelve (segundos de latencia, fallo a inyectar o None)."""
+        with self._lock:
+            espera = self.latencia(self._rng)
+            tirada = self._rng.random()
+        for fallo, tasa in (
+            ("429", self.tasa_429),
+            ("degradada", self.tasa_degradada),
+            ("sesion", self.tasa_sesion),
+            ("500", self.tasa_500),
+        ):
+            if tirada < tasa:
+                return espera, fallo
+            tirada -= tasa
+        return espera, None
+
+
+# ---------------------------------------------------------------------------
+# Fuentes de datos
+# ---------------------------------------------------------------------------
+
+class FixturesCassette:
+    """Sirve las respuestas de un cassette grabado con `scraper.py --record`."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self._lock = threading.Lock()
+
+    def imagen(self, ruta: str) -> Optional[bytes]:
+        # Los cassettes sólo graban la API.
+        return None
+
+    def responder(self, ruta: str, params: Dict[str, str]) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            entrada = self.cassette.siguiente(clave_peticion(ruta, params))
+        if entrada is None:
+            return None
+        return entrada["status"], entrada["body"]
+
+
+# Categorías reales del club; los equipos sintéticos se reparten entre ellas.
+_CATEGORIAS_SINTETICAS = [
+    ("7927", "Prebenjamín 2º. Año"),
+    ("7928", "Benjamín 2º. Año"),
+    ("7929", "Alevín 2º. Año"),
+    ("7930", "2ª Regional Infantil"),
+    ("7931", "Querubines"),
+]
+_EQUIPOS_POR_GRUPO = 10
+_CLUB_POR_GRUPO = 2
+
+
+class FixturesSinteticos:
+    """
+    Club sintético y determinista de `n_equipos` equipos.
+
+    Cada grupo tiene 10 equipos, 2 de ellos del club, y juega una liga a doble
+    vuelta (18 jornadas, una por semana desde `fecha_inicio`). Las jornadas
+    anteriores a `hoy` tienen resultado. Todo se deriva de `semilla`, así que
+    dos runs contra el mismo stand-in descargan exactamente lo mismo.
+    """
+
+    def __init__(
+        self,
+        n_equipos: int,
+        clave_club: str = "4189",
+        semilla: int = 21,
+        fecha_inicio: Optional[date] = None,
+        hoy: Optional[date] = None,
+    ):
+        self.n_equipos = n_equipos
+        self.clave_club = str(clave_club)
+        self.semilla = semilla
+        self.hoy = hoy or date.today()
+        # Por defecto, temporada a mitad: 9 de 18 jornadas jugadas.
+        self.fecha_inicio = fecha_inicio or (self.hoy - timedelta(weeks=9, days=1))
+
+        self.grupos: Dict[str, Dict] = {}
+        self.equipos_club: List[Dict] = []
+        self._competiciones: Dict[str, Dict] = {}
+        self._nombres: Dict[str, str] = {}
+        self._actas: Dict[str, Tuple[str, int, int]] = {}
+        # (cod_grupo, jornada) → partidos; generarlos también indexa sus actas.
+        self._partidos: Dict[Tuple[str, int], Tuple[Dict, ...]] = {}
+        self._construir()
+
+    # -- construcción -----------------------------------------------------
+
+    def _construir(self) -> None:
+        letras_por_categoria: Dict[str, int] = defaultdict(int)
+        n_grupos = math.ceil(self.n_equipos / _CLUB_POR_GRUPO)
+        siguiente_club = 10_000
+        siguiente_rival = 800_000
+
+        for g in range(n_grupos):
+            cod_cat, nombre_cat = _CATEGORIAS_SINTETICAS[g % len(_CATEGORIAS_SINTETICAS)]
+            cod_comp = f"29{cod_cat}"
+            self._competiciones.setdefault(cod_comp, {
+                "codigo": cod_comp,
+                "nombre": f"Lliga València {nombre_cat}",
+                "CodigoCategoria": cod_cat,
+                "grupos": [],
+            })
+            cod_grupo = str(905_000_000 + g)
+            miembros: List[str] = []
+
+            del_club = min(_CLUB_POR_GRUPO, self.n_equipos - len(self.equipos_club))
+            for _ in range(del_club):
+                idx = letras_por_categoria[cod_cat]
+                letras_por_categoria[cod_cat] += 1
+                sufijo = f" '{chr(65 + idx)}'" if idx < 26 else f" {idx}"
+                codequipo = str(siguiente_club)
+                siguiente_club += 1
+                nombre = f"C.F. Extramurs Valencia{sufijo}"
+                self._nombres[codequipo] = nombre
+                miembros.append(codequipo)
+                self.equipos_club.append({
+                    "codequipo": codequipo,
+                    "nombre_equipo": nombre,
+                    "categoria": nombre_cat,
+                    "codigo_categoria": cod_cat,
+                    "cod_grupo_categoria": "33345",
+                    "nombre_grupo_categoria": "MASCULÍ F8",
+                    "escudo": _ESCUDO_CLUB,
+                    "campo_juego": "Campo Tramo III del Turia F-8",
+                    "codigo_campo": "6300",
+                    "jugar_dia": "6",
+                    "jugar_horario": "10:00",
+                    "total_jugadores": "14",
+                })
+
+            while len(miembros) < _EQUIPOS_POR_GRUPO:
+                codequipo = str(siguiente_rival)
+                siguiente_rival += 1
+                self._nombres[codequipo] = f"C.D. Rival {codequipo} 'A'"
+                miembros.append(codequipo)
+
+            self.grupos[cod_grupo] = {
+                "codigo": cod_grupo,
+                "nombre": f"Lliga Regular Grup {g + 1}",
+                "competicion": cod_comp,
+                "miembros": miembros,
+            }
+            self._competiciones[cod_comp]["grupos"].append(cod_grupo)
+
+    def _emparejamientos(self, cod_grupo: str) -> List[List[Tuple[str, str]]]:
+        """Liga a doble vuelta por el método del círculo."""
+        equipos = list(self.grupos[cod_grupo]["miembros"])
+        n = len(equipos)
+        ida: List[List[Tuple[str, str]]] = []
+        for r in range(n - 1):
+            ronda = []
+            for i in range(n // 2):
+                a, b = equipos[i], equipos[n - 1 - i]
+                ronda.append((a, b) if r % 2 == 0 else (b, a))
+            ida.append(ronda)
+            equipos = [equipos[0]] + [equipos[-1]] + equipos[1:-1]
+        vuelta = [[(b, a) for a, b in ronda] for ronda in ida]
+        return ida + vuelta
+
+    def _fecha_jornada(self, jornada: int) -> date:
+        return self.fecha_inicio + timedelta(weeks=jornada - 1)
+
+    def _partidos_jornada(self, cod_grupo: str, jornada: int) -> Tuple[Dict, ...]:
+        clave = (cod_grupo, jornada)
+        if clave not in self._partidos:
+            self._partidos[clave] = self._generar_jornada(cod_grupo, jornada)
+        return self._partidos[clave]
+
+    def _generar_jornada(self, cod_grupo: str, jornada: int) -> Tuple[Dict, ...]:
+        rondas = self._emparejamientos(cod_grupo)
+        if not 1 <= jornada <= len(rondas):
+            return ()
+        dia = self._fecha_jornada(jornada)
+        jugada = dia < self.hoy
+        partidos = []
+        for idx, (local, visitante) in enumerate(rondas[jornada - 1]):
+            rng = random.Random(f"{self.semilla}:{cod_grupo}:{jornada}:{idx}")
+            codacta = f"{cod_grupo}{jornada:02d}{idx:02d}"
+            self._actas[codacta] = (cod_grupo, jornada, idx)
+            partidos.append({
+                "codacta": codacta,
+                "cod_equipo_local": local,
+                "cod_equipo_visitante": visitante,
+                "local": self._nombres[local],
+                "visitante": self._nombres[visitante],
+                "fecha": dia.strftime("%d-%m-%Y"),
+                "hora": f"{9 + idx}:{rng.choice(['00', '15', '30', '45'])}".zfill(5),
+                "campo": f"Campo Mpal. {local} F-8",
+                "resultado": f"{rng.randint(0, 6)} - {rng.randint(0, 6)}" if jugada else "",
+            })
+        return tuple(partidos)
+
+    def _escudo(self, codequipo: str) -> str:
+        if int(codequipo) < 800_000:
+            return _ESCUDO_CLUB
+        return f"/pnfg/pimg/Clubes/{codequipo}.png"
+
+    def imagen(self, ruta: str) -> Optional[bytes]:
+        """Escudo sintético de `ruta` (`/pnfg/pimg/Clubes/<codequipo>.png`)."""
+        nombre = ruta.rsplit("/", 1)[-1]
+        if ruta == _ESCUDO_CLUB:
+            return _png_liso((255, 255, 255), 200)
+        codequipo = nombre.split(".")[0]
+        if codequipo not in self._nombres:
+            return None
+        return _png_liso(_COLORES_ESCUDO[int(codequipo) % len(_COLORES_ESCUDO)], 200)
+
+    # -- endpoints --------------------------------------------------------
+
+    def responder(self, ruta: str, params: Dict[str, str]) -> Optional[Tuple[int, str]]:
+        endpoint = ruta.rsplit("/", 1)[-1]
+        handler = getattr(self, "_" + endpoint.replace(".php", ""), None)
+        if handler is None:
+            return None
+        data = handler(params)
+        if data is None:
+            return None
+        return 200, json.dumps(data, ensure_ascii=False)
+
+    def _ajax_club_equipos(self, params):
+        if str(params.get("clave")) != self.clave_club:
+            return {"equipos": []}
+        return {"equipos": self.equipos_club}
+
+    def _competiciones_fetch(self, params):
+        return {"competiciones": [
+            {k: v for k, v in c.items() if k != "grupos"}
+            for c in self._competiciones.values()
+        ]}
+
+    def _grupos_fetch(self, params):
+        comp = self._competiciones.get(str(params.get("cod_competicion")))
+        if comp is None:
+            return {"grupos": []}
+        return {"grupos": [
+            {"codigo": g, "nombre": self.grupos[g]["nombre"], "total_jornadas": "18"}
+            for g in comp["grupos"]
+        ]}
+
+    def _jornadas_fetch(self, params):
+        cod_grupo = str(params.get("cod_grupo"))
+        if cod_grupo not in self.grupos:
+            return {"jornadas": []}
+        return {"jornadas": [
+            {"codjornada": str(j), "fecha_jornada": self._fecha_jornada(j).strftime("%d-%m-%Y")}
+            for j in range(1, len(self._emparejamientos(cod_grupo)) + 1)
+        ]}
+
+    def _resultados_por_grupo_jornada_data(self, params):
+        cod_grupo = str(params.get("cod_grupo"))
+        if cod_grupo not in self.grupos:
+            return {"partidos": []}
+        return {"partidos": list(self._partidos_jornada(cod_grupo, int(params.get("cod_jornada") or 0)))}
+
+    def _clasificaciones_ajax(self, params):
+        cod_grupo = str(params.get("cod_grupo"))
+        if cod_grupo not in self.grupos:
+            return {"clasificacion": []}
+        hasta = int(params.get("cod_jornada") or 1)
+        tabla = {
+            c: {"jugados": 0, "ganados": 0, "empatados": 0, "perdidos": 0, "puntos": 0,
+                "gf": 0, "gc": 0, "racha": []}
+            for c in self.grupos[cod_grupo]["miembros"]
+        }
+        for j in range(1, hasta + 1):
+            for p in self._partidos_jornada(cod_grupo, j):
+                if not p["resultado"]:
+                    continue
+                gl, gv = (int(x) for x in p["resultado"].split(" - "))
+                for cod, gf, gc in (
+                    (p["cod_equipo_local"], gl, gv),
+                    (p["cod_equipo_visitante"], gv, gl),
+                ):
+                    fila = tabla[cod]
+                    fila["jugados"] += 1
+                    fila["gf"] += gf
+                    fila["gc"] += gc
+                    if gf > gc:
+                        fila["ganados"] += 1
+                        fila["puntos"] += 3
+                        fila["racha"].append("G")
+                    elif gf == gc:
+                        fila["empatados"] += 1
+                        fila["puntos"] += 1
+                        fila["racha"].append("E")
+                    else:
+                        fila["perdidos"] += 1
+                        fila["racha"].append("P")
+        orden = sorted(tabla.items(), key=lambda kv: (-kv[1]["puntos"], kv[1]["gc"] - kv[1]["gf"], kv[0]))
+        return {"clasificacion": [
+            {
+                "posicion": str(i),
+                "codequipo": cod,
+                "nombre": self._nombres[cod],
+                "puntos": str(f["puntos"]),
+                "jugados": str(f["jugados"]),
+                "ganados": str(f["ganados"]),
+                "empatados": str(f["empatados"]),
+                "perdidos": str(f["perdidos"]),
+                "goles_a_favor": str(f["gf"]),
+                "goles_en_contra": str(f["gc"]),
+                "racha_partidos": [{"tipo": t} for t in f["racha"][-5:]],
+                "escudo": self._escudo(cod),
+            }
+            for i, (cod, f) in enumerate(orden, 1)
+        ]}
+
+    def _ficha_partido_ajax(self, params):
+        codacta = str(params.get("cod_partido"))
+        if codacta not in self._actas:
+            # Las actas se indexan al generar su jornada; forzarla si hace falta.
+            cod_grupo, jornada = codacta[:9], int(codacta[9:11] or 0)
+            if cod_grupo in self.grupos:
+                self._partidos_jornada(cod_grupo, jornada)
+        if codacta not in self._actas:
+            return {"estado": "1", "error": "Partido no encontrado"}
+        cod_grupo, jornada, idx = self._actas[codacta]
+        partido = self._partidos_jornada(cod_grupo, jornada)[idx]
+
+        rng = random.Random(f"{self.semilla}:acta:{codacta}")
+        goles = [int(x) for x in partido["resultado"].split(" - ")] if partido["resultado"] else [0, 0]
+
+        def alineacion(codequipo: str, goles_equipo: int) -> List[Dict]:
+            # F8: 8 titulares y 4 suplentes; goles y alguna amarilla al azar.
+            jugadores = [
+                {
+                    "codjugador": f"{codequipo}{n:02d}",
+                    "nombre_jugador": f"APELLIDO{n} {codequipo}, NOMBRE{n}",
+                    "dorsal": str(n),
+                    "foto": _FOTO_DATA_URI,
+                    "titular": "1" if n <= 8 else "0",
+                    "goles": 0,
+                    "amarillas": 0,
+                }
+                for n in range(1, 13)
+            ]
+            for _ in range(goles_equipo):
+                rng.choice(jugadores)["goles"] += 1
+            if rng.random() < 0.3:
+                rng.choice(jugadores)["amarillas"] = 1
+            return jugadores
+
+        return {
+            "codigo_campo": f"6{partido['cod_equipo_local'][-3:]}",
+            "codigo_equipo_local": partido["cod_equipo_local"],
+            "codigo_equipo_visitante": partido["cod_equipo_visitante"],
+            "jugadores_equipo_local": alineacion(partido["cod_equipo_local"], goles[0]),
+            "jugadores_equipo_visitante": alineacion(partido["cod_equipo_visitante"], goles[1]),
+        }
+
+    def _ver_equipo(self, params):
+        codequipo = str(params.get("codequipo"))
+        if codequipo not in self._nombres:
+            return {"estado": "1", "error": "Equipo no encontrado"}
+        return {"jugadores_equipo": [
+            {"cod_jugador": f"{codequipo}{n:02d}", "nombre": f"NOMBRE{n} APELLIDO{n} {codequipo}"}
+            for n in range(1, 15)
+        ]}
+
+    def _datos_campo(self, params):
+        cod = str(params.get("codcampo") or "0")
+        rng = random.Random(f"campo:{cod}")
+        return {
+            "latitud": f"{39.42 + rng.random() * 0.1:.7f}",
+            "longitud": f"{-0.42 + rng.random() * 0.1:.7f}",
+            "direccion": f"Calle Sintética, {cod}",
+            "localidad": "Valencia",
+        }
+
+
+# ---------------------------------------------------------------------------
+# Servidor
+# ---------------------------------------------------------------------------
+
+class EstadisticasStub:
+    """Contadores por endpoint, consultables en /_stub/estadisticas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.por_endpoint: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def anotar(self, endpoint: str, clave: str, cantidad: int = 1) -> None:
+        with self._lock:
+            self.por_endpoint[endpoint][clave] += cantidad
+
+    def a_json(self) -> Dict:
+        with self._lock:
+            return {ep: dict(c) for ep, c in self.por_endpoint.items()}
+
+
+class StubFFCV(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        direccion,
+        fixtures,
+        fallos: ConfigFallos,
+        validadores: bool = True,
+        compresion: bool = True,
+    ):
+        super().__init__(direccion, _Handler)
+        self.fixtures = fixtures
+        self.fallos = fallos
+        self.validadores = validadores
+        self.compresion = compresion
+        self.estadisticas = EstadisticasStub()
+
+    @property
+    def url_base(self) -> str:
+        return f"{self.url_web}{RUTA_API}"
+
+    @property
+    def url_web(self) -> str:
+        """Raíz del host, para `FFCV_WEB_BASE` (imágenes)."""
+        host, puerto = self.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubFFCV
+    protocol_version = "HTTP/1.1"
+    # Cabeceras y cuerpo van en writes separados: sin TCP_NODELAY, Nagle +
+    # delayed ACK añaden ~40 ms a cada respuesta y falsean las mediciones.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - firma de la stdlib
+        logger.debug("stub: " + format % args)
+
+    def _enviar(self, status: int, cuerpo: str, extra: Optional[Dict[str, str]] = None) -> int:
+        payload = cuerpo.encode("utf-8")
+        extra = dict(extra or {})
+        if (
+            self.server.compresion
+            and len(payload) > 512
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        ):
+            payload = gzip.compress(payload, compresslevel=6)
+            extra["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in extra.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+        return len(payload)
+
+    def _imagen(self, ruta: str) -> None:
+        """Imágenes sin fallos inyectados: el scraper las pide una vez por temporada."""
+        self.server.estadisticas.anotar("imagenes", "peticiones")
+        datos = self.server.fixtures.imagen(ruta)
+        if datos is None:
+            self._enviar(404, json.dumps({"error": "not_found", "path": ruta}))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _no_modificado(self, etag: str) -> None:
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):  # noqa: N802 - nombre impuesto por BaseHTTPRequestHandler
+        partes = urlsplit(self.path)
+        if partes.path == "/_stub/estadisticas":
+            self._enviar(200, json.dumps(self.server.estadisticas.a_json()))
+            return
+        if partes.path == "/_stub/reset":
+            self.server.estadisticas.reset()
+            self._enviar(200, "{}")
+            return
+
+        if partes.path.startswith(RUTA_IMAGENES):
+            self._imagen(partes.path)
+            return
+
+        params = dict(parse_qsl(partes.query))
+        endpoint = partes.path.rsplit("/", 1)[-1]
+        stats = self.server.estadisticas
+        stats.anotar(endpoint, "peticiones")
+
+        espera, fallo = self.server.fallos.sortear()
+        if espera > 0:
+            time.sleep(espera)
+            stats.anotar(endpoint, "latencia_ms", int(espera * 1000))
+
+        if fallo == "429":
+            stats.anotar(endpoint, "fallos_429")
+            self._enviar(429, '{"error":"rate_limited"}', {"Retry-After": "30"})
+            return
+        if fallo == "500":
+            stats.anotar(endpoint, "fallos_500")
+            self._enviar(500, '{"error":"internal"}')
+            return
+        if fallo == "degradada":
+            stats.anotar(endpoint, "degradadas")
+            self._enviar(200, json.dumps({
+                "_source": "degraded_empty",
+                "_upstream": {"code": 503},
+            }))
+            return
+        if fallo == "sesion":
+            stats.anotar(endpoint, "sesion_invalida")
+            self._enviar(200, json.dumps({"estado": "0", "error": "Sesión no válida"}))
+            return
+
+        respuesta = self.server.fixtures.responder(partes.path, params)
+        if respuesta is None:
+            stats.anotar(endpoint, "no_encontradas")
+            self._enviar(404, json.dumps({"error": "not_found", "path": partes.path}))
+            return
+        status, cuerpo = respuesta
+        extra: Dict[str, str] = {}
+        if self.server.validadores and status == 200:
+            etag = '"' + hashlib.sha1(cuerpo.encode("utf-8")).hexdigest()[:20] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                stats.anotar(endpoint, "no_modificadas")
+                self._no_modificado(etag)
+                return
+            extra["ETag"] = etag
+        stats.anotar(endpoint, "bytes", self._enviar(status, cuerpo, extra))
+
+
+def arrancar_en_hilo(
+    fixtures,
+    fallos: Optional[ConfigFallos] = None,
+    host: str = "127.0.0.1",
+    puerto: int = 0,
+    validadores: bool = True,
+    compresion: bool = True,
+) -> StubFFCV:
+    """Arranca el stand-in en un hilo daemon y lo devuelve (`.url_base`, `.shutdown()`)."""
+    servidor = StubFFCV(
+        (host, puerto), fixtures, fallos or ConfigFallos(),
+        validadores=validadores, compresion=compresion,
+    )
+    hilo = threading.Thread(target=servidor.serve_forever, name="ffcv-stub", daemon=True)
+    hilo.start()
+    return servidor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in local de la API FFCV")
+    fuente = parser.add_mutually_exclusive_group(required=True)
+    fuente.add_argument("--cassette", type=Path, help="cassette .json.gz grabado con --record")
+    fuente.add_argument("--sintetico", type=int, metavar="N", help="club sintético de N equipos")
+    parser.add_argument("--clave-club", default="4189")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia", help="fija:S | uniforme:MIN,MAX | lognormal:MEDIANA,SIGMA")
+    parser.add_argument("--tasa-429", type=float, default=0.0)
+    parser.add_argument("--tasa-degradada", type=float, default=0.0)
+    parser.add_argument("--tasa-sesion", type=float, default=0.0)
+    parser.add_argument("--tasa-500", type=float, default=0.0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--sin-validadores", action="store_true", help="sin ETag ni 304")
+    parser.add_argument("--sin-compresion", action="store_true", help="sin gzip")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.cassette:
+        fixtures = FixturesCassette(Cassette.cargar(args.cassette))
+    else:
+        fixtures = FixturesSinteticos(args.sintetico, clave_club=args.clave_club)
+    fallos = ConfigFallos(
+        latencia=args.latencia,
+        tasa_429=args.tasa_429,
+        tasa_degradada=args.tasa_degradada,
+        tasa_sesion=args.tasa_sesion,
+        tasa_500=args.tasa_500,
+        semilla=args.semilla,
+    )
+    servidor = StubFFCV(
+        (args.host, args.puerto), fixtures, fallos,
+        validadores=not args.sin_validadores, compresion=not args.sin_compresion,
+    )
+    logger.info(f"🧪 Stand-in FFCV escuchando en {servidor.url_base}")
+    logger.info(f"   export FFCV_API_BASE={servidor.url_base}")
+    logger.info(f"   export FFCV_WEB_BASE={servidor.url_web}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Salida fragmentada y checkpoints del modo liga (`scraper.py liga`).
+
+El modo liga recorre todos los grupos de una temporada (o de algunas
+competiciones/categorías) con miles de equipos. Nada se acumula en memoria:
+cada grupo descargado se escribe en cuanto llega y se olvida.
+
+- `grupos/<cod_grupo>.json`: partidos y clasificación del grupo.
+- `clubes/<club>.jsonl`: una línea por equipo del club y grupo, añadida al
+  terminar cada grupo. `consolidar` la compacta en `clubes/<club>.json`.
+- `index.json`: grupos y clubes del run, con sus recuentos.
+- `checkpoint.json`: grupos ya escritos. Un run interrumpido retoma desde
+  aquí si se lanza con los mismos filtros; al terminar se borra.
+
+Los fragmentos se escriben a un temporal y se renombran, así que un corte a
+mitad nunca deja un JSON a medias. Un `.jsonl` de club sí puede quedar con
+la última línea a medias: antes de añadir se recorta hasta el último salto
+de línea, para que la línea nueva no se pegue a la cortada. Las líneas de
+club de un grupo que se cortó antes del checkpoint pueden repetirse al
+reanudar: `consolidar` se queda con la última de cada (grupo, equipo).
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+# Sufijo de equipo dentro del club: 'A', "B", 'C' al final del nombre.
+_RE_SUFIJO_EQUIPO = re.compile(r"""\s*['"][A-Z0-9]{1,2}['"]\s*$""")
+
+
+def nombre_club(nombre_equipo: str) -> str:
+    """'C.F. Extramurs Valencia 'A'' → 'C.F. Extramurs Valencia'."""
+    return _RE_SUFIJO_EQUIPO.sub("", nombre_equipo or "").strip()
+
+
+def _escribir_atomico(path: Path, data) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _recortar_linea_cortada(path: Path) -> None:
+    """Quita la última línea de `path` si no termina en salto de línea (corte a mitad)."""
+    if not path.exists():
+        return
+    with open(path, "rb+") as f:
+        tamano = f.seek(0, os.SEEK_END)
+        if tamano == 0:
+            return
+        f.seek(tamano - 1)
+        if f.read(1) == b"\n":
+            return
+        # Se busca el último "\n" hacia atrás, de bloque en bloque.
+        fin = tamano
+        while fin > 0:
+            inicio = max(0, fin - 4096)
+            f.seek(inicio)
+            posicion = f.read(fin - inicio).rfind(b"\n")
+            if posicion >= 0:
+                f.truncate(inicio + posicion + 1)
+                break
+            fin = inicio
+        else:
+            f.truncate(0)
+    logger.warning(f"Línea cortada al final de {path.name} descartada")
+
+
+class Checkpoint:
+    """Grupos ya escritos por un run de liga con unos filtros concretos."""
+
+    def __init__(self, path: Path, filtro: Dict):
+        self.path = path
+        self.filtro = filtro
+        self.completados: Set[str] = set()
+
+    @classmethod
+    def cargar(cls, path: Path, filtro: Dict) -> "Checkpoint":
+        """Checkpoint previo si es de los mismos filtros; si no, uno vacío."""
+        checkpoint = cls(path, filtro)
+        if not path.exists():
+            return checkpoint
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Checkpoint de liga ilegible ({e}); se empieza de cero")
+            return checkpoint
+        if data.get("version") == CHECKPOINT_VERSION and data.get("filtro") == filtro:
+            checkpoint.completados = set(data.get("completados") or [])
+        return checkpoint
+
+    def marcar(self, cod_grupo: str) -> None:
+        self.completados.add(str(cod_grupo))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _escribir_atomico(self.path, {
+            "version": CHECKPOINT_VERSION,
+            "filtro": self.filtro,
+            "completados": sorted(self.completados),
+        })
+
+    def borrar(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class SalidaLiga:
+    """Escritor de los fragmentos por grupo y por club bajo `raiz`."""
+
+    def __init__(self, raiz: Path):
+        self.raiz = raiz
+        self.dir_grupos = raiz / "grupos"
+        self.dir_clubes = raiz / "clubes"
+        self.dir_grupos.mkdir(parents=True, exist_ok=True)
+        self.dir_clubes.mkdir(parents=True, exist_ok=True)
+
+    def limpiar_clubes(self) -> None:
+        """Descarta las líneas de club de un run anterior (arranque desde cero)."""
+        for path in self.dir_clubes.glob("*.jsonl"):
+            path.unlink()
+
+    def escribir_grupo(self, grupo: Dict, slug_club) -> int:
+        """
+        Escribe `grupos/<cod_grupo>.json` y añade cada equipo del grupo a la
+        línea de su club. `slug_club(nombre)` da el nombre de fichero del
+        club. Devuelve cuántos equipos tiene el grupo.
+        """
+        cod_grupo = str(grupo["cod_grupo"])
+        _escribir_atomico(self.dir_grupos / f"{cod_grupo}.json", grupo)
+
+        equipos: Dict[str, Dict] = {}
+        for fila in grupo.get("clasificacion") or []:
+            if fila.get("codequipo"):
+                equipos[str(fila["codequipo"])] = {"nombre": fila.get("equipo"), "clasificacion": fila}
+        for p in grupo.get("partidos") or []:
+            for lado in ("local", "visitante"):
+                cod = p.get(f"cod_{lado}")
+                if cod:
+                    equipos.setdefault(str(cod), {"nombre": p.get(lado), "clasificacion": None})
+
+        por_club: Dict[str, List[Dict]] = {}
+        for codequipo, info in equipos.items():
+            club = nombre_club(info["nombre"] or "")
+            por_club.setdefault(slug_club(club) or "sin-club", []).append({
+                "club": club,
+                "codequipo": codequipo,
+                "nombre": info["nombre"],
+                "cod_grupo": cod_grupo,
+                "grupo": grupo.get("nombre"),
+                "competicion": grupo.get("competicion"),
+                "clasificacion": info["clasificacion"],
+                "partidos": [
+                    p for p in grupo.get("partidos") or []
+                    if codequipo in (p.get("cod_local"), p.get("cod_visitante"))
+                ],
+            })
+        for slug, lineas in por_club.items():
+            path = self.dir_clubes / f"{slug}.jsonl"
+            _recortar_linea_cortada(path)
+            with open(path, "a", encoding="utf-8") as f:
+                for linea in lineas:
+                    f.write(json.dumps(linea, ensure_ascii=False, separators=(",", ":")) + "\n")
+        return len(equipos)
+
+    def consolidar(self, cod_temporada: str, cod_grupos: Iterable[str]) -> Dict:
+        """
+        Compacta cada `clubes/<club>.jsonl` en `clubes/<club>.json` (un club
+        en memoria a la vez) y escribe `index.json` con los grupos del run
+        (`cod_grupos`), leyendo sus fragmentos de uno en uno.
+        """
+        clubes = []
+        for path in sorted(self.dir_clubes.glob("*.jsonl")):
+            equipos: Dict[tuple, Dict] = {}
+            with open(path, "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        e = json.loads(linea)
+                    except json.JSONDecodeError:
+                        continue  # línea cortada por una interrupción
+                    equipos[(e["cod_grupo"], e["codequipo"])] = e
+            lista = sorted(equipos.values(), key=lambda e: (e["cod_grupo"], e["nombre"] or ""))
+            nombre = lista[0]["club"] if lista else path.stem
+            _escribir_atomico(path.with_suffix(".json"), {
+                "club": nombre,
+                "cod_temporada": cod_temporada,
+                "equipos": lista,
+            })
+            clubes.append({"slug": path.stem, "club": nombre, "equipos": len(lista)})
+
+        grupos = []
+        for cod_grupo in sorted(cod_grupos):
+            path = self.dir_grupos / f"{cod_grupo}.json"
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                g = json.load(f)
+            grupos.append({
+                "cod_grupo": g["cod_grupo"],
+                "nombre": g.get("nombre"),
+                "competicion": g.get("competicion"),
+                "partidos": len(g.get("partidos") or []),
+                "jugados": sum(1 for p in g.get("partidos") or [] if p.get("resultado")),
+            })
+
+        indice = {
+            "cod_temporada": cod_temporada,
+            "generado": datetime.now().isoformat(timespec="seconds"),
+            "grupos": grupos,
+            "clubes": clubes,
+        }
+        _escribir_atomico(self.raiz / "index.json", indice)
+        return indice
+
+
+def pendientes(grupos: Iterable[Dict], checkpoint: Optional[Checkpoint]) -> Iterable[Dict]:
+    """Los grupos que el checkpoint no da por escritos, en el mismo orden."""
+    for grupo in grupos:
+        if checkpoint is None or str(grupo["cod_grupo"]) not in checkpoint.completados:
+            yield grupo
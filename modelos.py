@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Modelos compactos del pipeline: partido, fila de clasificación y jugador.
+
+Son dataclasses con `__slots__` que parsean fecha/hora y marcador UNA sola vez
+al construirse y guardan los derivados (inicio, goles, desenlace) en slots
+propios. `Partido` es inmutable para que esos derivados no se queden
+desfasados. El resto del scraper trabaja con estos objetos y sólo los convierte a
+dict en la frontera (JSON en disco y contexto de los templates) mediante
+`a_json()` / `desde_json()`, que mantienen el shape histórico.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def _parse_inicio(fecha: Optional[str], hora: Optional[str]) -> Tuple[Optional[datetime], bool]:
+    """
+    `YYYY-MM-DD` + `HH:MM` → (datetime, hora_valida). Sin hora válida
+    ("a confirmar", vacía...), medianoche del día y `hora_valida=False`.
+    """
+    if not fecha:
+        return None, False
+    if hora:
+        try:
+            return datetime.fromisoformat(f"{fecha}T{hora}"), True
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(fecha), False
+    except ValueError:
+        return None, False
+
+
+def _parse_marcador(resultado: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """'3-1' → (3, 1). Cualquier otra cosa → (None, None)."""
+    if not resultado:
+        return None, None
+    local, _, visitante = resultado.partition("-")
+    try:
+        return int(local), int(visitante)
+    except ValueError:
+        return None, None
+
+
+@dataclass(slots=True, frozen=True)
+class Partido:
+    """
+    Partido de un equipo del club. Los campos públicos son los del JSON
+    histórico; `inicio`, `hora_valida`, `goles_local`, `goles_visitante` y
+    `victoria` se derivan en `__post_init__` y no se pasan al constructor.
+    Es inmutable: para cambiar un campo, `dataclasses.replace`.
+    """
+
+    jornada: Optional[int]
+    id_partido: Optional[str]
+    fecha: Optional[str]
+    hora: Optional[str]
+    local: Optional[str]
+    visitante: Optional[str]
+    campo: str = ""
+    resultado: Optional[str] = None
+    es_local: bool = False
+    maps_url: Optional[str] = None
+
+    inicio: Optional[datetime] = field(init=False, default=None, repr=False, compare=False)
+    hora_valida: bool = field(init=False, default=False, repr=False, compare=False)
+    goles_local: Optional[int] = field(init=False, default=None, repr=False, compare=False)
+    goles_visitante: Optional[int] = field(init=False, default=None, repr=False, compare=False)
+    victoria: Optional[bool] = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Congelada: los derivados se fijan con object.__setattr__.
+        inicio, hora_valida = _parse_inicio(self.fecha, self.hora)
+        goles_local, goles_visitante = _parse_marcador(self.resultado)
+        object.__setattr__(self, "inicio", inicio)
+        object.__setattr__(self, "hora_valida", hora_valida)
+        object.__setattr__(self, "goles_local", goles_local)
+        object.__setattr__(self, "goles_visitante", goles_visitante)
+        if goles_local is None:
+            return
+        # empate → victoria = None
+        if self.goles_favor > self.goles_contra:
+            object.__setattr__(self, "victoria", True)
+        elif self.goles_favor < self.goles_contra:
+            object.__setattr__(self, "victoria", False)
+
+    @property
+    def dia(self) -> Optional[date]:
+        return self.inicio.date() if self.inicio else None
+
+    @property
+    def tiene_hora(self) -> bool:
+        """True si `inicio` incluye la hora real del partido (no medianoche por defecto)."""
+        return self.inicio is not None and self.hora_valida
+
+    @property
+    def goles_favor(self) -> Optional[int]:
+        return self.goles_local if self.es_local else self.goles_visitante
+
+    @property
+    def goles_contra(self) -> Optional[int]:
+        return self.goles_visitante if self.es_local else self.goles_local
+
+    @property
+    def desenlace(self) -> Optional[str]:
+        """'W' / 'L' / 'D' desde el punto de vista del equipo; None si no se ha jugado."""
+        if self.goles_local is None:
+            return None
+        if self.victoria is True:
+            return "W"
+        if self.victoria is False:
+            return "L"
+        return "D"
+
+    @property
+    def clave_orden(self) -> Tuple[str, str]:
+        """(fecha, hora) como strings, para ordenar igual que el código histórico."""
+        return (self.fecha or "", self.hora or "")
+
+    def a_json(self) -> Dict:
+        return {
+            "jornada": self.jornada,
+            "id_partido": self.id_partido,
+            "fecha": self.fecha,
+            "hora": self.hora,
+            "local": self.local,
+            "visitante": self.visitante,
+            "campo": self.campo,
+            "resultado": self.resultado,
+            "es_local": self.es_local,
+            "victoria": self.victoria,
+            "maps_url": self.maps_url,
+        }
+
+    @classmethod
+    def desde_json(cls, data: Dict) -> "Partido":
+        """Inverso de `a_json`. `victoria` se recalcula, no se lee."""
+        return cls(
+            jornada=data.get("jornada"),
+            id_partido=data.get("id_partido"),
+            fecha=data.get("fecha"),
+            hora=data.get("hora"),
+            local=data.get("local"),
+            visitante=data.get("visitante"),
+            campo=data.get("campo") or "",
+            resultado=data.get("resultado"),
+            es_local=bool(data.get("es_local")),
+            maps_url=data.get("maps_url"),
+        )
+
+
+@dataclass(slots=True)
+class FilaClasificacion:
+    """Fila de la tabla de clasificación de un grupo."""
+
+    posicion: int
+    equipo: str
+    puntos: int
+    pj: int
+    pg: int
+    pe: int
+    pp: int
+    codequipo: Optional[str] = None
+    gf: Optional[int] = None
+    gc: Optional[int] = None
+    racha: List[str] = field(default_factory=list)
+    # Ruta del escudo en ffcv.es, si la API la da (ver escudos.py).
+    escudo: Optional[str] = None
+
+    @property
+    def diferencia_goles(self) -> Optional[int]:
+        if self.gf is None or self.gc is None:
+            return None
+        return self.gf - self.gc
+
+    def a_json(self) -> Dict:
+        data = {
+            "posicion": self.posicion,
+            "equipo": self.equipo,
+            "puntos": self.puntos,
+            "pj": self.pj,
+            "pg": self.pg,
+            "pe": self.pe,
+            "pp": self.pp,
+            "codequipo": self.codequipo,
+            "gf": self.gf,
+            "gc": self.gc,
+            "racha": list(self.racha),
+        }
+        if self.escudo:
+            data["escudo"] = self.escudo
+        return data
+
+    @classmethod
+    def desde_json(cls, data: Dict) -> "FilaClasificacion":
+        return cls(
+            posicion=int(data.get("posicion") or 0),
+            equipo=data.get("equipo") or "",
+            puntos=int(data.get("puntos") or 0),
+            pj=int(data.get("pj") or 0),
+            pg=int(data.get("pg") or 0),
+            pe=int(data.get("pe") or 0),
+            pp=int(data.get("pp") or 0),
+            codequipo=data.get("codequipo"),
+            gf=data.get("gf"),
+            gc=data.get("gc"),
+            racha=list(data.get("racha") or []),
+            escudo=data.get("escudo"),
+        )
+
+
+@dataclass(slots=True)
+class Jugador:
+    """
+    Jugador de la plantilla. `dorsal` se rellena al cruzar con las actas y
+    `estadisticas` con los totales de la temporada del almacén.
+    """
+
+    id: str
+    nombre: str
+    foto: Optional[str] = None
+    dorsal: Optional[str] = None
+    estadisticas: Optional[Dict] = None
+
+    nombre_mayus: str = field(init=False, default="", repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.nombre_mayus = self.nombre.upper()
+
+    def a_json(self) -> Dict:
+        data = {"id": self.id, "nombre": self.nombre, "foto": self.foto}
+        # Shape histórico: la clave sólo existe si se encontró dorsal.
+        if self.dorsal:
+            data["dorsal"] = self.dorsal
+        if self.estadisticas:
+            data["estadisticas"] = dict(self.estadisticas)
+        return data
+
+    @classmethod
+    def desde_json(cls, data: Dict) -> "Jugador":
+        return cls(
+            id=str(data.get("id") or ""),
+            nombre=data.get("nombre") or "",
+            foto=data.get("foto"),
+            dorsal=data.get("dorsal"),
+            estadisticas=data.get("estadisticas"),
+        )
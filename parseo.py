@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Parseo de fechas y marcadores tal como los entrega la API FFCV.
+
+Los patrones se compilan una vez al importar el módulo y los resultados se
+memorizan: en un run del club se parsean miles de veces las mismas ~20
+fechas de jornada. El formato canónico de la API (`dd-mm-yyyy`) tiene un
+camino rápido sin regex.
+
+Los formatos sin año ("Sábado, 09 De Noviembre", "09/11") se resuelven con la
+temporada configurada: de agosto a diciembre es el primer año de
+"2025-2026" y de enero a julio el segundo.
+"""
+
+import logging
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_RE_FECHA_GUION = re.compile(r"(\d{1,2})-(\d{1,2})-(\d{2,4})")
+_RE_FECHA_LARGA = re.compile(r"(\d{1,2})\s+de\s+(\w+)", re.IGNORECASE)
+_RE_FECHA_CORTA = re.compile(r"(\d{1,2})/(\d{1,2})(?:/(\d{4}))?")
+_RE_TEMPORADA = re.compile(r"(\d{4})\s*[-/]\s*(\d{2,4})")
+_RE_RESULTADO = re.compile(r"^\s*(\d+)\s*-\s*(\d+)\s*$")
+
+_MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11,
+    "diciembre": 12,
+}
+
+# Primer mes (inclusive) que pertenece al primer año de la temporada.
+_MES_INICIO_TEMPORADA = 8
+
+# Año natural en que empieza la temporada ("2025-2026" → 2025). None hasta
+# que se llame a configurar_temporada(); entonces se deduce de la fecha actual.
+_ANYO_INICIO: Optional[int] = None
+
+
+def configurar_temporada(nombre: Optional[str]) -> None:
+    """
+    Fija la temporada usada para inferir el año en fechas sin año.
+    Acepta el `temporada.nombre` del YAML ("2025-2026" o "2025/26").
+    """
+    global _ANYO_INICIO
+    match = _RE_TEMPORADA.search(nombre or "")
+    _ANYO_INICIO = int(match.group(1)) if match else None
+
+
+def _anyo_inicio_temporada() -> int:
+    if _ANYO_INICIO is not None:
+        return _ANYO_INICIO
+    hoy = date.today()
+    return hoy.year if hoy.month >= _MES_INICIO_TEMPORADA else hoy.year - 1
+
+
+def anyo_para_mes(mes: int, anyo_inicio: Optional[int] = None) -> int:
+    """Año natural de un mes dentro de la temporada."""
+    inicio = anyo_inicio if anyo_inicio is not None else _anyo_inicio_temporada()
+    return inicio if mes >= _MES_INICIO_TEMPORADA else inicio + 1
+
+
+def parse_fecha(texto: Optional[str]) -> Optional[datetime]:
+    """
+    Parsea fechas en formato español a datetime.
+    Ejemplos: "14-11-2025", "09/11/2025", "09/11", "Sábado, 09 De Noviembre".
+    """
+    if not texto:
+        return None
+    return _parse_fecha(texto.strip(), _anyo_inicio_temporada())
+
+
+@lru_cache(maxsize=4096)
+def _parse_fecha(texto: str, anyo_inicio: int) -> Optional[datetime]:
+    # Camino rápido: formato canónico de la API "dd-mm-yyyy".
+    if len(texto) == 10 and texto[2] == "-" and texto[5] == "-":
+        try:
+            return datetime(int(texto[6:]), int(texto[3:5]), int(texto[:2]))
+        except ValueError:
+            pass
+
+    try:
+        match = _RE_FECHA_GUION.search(texto)
+        if match:
+            dia, mes, anyo = match.groups()
+            # Si el año es de 2 dígitos, añadir "20"
+            if len(anyo) == 2:
+                anyo = "20" + anyo
+            return datetime(int(anyo), int(mes), int(dia))
+
+        match = _RE_FECHA_LARGA.search(texto)
+        if match:
+            mes = _MESES.get(match.group(2).lower())
+            if mes:
+                return datetime(anyo_para_mes(mes, anyo_inicio), mes, int(match.group(1)))
+
+        match = _RE_FECHA_CORTA.search(texto)
+        if match:
+            dia, mes, anyo = match.groups()
+            mes_num = int(mes)
+            anyo_num = int(anyo) if anyo else anyo_para_mes(mes_num, anyo_inicio)
+            return datetime(anyo_num, mes_num, int(dia))
+
+    except ValueError as e:
+        logger.error(f"Error parseando fecha '{texto}': {e}")
+        return None
+
+    logger.warning(f"No se pudo parsear la fecha: {texto}")
+    return None
+
+
+@lru_cache(maxsize=1024)
+def normalizar_resultado(resultado_raw: Optional[str]) -> Optional[str]:
+    """Normaliza '1 - 3' o '1-3' a '1-3'. Devuelve None si no hay marcador."""
+    if not resultado_raw:
+        return None
+    match = _RE_RESULTADO.match(resultado_raw)
+    if not match:
+        return None
+    return f"{match.group(1)}-{match.group(2)}"
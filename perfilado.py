@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Perfilado por fases del run (`scraper.py --profile`).
+
+`Perfilador` se engancha a las fases que ya cronometra la telemetría
+(`TELEMETRIA.fase(...)`): al entrar en cada fase arranca un `cProfile`
+propio y, con `--profile-mem`, mide el pico de memoria con `tracemalloc`.
+Al terminar el run escribe en el directorio de salida:
+
+- `<slug>.pstats`: perfil de cada equipo (todas sus fases), legible con
+  `python -m pstats` o snakeviz.
+- `_club.pstats`: fases fuera de los equipos (descubrimiento, home).
+- `todo.pstats`: la suma de todos los anteriores.
+- `todo.collapsed`: pilas colapsadas (`fase;f1;f2 microsegundos`) para
+  flamegraph.pl / speedscope, con la fase como marco raíz.
+- `perfil.json`: segundos (y pico de KB) por equipo y fase.
+
+cProfile sólo guarda aristas llamador→llamado, no pilas completas: para el
+formato colapsado cada función se cuelga de su llamador dominante (el de
+mayor tiempo acumulado). Es una aproximación, suficiente para ver si el
+tiempo se va en red, JSON, ICS o Jinja.
+"""
+
+import cProfile
+import json
+import logging
+import pstats
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Clave de las fases que ocurren fuera de un equipo.
+CLAVE_CLUB = "_club"
+
+# Profundidad máxima de las pilas reconstruidas (corta ciclos raros).
+_MAX_PROFUNDIDAD = 64
+
+_Funcion = Tuple[str, int, str]
+
+
+def _etiqueta(func: _Funcion) -> str:
+    archivo, linea, nombre = func
+    if archivo == "~":
+        return nombre
+    return f"{nombre} ({Path(archivo).name}:{linea})"
+
+
+def pilas_colapsadas(stats: Dict, raiz: str) -> Dict[str, int]:
+    """
+    Convierte `pstats.Stats.stats` en pilas colapsadas `raiz;...;func` →
+    microsegundos de tiempo propio, siguiendo el llamador dominante.
+    """
+    dominante: Dict[_Funcion, Optional[_Funcion]] = {}
+    for func, (_cc, _nc, _tt, _ct, llamadores) in stats.items():
+        dominante[func] = (
+            max(llamadores.items(), key=lambda kv: kv[1][3])[0] if llamadores else None
+        )
+
+    pilas: Dict[str, int] = defaultdict(int)
+    for func, (_cc, _nc, tt, _ct, _llamadores) in stats.items():
+        micros = int(tt * 1_000_000)
+        if micros <= 0:
+            continue
+        cadena: List[str] = []
+        vistos = set()
+        actual: Optional[_Funcion] = func
+        while actual is not None and actual not in vistos and len(cadena) < _MAX_PROFUNDIDAD:
+            vistos.add(actual)
+            cadena.append(_etiqueta(actual))
+            actual = dominante.get(actual)
+        cadena.append(raiz)
+        pilas[";".join(reversed(cadena))] += micros
+    return pilas
+
+
+class Perfilador:
+    """Gancho de telemetría que perfila cada fase con cProfile (y tracemalloc)."""
+
+    def __init__(self, directorio: Path, memoria: bool = False):
+        self.directorio = Path(directorio)
+        self.memoria = memoria
+        self._equipo = CLAVE_CLUB
+        self._perfil: Optional[cProfile.Profile] = None
+        self._fase_activa: Optional[str] = None
+        # equipo → fase → lista de perfiles (una fase puede repetirse).
+        self._perfiles: Dict[str, Dict[str, List[cProfile.Profile]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._tiempos: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+        # Acumulados de los equipos ya volcados a disco.
+        self._total: Optional[pstats.Stats] = None
+        self._colapsadas: Dict[str, int] = defaultdict(int)
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # -- ganchos de Telemetria -------------------------------------------
+
+    def inicio_equipo(self, slug: str) -> None:
+        self._equipo = slug
+
+    def fin_equipo(self, slug: str) -> None:
+        # Volcar ya: con miles de equipos no conviene retener los perfiles.
+        self._volcar_equipo(slug)
+        self._equipo = CLAVE_CLUB
+
+    def inicio_fase(self, nombre: str) -> None:
+        if self._perfil is not None:
+            # Fase anidada: la cubre el perfil de la fase exterior.
+            return
+        self._fase_activa = nombre
+        if self.memoria:
+            tracemalloc.reset_peak()
+        self._perfil = cProfile.Profile()
+        self._perfil.enable()
+
+    def fin_fase(self, nombre: str, segundos: float) -> None:
+        if self._perfil is None or nombre != self._fase_activa:
+            return
+        self._perfil.disable()
+        self._perfiles[self._equipo][nombre].append(self._perfil)
+        self._perfil = None
+        self._fase_activa = None
+
+        registro = self._tiempos[self._equipo].setdefault(nombre, {"segundos": 0.0})
+        registro["segundos"] = round(registro["segundos"] + segundos, 4)
+        if self.memoria:
+            pico_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            registro["pico_kb"] = max(registro.get("pico_kb", 0.0), pico_kb)
+
+    # -- salida -----------------------------------------------------------
+
+    @staticmethod
+    def _stats(perfiles: List[cProfile.Profile]) -> Optional[pstats.Stats]:
+        stats: Optional[pstats.Stats] = None
+        for perfil in perfiles:
+            perfil.create_stats()
+            if not perfil.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(perfil)
+            else:
+                stats.add(perfil)
+        return stats
+
+    def _volcar_equipo(self, equipo: str) -> None:
+        """Escribe `<equipo>.pstats` y acumula sus pilas; libera sus perfiles."""
+        fases = self._perfiles.pop(equipo, None) or {}
+        stats_equipo: Optional[pstats.Stats] = None
+        for fase, perfiles in fases.items():
+            stats_fase = self._stats(perfiles)
+            if stats_fase is None:
+                continue
+            for pila, micros in pilas_colapsadas(stats_fase.stats, fase).items():
+                self._colapsadas[pila] += micros
+            if stats_equipo is None:
+                stats_equipo = stats_fase
+            else:
+                stats_equipo.add(stats_fase)
+        if stats_equipo is None:
+            return
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        stats_equipo.dump_stats(str(self.directorio / f"{equipo}.pstats"))
+        if self._total is None:
+            self._total = stats_equipo
+        else:
+            self._total.add(stats_equipo)
+
+    def escribir(self) -> Path:
+        """Vuelca pstats, pilas colapsadas y perfil.json. Devuelve el directorio."""
+        if self._perfil is not None:
+            self._perfil.disable()
+            self._perfil = None
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        for equipo in list(self._perfiles):
+            self._volcar_equipo(equipo)
+
+        if self._total is not None:
+            self._total.dump_stats(str(self.directorio / "todo.pstats"))
+        with open(self.directorio / "todo.collapsed", "w", encoding="utf-8") as f:
+            for pila, micros in sorted(self._colapsadas.items()):
+                f.write(f"{pila} {micros}\n")
+
+        resumen: Dict = {"equipos": self._tiempos}
+        if self.memoria:
+            snapshot = tracemalloc.take_snapshot()
+            resumen["top_asignaciones"] = [
+                {"linea": str(st.traceback), "kb": round(st.size / 1024, 1), "bloques": st.count}
+                for st in snapshot.statistics("lineno")[:15]
+            ]
+        with open(self.directorio / "perfil.json", "w", encoding="utf-8") as f:
+            json.dump(resumen, f, ensure_ascii=False, indent=2)
+
+        logger.info(
+            f"🔬 Perfil escrito en {self.directorio} "
+            f"({len(self._tiempos)} perfiles, {len(self._colapsadas)} pilas colapsadas)"
+        )
+        return self.directorio
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Planificador de refrescos a partir del calendario ya conocido.
+
+Con los `todos_partidos` de cada `data/<slug>.json` decide qué equipos
+merece la pena refrescar ahora (`scraper.py --due`) y cuándo tocará el
+siguiente refresco de cada uno (`data/schedule.json`). Un equipo está
+pendiente si:
+
+- no tiene datos todavía;
+- tiene un partido terminado sin resultado (hasta `VENTANA_RESULTADO`
+  después del inicio: lo que tarde la federación en publicarlo);
+- tiene un partido en las próximas `ANTELACION` horas y no se ha refrescado
+  desde que entró en esa ventana (cambios de hora o de campo);
+- lleva más de `REFRESCO_MAXIMO` sin refrescarse.
+
+En modo `scraper.py watch` también decide qué partidos están en juego (ya
+empezados, sin resultado, dentro de `VENTANA_SONDEO`) y cada cuánto
+sondearlos: cada `SONDEO_MIN` tras el pitido final, alargando el intervalo
+mientras el resultado no aparezca, hasta `SONDEO_MAX`.
+
+Las fechas y horas de los partidos son hora de Madrid; se comparan con la
+hora de Madrid aunque el proceso corra en UTC (GitHub Actions).
+`ultima_actualizacion` la escribe el propio scraper con `datetime.now()`,
+así que se compara con el reloj del sistema.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from modelos import Partido
+
+ZONA_FFCV = ZoneInfo("Europe/Madrid")
+
+# Duración hasta el pitido final (incluye descanso; F8 dura menos, F11 algo más).
+DURACION_PARTIDO = timedelta(minutes=100)
+# Margen previo al partido en que se comprueba si cambió la hora o el campo.
+ANTELACION = timedelta(hours=3)
+# Tiempo tras el inicio durante el que se sigue esperando el resultado.
+VENTANA_RESULTADO = timedelta(hours=48)
+# Refresco de fondo aunque el calendario no lo pida (clasificación, aplazados...).
+REFRESCO_MAXIMO = timedelta(days=7)
+
+# Modo watch: un partido sin resultado se sondea hasta este tiempo tras su
+# inicio; después lo recoge el refresco normal (`--due`).
+VENTANA_SONDEO = timedelta(hours=4)
+SONDEO_MIN = timedelta(minutes=2)
+SONDEO_MAX = timedelta(minutes=15)
+# Factor por sondeo sin cambios: 2, 3, 4.5, 6.75... minutos.
+SONDEO_FACTOR = 1.5
+
+# Partidos sin hora: se asume este horario para el día del partido.
+_HORA_POR_DEFECTO = (9, 0)
+
+
+@dataclass(slots=True)
+class EstadoRefresco:
+    """Si un equipo está pendiente ahora y, si no, cuándo lo estará (hora de Madrid)."""
+
+    slug: str
+    pendiente: bool
+    motivo: Optional[str]
+    proximo: Optional[datetime]
+
+    def a_json(self) -> Dict:
+        return {
+            "pendiente": self.pendiente,
+            "motivo": self.motivo,
+            "proximo": self.proximo.isoformat(timespec="minutes") if self.proximo else None,
+        }
+
+
+def ahora_local() -> datetime:
+    """Hora actual de Madrid, naive (como las fechas del calendario)."""
+    return datetime.now(ZONA_FFCV).replace(tzinfo=None)
+
+
+def _inicio(partido: Dict) -> Optional[datetime]:
+    p = Partido.desde_json(partido)
+    if p.inicio is None:
+        return None
+    if not p.tiene_hora:
+        return p.inicio.replace(hour=_HORA_POR_DEFECTO[0], minute=_HORA_POR_DEFECTO[1])
+    return p.inicio
+
+
+def _parse_iso(texto: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(texto) if texto else None
+    except ValueError:
+        return None
+
+
+def evaluar_equipo(
+    slug: str,
+    data: Optional[Dict],
+    ahora: Optional[datetime] = None,
+    ahora_sistema: Optional[datetime] = None,
+) -> EstadoRefresco:
+    """Decide si `slug` está pendiente y cuándo vuelve a estarlo."""
+    ahora = ahora or ahora_local()
+    ahora_sistema = ahora_sistema or datetime.now()
+    if not data:
+        return EstadoRefresco(slug, True, "sin_datos", None)
+
+    ultima = _parse_iso(data.get("ultima_actualizacion"))
+    # Edad del último refresco, en el reloj del sistema.
+    edad = ahora_sistema - ultima if ultima else None
+    ultima_local = ahora - edad if edad is not None else None
+
+    motivos: List[str] = []
+    candidatos: List[datetime] = []
+    for partido in data.get("todos_partidos") or []:
+        inicio = _inicio(partido)
+        if inicio is None:
+            continue
+        fin = inicio + DURACION_PARTIDO
+        sin_resultado = not partido.get("resultado")
+
+        if sin_resultado and fin <= ahora < inicio + VENTANA_RESULTADO:
+            motivos.append("resultado_pendiente")
+        elif sin_resultado and ahora < fin:
+            candidatos.append(fin)
+
+        previa = inicio - ANTELACION
+        if previa <= ahora < inicio:
+            if ultima_local is None or ultima_local < previa:
+                motivos.append("inminente")
+        elif ahora < previa:
+            candidatos.append(previa)
+
+    if edad is None or edad >= REFRESCO_MAXIMO:
+        motivos.append("caducado")
+    else:
+        candidatos.append(ahora + (REFRESCO_MAXIMO - edad))
+
+    if motivos:
+        # El motivo más urgente primero; el resto no añade información.
+        orden = ("resultado_pendiente", "inminente", "caducado")
+        motivo = min(motivos, key=orden.index)
+        return EstadoRefresco(slug, True, motivo, None)
+    return EstadoRefresco(slug, False, None, min(candidatos) if candidatos else None)
+
+
+def planificar(
+    slugs: Iterable[str],
+    cargar: Callable[[str], Optional[Dict]],
+    ahora: Optional[datetime] = None,
+) -> Dict[str, EstadoRefresco]:
+    """Evalúa todos los equipos; `cargar(slug)` devuelve su JSON o None."""
+    ahora = ahora or ahora_local()
+    ahora_sistema = datetime.now()
+    return {slug: evaluar_equipo(slug, cargar(slug), ahora, ahora_sistema) for slug in slugs}
+
+
+def proximo_refresco(estados: Dict[str, EstadoRefresco]) -> Tuple[Optional[datetime], List[str]]:
+    """Primer instante en que algún equipo estará pendiente, y qué equipos."""
+    proximos = [e.proximo for e in estados.values() if e.proximo]
+    if not proximos:
+        return None, []
+    cuando = min(proximos)
+    return cuando, sorted(s for s, e in estados.items() if e.proximo == cuando)
+
+
+def escribir_agenda(path: Path, estados: Dict[str, EstadoRefresco]) -> Dict:
+    """
+    Escribe `schedule.json`. Sin marca de "generado": el fichero sólo cambia
+    cuando cambia la agenda, y así no provoca commits en cada run.
+    """
+    cuando, equipos = proximo_refresco(estados)
+    agenda = {
+        "zona_horaria": str(ZONA_FFCV),
+        "pendientes": sorted(s for s, e in estados.items() if e.pendiente),
+        "proximo_refresco": cuando.isoformat(timespec="minutes") if cuando else None,
+        "equipos_proximo_refresco": equipos,
+        "equipos": {s: e.a_json() for s, e in sorted(estados.items())},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(agenda, f, ensure_ascii=False, indent=2)
+    return agenda
+
+
+def partidos_en_juego(data: Optional[Dict], ahora: Optional[datetime] = None) -> List[Dict]:
+    """Partidos empezados hace menos de `VENTANA_SONDEO` y aún sin resultado."""
+    ahora = ahora or ahora_local()
+    en_juego = []
+    for partido in (data or {}).get("todos_partidos") or []:
+        inicio = _inicio(partido)
+        if inicio and not partido.get("resultado") and inicio <= ahora < inicio + VENTANA_SONDEO:
+            en_juego.append(partido)
+    return en_juego
+
+
+def intervalo_sondeo(en_juego: List[Dict], ahora: Optional[datetime] = None, sin_cambios: int = 0) -> timedelta:
+    """
+    Espera hasta el siguiente sondeo de los partidos en juego: hasta el
+    pitido final si ninguno ha terminado y, después, `SONDEO_MIN` alargado
+    por cada sondeo consecutivo sin cambios.
+    """
+    ahora = ahora or ahora_local()
+    finales = [_inicio(p) + DURACION_PARTIDO for p in en_juego]
+    if not finales or any(fin <= ahora for fin in finales):
+        base = SONDEO_MIN
+    else:
+        base = max(min(finales) - ahora, SONDEO_MIN)
+    return min(base * (SONDEO_FACTOR ** sin_cambios), max(base, SONDEO_MAX))
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Postproceso de la salida: HTML minificado, JSON compacto e informe de tamaños.
+
+- `minificar_html`: minificador conservador. Fuera de `<pre>`, `<textarea>`,
+  `<script>` y `<style>` quita los comentarios HTML (salvo los condicionales)
+  y reduce cada tramo de espacios entre etiquetas a uno solo (un salto de
+  línea si lo había), que es lo que el navegador pinta de todos modos. El
+  interior de las etiquetas (atributos) no se toca. En `<style>` quita
+  comentarios e indentación fuera de las cadenas; en `<script>` sólo la
+  indentación y las líneas en blanco, y nada si hay plantillas de texto
+  (backticks), cuyo contenido es literal.
+- `escribir_compactos`: copia sin espacios de cada `data/*.json` en
+  `data/min/`. Los `data/*.json` con `indent=2` siguen siendo los que se
+  versionan (diffs legibles); los compactos son los que pide el navegador y
+  se regeneran en cada run.
+- `InformeTamanos`: bytes de cada artefacto antes y después, y comprimido
+  con gzip (lo que de verdad viaja por la red), para `run_report.json`.
+"""
+
+import gzip
+import json
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+# Bloques cuyo contenido no es texto HTML normal.
+_RE_BLOQUE = re.compile(
+    r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL
+)
+_RE_COMENTARIO = re.compile(r"<!--(?!\[if|<!|>).*?-->", re.DOTALL)
+_RE_ETIQUETA = re.compile(r"(<[^>]*>)")
+_RE_ESPACIOS = re.compile(r"\s+")
+_RE_CADENA = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_RE_COMENTARIO_CSS = re.compile(r"/\*.*?\*/", re.DOTALL)
+_RE_PUNTUACION_CSS = re.compile(r"\s*([{};])\s*")
+
+NIVEL_GZIP = 6
+
+
+def _colapsar(texto: str) -> str:
+    return _RE_ESPACIOS.sub(lambda m: "\n" if "\n" in m.group(0) else " ", texto)
+
+
+def _minificar_texto_html(fragmento: str) -> str:
+    """Fragmento sin bloques protegidos: comentarios fuera, espacios colapsados fuera de las etiquetas."""
+    fragmento = _RE_COMENTARIO.sub("", fragmento)
+    partes = _RE_ETIQUETA.split(fragmento)
+    # split con grupo: los índices impares son etiquetas, los pares texto.
+    return "".join(p if i % 2 else _colapsar(p) for i, p in enumerate(partes))
+
+
+def minificar_css(css: str) -> str:
+    """Sin comentarios, indentación ni espacios alrededor de `{`, `}` y `;` (fuera de cadenas)."""
+    partes = _RE_CADENA.split(css)
+    salida = []
+    for i, parte in enumerate(partes):
+        if i % 2:
+            salida.append(parte)
+            continue
+        parte = _RE_COMENTARIO_CSS.sub("", parte)
+        parte = _RE_PUNTUACION_CSS.sub(r"\1", parte)
+        salida.append(_RE_ESPACIOS.sub(" ", parte))
+    return "".join(salida).strip()
+
+
+def _minificar_js(js: str) -> str:
+    if "`" in js:
+        return js
+    lineas = (linea.strip() for linea in js.splitlines())
+    return "\n".join(linea for linea in lineas if linea)
+
+
+def minificar_html(html: str) -> str:
+    salida = []
+    ultimo = 0
+    for bloque in _RE_BLOQUE.finditer(html):
+        salida.append(_minificar_texto_html(html[ultimo:bloque.start()]))
+        apertura, tipo, contenido, cierre = bloque.group(1, 2, 3, 4)
+        tipo = tipo.lower()
+        if tipo == "style":
+            contenido = minificar_css(contenido)
+        elif tipo == "script":
+            contenido = _minificar_js(contenido)
+        salida.append(apertura + contenido + cierre)
+        ultimo = bloque.end()
+    salida.append(_minificar_texto_html(html[ultimo:]))
+    return "".join(salida).strip() + "\n"
+
+
+def tamano_gzip(datos: bytes) -> int:
+    return len(gzip.compress(datos, compresslevel=NIVEL_GZIP))
+
+
+@dataclass(slots=True)
+class Artefacto:
+    """
+    Tamaños de un fichero publicado: generado, tras el postproceso y con
+    gzip. En las páginas HTML, `css` son los bytes de CSS en línea.
+    """
+
+    ruta: str
+    bruto: int
+    final: int
+    gzip: int
+    css: int = 0
+
+    def a_json(self) -> Dict:
+        datos = {"bruto": self.bruto, "final": self.final, "gzip": self.gzip}
+        if self.ruta.endswith(".html"):
+            datos["css"] = self.css
+        return datos
+
+
+def json_compacto(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def escribir_compactos(origen: Path, destino: Path, excluir: Iterable[str] = ()) -> List[Artefacto]:
+    """
+    Escribe en `destino` la versión compacta de cada `origen/*.json` (salvo
+    `excluir`). Sólo reescribe los que cambian.
+    """
+    excluir = set(excluir)
+    artefactos = []
+    destino.mkdir(parents=True, exist_ok=True)
+    for path in sorted(origen.glob("*.json")):
+        if path.name in excluir:
+            continue
+        bruto = path.read_bytes()
+        try:
+            datos = json_compacto(json.loads(bruto)).encode("utf-8")
+        except json.JSONDecodeError:
+            continue
+        salida = destino / path.name
+        if not salida.exists() or salida.read_bytes() != datos:
+            salida.write_bytes(datos)
+        artefactos.append(Artefacto(str(salida), len(bruto), len(datos), tamano_gzip(datos)))
+    return artefactos
+
+
+class InformeTamanos:
+    """Artefactos del run por ruta (el último registro de cada ruta manda)."""
+
+    def __init__(self, base: Path):
+        self.base = base
+        self._artefactos: Dict[str, Artefacto] = {}
+        self._lock = threading.Lock()
+
+    def anotar(self, artefactos: Iterable[Artefacto]) -> None:
+        with self._lock:
+            for a in artefactos:
+                try:
+                    ruta = str(Path(a.ruta).relative_to(self.base))
+                except ValueError:
+                    ruta = a.ruta
+                self._artefactos[ruta] = a
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            artefactos = dict(sorted(self._artefactos.items()))
+        totales = {
+            clave: sum(getattr(a, clave) for a in artefactos.values())
+            for clave in ("bruto", "final", "gzip", "css")
+        }
+        return {
+            "totales": {"ficheros": len(artefactos), **totales},
+            "artefactos": {ruta: a.a_json() for ruta, a in artefactos.items()},
+        }
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Service worker offline-first del sitio, generado al final de cada run.
+
+`sw.js` (en la raíz del club) sale de `templates/sw_template.js` con la
+lista de precache de lo que hay publicado tras el run:
+
+- la home y las páginas de cada equipo del club_map, con el hash de su
+  contenido como revisión. La hora de "Última actualización"
+  (`<time class="actualizado">`) no cuenta: cambia en cada run aunque la
+  página no cambie;
+- las hojas de estilo y las imágenes de primer nivel de `Images/` (logos y
+  fondos) en su copia con huella (`recursos.py`), que no necesitan revisión.
+
+La versión del service worker es el hash de esa lista: si el run no cambia
+ningún artefacto, `sw.js` queda idéntico y el navegador no reinstala nada;
+si cambia alguno, sólo se vuelve a descargar ese. Las fotos de jugadores no
+se precachean (pesan demasiado para bajarlas todas en el campo): se cachean
+al verlas. Los JSON de `data/` van con stale-while-revalidate.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from jinja2 import Template
+
+import recursos
+
+NOMBRE = "sw.js"
+PAGINAS_EQUIPO = ("index.html", "plantilla.html")
+
+_RE_ACTUALIZADO = re.compile(rb'<time class="actualizado">[^<]*</time>')
+
+
+def _precacheable(original: str) -> bool:
+    return original.startswith("estilos/") or (
+        original.startswith("Images/") and original.count("/") == 1
+    )
+
+
+def revision_pagina(html: bytes) -> str:
+    """Hash de la página sin la hora de la última actualización."""
+    return recursos.huella(_RE_ACTUALIZADO.sub(b"", html))
+
+
+def lista_precache(raiz: Path, slugs: Iterable[str], rutas_recursos: Dict[str, str]) -> List[Dict]:
+    """Entradas {url, revision} relativas a `raiz`, en orden estable."""
+    entradas = []
+    for url in ["index.html"] + [f"{slug}/{pagina}" for slug in slugs for pagina in PAGINAS_EQUIPO]:
+        path = raiz / url
+        if path.exists():
+            entradas.append({"url": url, "revision": revision_pagina(path.read_bytes())})
+    for original, publicada in sorted(rutas_recursos.items()):
+        if _precacheable(original) and (raiz / publicada).exists():
+            entradas.append({"url": publicada, "revision": None})
+    return entradas
+
+
+def escribir(destino: Path, plantilla: Template, entradas: List[Dict]) -> bool:
+    """Escribe el service worker si cambia. Devuelve si se ha reescrito."""
+    precache = json.dumps(entradas, ensure_ascii=False, separators=(",", ":"))
+    js = plantilla.render(precache=precache, version=recursos.huella(precache.encode("utf-8")))
+    if destino.exists() and destino.read_text(encoding="utf-8") == js:
+        return False
+    tmp = destino.with_name(destino.name + ".tmp")
+    tmp.write_text(js, encoding="utf-8")
+    os.replace(tmp, destino)
+    return True
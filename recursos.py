@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Recursos publicados con huella de contenido en el nombre.
+
+Imágenes y hojas de estilo se publican como copias
+`assets/<ruta>.<hash>.<ext>` (p.ej. `Images/bg-alevin-a.jpg` →
+`assets/Images/bg-alevin-a.3fa9c2e1d0.jpg`). El nombre sólo cambia cuando
+cambia el contenido, así que el sitio puede servirse con caché larga sin
+que el navegador vea nunca una versión vieja.
+
+`assets/recursos.json` es el manifiesto: ruta original → copia publicada y
+su tamaño. Se versiona, así que sólo lleva lo que no depende del checkout:
+el tamaño y la fecha de modificación de cada original, para no volver a
+calcular el hash de lo que no ha cambiado, van aparte en
+`.cache/recursos.json` (no versionado; un checkout nuevo cambia todas las
+fechas). Las plantillas resuelven sus referencias con `{{ asset(ruta) }}`
+(ver `funcion_asset`).
+
+`assets/` se versiona con el resto del sitio: las copias sustituidas tienen
+que seguir publicadas para las páginas que un run parcial no regenera, y el
+despliegue publica el árbol de trabajo tal cual.
+
+Los JSON de `data/` no pasan por aquí: ninguna página los pide por nombre
+fijo. El único que lee el navegador, el índice de búsqueda de la home, ya
+versiona sus ficheros con el hash que lleva `data/buscar/indice.json` (ver
+`buscador.py`).
+
+Una copia sustituida por otra no se borra enseguida: las páginas que un
+run parcial (`--due`, `watch`) no regenera siguen apuntando a ella. Se
+borra pasados `DIAS_RETENCION` días.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from jinja2 import pass_context
+
+logger = logging.getLogger(__name__)
+
+DIR_ASSETS = "assets"
+MANIFIESTO = "recursos.json"
+CACHE_STAT = Path(".cache") / "recursos.json"
+MANIFIESTO_VERSION = 1
+DIAS_RETENCION = 7
+LONGITUD_HUELLA = 10
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".svg")
+
+
+def huella(datos: bytes) -> str:
+    return hashlib.sha256(datos).hexdigest()[:LONGITUD_HUELLA]
+
+
+def nombre_con_huella(ruta: str, valor: str) -> str:
+    """'Images/bg.jpg' → 'Images/bg.<valor>.jpg'."""
+    base, ext = posixpath.splitext(ruta)
+    return f"{base}.{valor}{ext}"
+
+
+@dataclass(slots=True)
+class Manifiesto:
+    """
+    Ruta original → ruta publicada, ambas relativas a `raiz`. Es lo que
+    reciben los procesos de renderizado.
+    """
+
+    raiz: Path
+    rutas: Dict[str, str]
+
+    def url(self, ruta: str, pagina: Path) -> str:
+        """
+        `ruta` tal como la escribe la plantilla de `pagina` (relativa a la
+        página) → la copia publicada, también relativa a la página. Las URLs
+        absolutas y las rutas que no están en el manifiesto no se tocan.
+        """
+        if not ruta or "://" in ruta or ruta.startswith(("data:", "/", "#")):
+            return ruta
+        original = Path(os.path.normpath(pagina.parent / ruta))
+        try:
+            clave = original.relative_to(self.raiz).as_posix()
+        except ValueError:
+            return ruta
+        publicada = self.rutas.get(clave)
+        if publicada is None:
+            return ruta
+        return Path(os.path.relpath(self.raiz / publicada, pagina.parent)).as_posix()
+
+
+def funcion_asset(manifiesto: Optional[Manifiesto]):
+    """
+    Global `asset` de Jinja. Resuelve contra el manifiesto una ruta relativa
+    a la página que se renderiza (`_destino` en el contexto). Sin manifiesto
+    o sin `_destino` devuelve la ruta tal cual.
+    """
+
+    @pass_context
+    def asset(contexto, ruta):
+        destino = contexto.get("_destino")
+        if manifiesto is None or not destino:
+            return ruta
+        return manifiesto.url(ruta, Path(destino))
+
+    return asset
+
+
+class Recursos:
+    """Publicador de copias con huella bajo `raiz/assets` y su manifiesto."""
+
+    def __init__(self, raiz: Path):
+        self.raiz = raiz
+        self.dir_assets = raiz / DIR_ASSETS
+        self.path = self.dir_assets / MANIFIESTO
+        self.path_stat = raiz / CACHE_STAT
+        self.entradas: Dict[str, Dict] = {}
+        # Copias sustituidas (ruta publicada → fecha en que dejó de ser la vigente).
+        self.retiradas: Dict[str, str] = {}
+        # Original → {bytes, mtime_ns, ruta} de cuando se publicó (sólo en .cache/).
+        self.stat: Dict[str, Dict] = {}
+        data = self._leer(self.path, "Manifiesto de recursos")
+        if data.get("version") == MANIFIESTO_VERSION:
+            self.entradas = {
+                ruta: {"ruta": e["ruta"], "bytes": e.get("bytes")}
+                for ruta, e in (data.get("recursos") or {}).items()
+            }
+            self.retiradas = data.get("retiradas") or {}
+        data = self._leer(self.path_stat, "Caché de recursos")
+        if data.get("version") == MANIFIESTO_VERSION:
+            self.stat = data.get("ficheros") or {}
+
+    @staticmethod
+    def _leer(path: Path, descripcion: str) -> Dict:
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"{descripcion} ilegible ({e}); se recalcula")
+            return {}
+
+    @staticmethod
+    def _escribir(path: Path, data: Dict) -> None:
+        """Escribe `data` si cambia (un run sin novedades no toca el fichero)."""
+        contenido = json.dumps(data, ensure_ascii=False, indent=2)
+        if path.exists() and path.read_text(encoding="utf-8") == contenido:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(contenido, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _sustituir(self, ruta: str, publicada: str) -> None:
+        anterior = (self.entradas.get(ruta) or {}).get("ruta")
+        if anterior and anterior != publicada:
+            self.retiradas.setdefault(anterior, date.today().isoformat())
+        self.retiradas.pop(publicada, None)
+
+    def publicar_datos(self, ruta: str, datos: bytes, stat: Optional[os.stat_result] = None) -> str:
+        """Publica `datos` como la versión vigente de `ruta`. Devuelve la ruta publicada."""
+        publicada = f"{DIR_ASSETS}/{nombre_con_huella(ruta, huella(datos))}"
+        destino = self.raiz / publicada
+        if not destino.exists():
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            tmp = destino.with_name(destino.name + ".tmp")
+            tmp.write_bytes(datos)
+            os.replace(tmp, destino)
+        self._sustituir(ruta, publicada)
+        self.entradas[ruta] = {"ruta": publicada, "bytes": len(datos)}
+        if stat is not None:
+            self.stat[ruta] = {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns, "ruta": publicada}
+        return publicada
+
+    def publicar_fichero(self, ruta: str) -> str:
+        """Publica `raiz/ruta`; si no ha cambiado desde el último run, no lo relee."""
+        stat = (self.raiz / ruta).stat()
+        entrada = self.entradas.get(ruta)
+        previo = self.stat.get(ruta)
+        if (
+            entrada and previo
+            and previo.get("mtime_ns") == stat.st_mtime_ns
+            and previo.get("bytes") == stat.st_size
+            and previo.get("ruta") == entrada["ruta"]
+            and (self.raiz / entrada["ruta"]).exists()
+        ):
+            return entrada["ruta"]
+        return self.publicar_datos(ruta, (self.raiz / ruta).read_bytes(), stat)
+
+    def publicar_directorio(
+        self, relativo: str, extensiones: Iterable[str],
+        excluir: Optional[Callable[[str], bool]] = None,
+    ) -> int:
+        """
+        Publica los ficheros de `raiz/relativo` (recursivo) con esas
+        extensiones, salvo aquellos cuya ruta cumple `excluir`. Las entradas
+        del directorio que ya no se publican (borradas o excluidas) se retiran.
+        """
+        extensiones = tuple(extensiones)
+        directorio = self.raiz / relativo
+        publicadas = set()
+        for path in sorted(directorio.rglob("*")) if directorio.is_dir() else ():
+            ruta = path.relative_to(self.raiz).as_posix()
+            if path.is_file() and path.suffix.lower() in extensiones and not (excluir and excluir(ruta)):
+                self.publicar_fichero(ruta)
+                publicadas.add(ruta)
+        for ruta in [r for r in self.entradas if r.startswith(f"{relativo}/") and r not in publicadas]:
+            self._retirar(ruta)
+        return len(publicadas)
+
+    def retirar(self, prefijo: str) -> int:
+        """Retira las entradas de rutas que empiezan por `prefijo` (se borran pasada la retención)."""
+        rutas = [ruta for ruta in self.entradas if ruta.startswith(prefijo)]
+        for ruta in rutas:
+            self._retirar(ruta)
+        return len(rutas)
+
+    def _retirar(self, ruta: str) -> None:
+        self.retiradas.setdefault(self.entradas.pop(ruta)["ruta"], date.today().isoformat())
+
+    def manifiesto(self) -> Manifiesto:
+        return Manifiesto(self.raiz, {ruta: e["ruta"] for ruta, e in self.entradas.items()})
+
+    def guardar(self) -> None:
+        """
+        Borra las copias retiradas hace más de `DIAS_RETENCION` días y
+        escribe el manifiesto y la caché de `stat` (cada uno sólo si cambia).
+        """
+        limite = (date.today() - timedelta(days=DIAS_RETENCION)).isoformat()
+        for publicada, fecha in list(self.retiradas.items()):
+            if fecha < limite:
+                (self.raiz / publicada).unlink(missing_ok=True)
+                del self.retiradas[publicada]
+
+        self._escribir(self.path, {
+            "version": MANIFIESTO_VERSION,
+            "recursos": dict(sorted(self.entradas.items())),
+            "retiradas": dict(sorted(self.retiradas.items())),
+        })
+        self._escribir(self.path_stat, {
+            "version": MANIFIESTO_VERSION,
+            "ficheros": {r: e for r, e in sorted(self.stat.items()) if r in self.entradas},
+        })
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Etapa de renderizado: las páginas de todos los equipos, al final y en paralelo.
+
+`process_team` ya no renderiza: encola cada página (`Pagina`: plantilla,
+destino y contexto) en un `Renderizador`. Terminada la recogida de datos,
+`Renderizador.renderizar()` las genera todas de una vez en un pool de
+procesos: el renderizado de Jinja es CPU puro y con miles de páginas (modo
+`--clubs`) el GIL lo dejaría en un solo núcleo.
+
+Las plantillas se compilan a módulos Python una sola vez
+(`Environment.compile_templates`) en `dir_compiladas/<hash de las fuentes>`;
+cada worker las carga con un `ModuleLoader` al arrancar, sin volver a
+parsearlas. Si cambia una plantilla cambia el hash y se recompila.
+
+Con pocas páginas (menos de `MIN_PAGINAS_POOL`) o un solo worker se
+renderiza en el propio proceso: arrancar el pool costaría más que lo que
+ahorra.
+
+Con `--profile` también se renderiza en el propio proceso (un worker):
+cProfile no ve dentro del pool y la fase `html` sólo mediría la espera.
+
+Las plantillas resuelven imágenes y demás recursos con `{{ asset(ruta) }}`
+contra el manifiesto de copias con huella (`recursos.Manifiesto`), y los
+escudos con `{{ escudo(url) }}` contra la caché local
+(`escudos.TablaEscudos`); cada worker recibe ambos al arrancar. Cada worker
+sustituye el marcador de hoja de estilos por el CSS crítico y el enlace a
+la hoja publicada (`estilos.aplicar`), minifica el HTML
+(`postproceso.minificar_html`) antes de escribirlo y devuelve los tamaños
+de cada página para el informe del run.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+
+import escudos
+import estilos
+import postproceso
+import recursos
+from postproceso import Artefacto
+
+logger = logging.getLogger(__name__)
+
+MIN_PAGINAS_POOL = 16
+
+# Páginas por tarea enviada al pool: reparte el trabajo sin pagar un
+# ida y vuelta entre procesos por cada página.
+PAGINAS_POR_TAREA = 8
+
+
+@dataclass(slots=True)
+class Pagina:
+    """Una página pendiente: plantilla, fichero de salida y contexto."""
+
+    plantilla: str
+    destino: Path
+    contexto: Dict
+
+
+def compilar_plantillas(dir_plantillas: Path, dir_compiladas: Path) -> Path:
+    """
+    Compila las plantillas de `dir_plantillas` en un subdirectorio de
+    `dir_compiladas` que depende de su contenido. Reutiliza el existente si
+    las fuentes no han cambiado. Devuelve ese subdirectorio.
+    """
+    huella = hashlib.sha256()
+    for path in sorted(dir_plantillas.glob("*.html")):
+        huella.update(path.name.encode("utf-8"))
+        huella.update(path.read_bytes())
+    destino = dir_compiladas / huella.hexdigest()[:16]
+    if destino.exists():
+        return destino
+
+    tmp = destino.with_name(destino.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    Environment(loader=FileSystemLoader(str(dir_plantillas))).compile_templates(
+        str(tmp), extensions=("html",), zip=None, ignore_errors=False
+    )
+    os.replace(tmp, destino)
+    # Las compilaciones de versiones anteriores de las plantillas ya no sirven.
+    for viejo in dir_compiladas.iterdir():
+        if viejo != destino and viejo.is_dir():
+            shutil.rmtree(viejo, ignore_errors=True)
+    logger.info(f"🧩 Plantillas compiladas en {destino}")
+    return destino
+
+
+# Environment de cada proceso del pool (y del principal si renderiza él).
+_ENTORNO: Optional[Environment] = None
+_MINIFICAR = True
+_HOJAS: Dict[str, estilos.Hoja] = {}
+
+
+def _iniciar_worker(
+    dir_compiladas: str,
+    minificar: bool = True,
+    hojas: Optional[Dict[str, estilos.Hoja]] = None,
+    manifiesto: Optional[recursos.Manifiesto] = None,
+    tabla_escudos: Optional[escudos.TablaEscudos] = None,
+) -> None:
+    global _ENTORNO, _MINIFICAR, _HOJAS
+    _ENTORNO = Environment(loader=ModuleLoader(dir_compiladas))
+    _ENTORNO.globals["asset"] = recursos.funcion_asset(manifiesto)
+    _ENTORNO.globals.update(escudos.funciones_jinja(manifiesto, tabla_escudos))
+    _MINIFICAR = minificar
+    _HOJAS = hojas or {}
+
+
+def _renderizar_lote(paginas: List[Pagina]) -> Tuple[List[Artefacto], List[Tuple[str, str]]]:
+    """
+    Renderiza y escribe un lote de páginas. Devuelve los tamaños de las
+    escritas y las que fallaron (destino, error); una página rota no tumba
+    las demás, igual que un equipo con error no tumba el run.
+    """
+    artefactos: List[Artefacto] = []
+    errores: List[Tuple[str, str]] = []
+    for pagina in paginas:
+        try:
+            html = _ENTORNO.get_template(pagina.plantilla).render(
+                **pagina.contexto, _destino=str(pagina.destino)
+            )
+            bruto = len(html.encode("utf-8"))
+            if _HOJAS:
+                html = estilos.aplicar(html, pagina.destino, _HOJAS)
+            if _MINIFICAR:
+                html = postproceso.minificar_html(html)
+            datos = html.encode("utf-8")
+            pagina.destino.parent.mkdir(parents=True, exist_ok=True)
+            with open(pagina.destino, "wb") as f:
+                f.write(datos)
+        except Exception as e:  # noqa: BLE001 - se informa en el proceso principal
+            errores.append((str(pagina.destino), f"{type(e).__name__}: {e}"))
+            continue
+        artefactos.append(Artefacto(
+            str(pagina.destino), bruto, len(datos), postproceso.tamano_gzip(datos),
+            css=estilos.bytes_css_en_linea(html),
+        ))
+    return artefactos, errores
+
+
+class Renderizador:
+    """Cola de páginas pendientes y el pool que las renderiza."""
+
+    def __init__(
+        self,
+        dir_plantillas: Path,
+        dir_compiladas: Path,
+        workers: Optional[int] = None,
+        minificar: bool = True,
+        informe: Optional[postproceso.InformeTamanos] = None,
+    ):
+        self.dir_plantillas = dir_plantillas
+        self.dir_compiladas = dir_compiladas
+        self.workers = workers or os.cpu_count() or 1
+        self.minificar = minificar
+        self.informe = informe
+        self.pendientes: List[Pagina] = []
+        self.totales = {"paginas": 0, "errores": 0, "bytes": 0, "segundos": 0.0}
+
+    def encolar(self, plantilla: str, destino: Path, contexto: Dict) -> None:
+        self.pendientes.append(Pagina(plantilla, Path(destino), contexto))
+
+    def renderizar(
+        self,
+        hojas: Optional[Dict[str, estilos.Hoja]] = None,
+        manifiesto: Optional[recursos.Manifiesto] = None,
+        tabla_escudos: Optional[escudos.TablaEscudos] = None,
+    ) -> Dict:
+        """
+        Renderiza todas las páginas encoladas y vacía la cola. `hojas` son
+        las hojas de estilo publicadas por tipo de página, `manifiesto` el
+        de los recursos con huella y `tabla_escudos` la caché local de
+        escudos. Devuelve
+        {paginas, errores, bytes, segundos, paginas_por_segundo, workers} de
+        esta tanda.
+        """
+        paginas, self.pendientes = self.pendientes, []
+        if not paginas:
+            return {
+                "paginas": 0, "errores": 0, "bytes": 0, "segundos": 0.0,
+                "paginas_por_segundo": None, "workers": 0,
+            }
+
+        t0 = time.perf_counter()
+        compiladas = str(compilar_plantillas(self.dir_plantillas, self.dir_compiladas))
+        workers = min(self.workers, -(-len(paginas) // PAGINAS_POR_TAREA))
+        if workers <= 1 or len(paginas) < MIN_PAGINAS_POOL:
+            workers = 1
+            _iniciar_worker(compiladas, self.minificar, hojas, manifiesto, tabla_escudos)
+            resultados = [_renderizar_lote(paginas)]
+        else:
+            lotes = [paginas[i:i + PAGINAS_POR_TAREA] for i in range(0, len(paginas), PAGINAS_POR_TAREA)]
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_iniciar_worker,
+                initargs=(compiladas, self.minificar, hojas, manifiesto, tabla_escudos),
+            ) as pool:
+                resultados = list(pool.map(_renderizar_lote, lotes))
+        segundos = time.perf_counter() - t0
+        artefactos = [a for r in resultados for a in r[0]]
+        escritos = sum(a.final for a in artefactos)
+        errores = [e for r in resultados for e in r[1]]
+        if self.informe is not None:
+            self.informe.anotar(artefactos)
+        for destino, error in errores:
+            logger.error(f"❌ No se pudo renderizar {destino}: {error}")
+
+        renderizadas = len(paginas) - len(errores)
+        self.totales["paginas"] += renderizadas
+        self.totales["errores"] += len(errores)
+        self.totales["bytes"] += escritos
+        self.totales["segundos"] += segundos
+        return {
+            "paginas": renderizadas,
+            "errores": len(errores),
+            "bytes": escritos,
+            "segundos": round(segundos, 3),
+            "paginas_por_segundo": round(renderizadas / segundos, 1) if segundos else None,
+            "workers": workers,
+        }
+
+    def resumen(self) -> Dict:
+        """Totales del run, para `run_report.json`."""
+        segundos = self.totales["segundos"]
+        return {
+            **self.totales,
+            "segundos": round(segundos, 3),
+            "paginas_por_segundo": round(self.totales["paginas"] / segundos, 1) if segundos else None,
+        }
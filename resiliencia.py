@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Control de recursos de un run frente a una API degradada.
+
+Dos piezas, ambas compartidas por todos los equipos del run:
+
+- `PresupuestoEjecucion`: cuánto trabajo queda y para qué prioridades.
+- `CircuitBreaker` / `RegistroCircuitos`: cuándo dejar de insistir a una
+  familia de endpoints que está caída.
+
+`PresupuestoEjecucion` limita el run en peticiones y/o segundos de reloj y
+reparte lo que queda por prioridades:
+
+- CRITICA: calendario y resultados. Se admite mientras quede presupuesto.
+- ALTA: clasificación y plantilla. Deja libre una reserva para lo crítico.
+- COSMETICA: actas (dorsales y fotos) y coordenadas de campos. Sólo con
+  holgura; si no, se aplaza al siguiente run.
+
+Lo aplazado no se marca en ninguna caché: como las fotos y los campos se
+resuelven sólo si faltan, el run siguiente los recoge solo.
+
+Circuit breaker por familia de endpoints (`partidos/`, `filtros/`...): tras
+`umbral` fallos transitorios seguidos se abre y las peticiones fallan al
+instante; pasado el enfriamiento deja pasar una única sonda (semiabierto).
+Si la sonda va bien se cierra; si falla, vuelve a abrirse con el doble de
+enfriamiento.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CRITICA = "critica"
+ALTA = "alta"
+COSMETICA = "cosmetica"
+
+PRIORIDADES = (CRITICA, ALTA, COSMETICA)
+
+# Fracción del presupuesto que tiene que quedar libre para admitir trabajo de
+# cada prioridad: lo cosmético no toca el último 40%, lo alto el último 15%.
+RESERVAS: Dict[str, float] = {CRITICA: 0.0, ALTA: 0.15, COSMETICA: 0.40}
+
+
+class PresupuestoEjecucion:
+    """
+    Presupuesto global de peticiones y tiempo de un run. Sin límites (el
+    valor por defecto) lo admite todo. Seguro entre hilos.
+    """
+
+    def __init__(
+        self,
+        max_peticiones: Optional[int] = None,
+        max_segundos: Optional[float] = None,
+        reservas: Optional[Dict[str, float]] = None,
+    ):
+        self.max_peticiones = max_peticiones
+        self.max_segundos = max_segundos
+        self.reservas = dict(RESERVAS, **(reservas or {}))
+        self._lock = threading.Lock()
+        self.iniciar()
+
+    def iniciar(self) -> None:
+        """Arranca el reloj y pone a cero los contadores."""
+        with self._lock:
+            self._t0 = time.monotonic()
+            self.peticiones = 0
+            self.peticiones_por_prioridad: Dict[str, int] = {p: 0 for p in PRIORIDADES}
+            self.rechazadas: Dict[str, int] = {p: 0 for p in PRIORIDADES}
+            self.aplazadas: Dict[str, int] = {}
+
+    @property
+    def limitado(self) -> bool:
+        return self.max_peticiones is not None or self.max_segundos is not None
+
+    def segundos_restantes(self) -> Optional[float]:
+        if self.max_segundos is None:
+            return None
+        return self.max_segundos - (time.monotonic() - self._t0)
+
+    def fraccion_restante(self) -> float:
+        """Lo que queda del recurso más escaso, entre 0 y 1."""
+        fracciones = [1.0]
+        if self.max_peticiones is not None:
+            fracciones.append(1 - self.peticiones / max(self.max_peticiones, 1))
+        if self.max_segundos is not None:
+            fracciones.append(self.segundos_restantes() / max(self.max_segundos, 1e-9))
+        return max(0.0, min(fracciones))
+
+    def _admite(self, prioridad: str, fraccion: float) -> bool:
+        reserva = self.reservas.get(prioridad, 0.0)
+        return fraccion > reserva if reserva else fraccion > 0
+
+    def admitir(self, prioridad: str) -> bool:
+        """
+        ¿Puede salir una petición de esta prioridad? Si sí, la descuenta del
+        presupuesto; si no, la anota como rechazada.
+        """
+        with self._lock:
+            if not self._admite(prioridad, self.fraccion_restante()):
+                self.rechazadas[prioridad] = self.rechazadas.get(prioridad, 0) + 1
+                return False
+            self.peticiones += 1
+            self.peticiones_por_prioridad[prioridad] = (
+                self.peticiones_por_prioridad.get(prioridad, 0) + 1
+            )
+            return True
+
+    def puede_esperar(self, segundos: float, prioridad: str) -> bool:
+        """¿Cabe un backoff de `segundos` sin invadir la reserva de la prioridad?"""
+        restantes = self.segundos_restantes()
+        if restantes is None:
+            return True
+        fraccion = (restantes - segundos) / max(self.max_segundos, 1e-9)
+        return self._admite(prioridad, fraccion)
+
+    def aplazar(self, que: str) -> None:
+        """Anota trabajo que se deja para el siguiente run (p.ej. 'actas')."""
+        with self._lock:
+            self.aplazadas[que] = self.aplazadas.get(que, 0) + 1
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            restantes = self.segundos_restantes()
+            return {
+                "max_peticiones": self.max_peticiones,
+                "max_segundos": self.max_segundos,
+                "peticiones": self.peticiones,
+                "peticiones_por_prioridad": dict(self.peticiones_por_prioridad),
+                "rechazadas": dict(self.rechazadas),
+                "aplazadas": dict(self.aplazadas),
+                "segundos_restantes": round(restantes, 1) if restantes is not None else None,
+            }
+
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+def familia_endpoint(path: str) -> str:
+    """'partidos/ficha_partido_ajax.php' → 'partidos'. URLs absolutas incluidas."""
+    if "/api/" in path:
+        path = path.rsplit("/api/", 1)[1]
+    path = path.split("?", 1)[0].lstrip("/")
+    return path.split("/", 1)[0] if "/" in path else "raiz"
+
+
+class CircuitBreaker:
+    """Circuit breaker de una familia de endpoints. Seguro entre hilos."""
+
+    def __init__(
+        self,
+        nombre: str,
+        umbral: int = 4,
+        enfriamiento: float = 60.0,
+        enfriamiento_max: float = 600.0,
+        reloj: Callable[[], float] = time.monotonic,
+    ):
+        self.nombre = nombre
+        self.umbral = umbral
+        self.enfriamiento_base = enfriamiento
+        self.enfriamiento_max = enfriamiento_max
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self.estado = CERRADO
+        self.fallos_seguidos = 0
+        self.enfriamiento = enfriamiento
+        self._abierto_hasta = 0.0
+        self._sonda_en_curso = False
+        self.aperturas = 0
+        self.rechazadas = 0
+
+    def permitir(self) -> bool:
+        """¿Puede salir una petición? En semiabierto, sólo la sonda."""
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and self._reloj() >= self._abierto_hasta:
+                self.estado = SEMIABIERTO
+                self._sonda_en_curso = False
+            if self.estado == SEMIABIERTO and not self._sonda_en_curso:
+                self._sonda_en_curso = True
+                logger.info(f"🔌 Circuito '{self.nombre}' semiabierto: enviando sonda")
+                return True
+            self.rechazadas += 1
+            return False
+
+    def exito(self) -> None:
+        with self._lock:
+            if self.estado != CERRADO:
+                logger.info(f"🔌 Circuito '{self.nombre}' cerrado: la API responde de nuevo")
+            self.estado = CERRADO
+            self.fallos_seguidos = 0
+            self.enfriamiento = self.enfriamiento_base
+            self._sonda_en_curso = False
+
+    def fallo(self) -> None:
+        """Fallo transitorio (respuesta degradada, sesión perdida, 5xx, red)."""
+        with self._lock:
+            if self.estado == SEMIABIERTO:
+                self.enfriamiento = min(self.enfriamiento * 2, self.enfriamiento_max)
+                self._abrir()
+                return
+            self.fallos_seguidos += 1
+            if self.estado == CERRADO and self.fallos_seguidos >= self.umbral:
+                self._abrir()
+
+    def neutro(self) -> None:
+        """Respuesta que no dice nada de la salud del upstream (p.ej. 429)."""
+        with self._lock:
+            self._sonda_en_curso = False
+
+    def _abrir(self) -> None:
+        self.estado = ABIERTO
+        self._abierto_hasta = self._reloj() + self.enfriamiento
+        self._sonda_en_curso = False
+        self.aperturas += 1
+        logger.warning(
+            f"🔌 Circuito '{self.nombre}' abierto tras {self.fallos_seguidos} fallo(s) "
+            f"seguidos; peticiones rechazadas durante {self.enfriamiento:.0f}s"
+        )
+
+    def segundos_hasta_sonda(self) -> float:
+        """0 si ya se puede pedir; si está abierto, lo que falta de enfriamiento."""
+        with self._lock:
+            if self.estado != ABIERTO:
+                return 0.0
+            return max(0.0, self._abierto_hasta - self._reloj())
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            return {
+                "estado": self.estado,
+                "aperturas": self.aperturas,
+                "rechazadas": self.rechazadas,
+                "fallos_seguidos": self.fallos_seguidos,
+            }
+
+
+class RegistroCircuitos:
+    """Un CircuitBreaker por familia de endpoints, creado bajo demanda."""
+
+    def __init__(self, umbral: int = 4, enfriamiento: float = 60.0, enfriamiento_max: float = 600.0):
+        self._parametros = {
+            "umbral": umbral, "enfriamiento": enfriamiento, "enfriamiento_max": enfriamiento_max,
+        }
+        self._lock = threading.Lock()
+        self._circuitos: Dict[str, CircuitBreaker] = {}
+
+    def para(self, path: str) -> CircuitBreaker:
+        familia = familia_endpoint(path)
+        with self._lock:
+            circuito = self._circuitos.get(familia)
+            if circuito is None:
+                circuito = self._circuitos[familia] = CircuitBreaker(familia, **self._parametros)
+            return circuito
+
+    def segundos_hasta_sonda(self) -> float:
+        """Lo que falta para que todos los circuitos abiertos admitan sonda."""
+        with self._lock:
+            circuitos = list(self._circuitos.values())
+        return max((c.segundos_hasta_sonda() for c in circuitos), default=0.0)
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            circuitos = dict(self._circuitos)
+        return {familia: c.resumen() for familia, c in sorted(circuitos.items())}
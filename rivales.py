@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Forma de los rivales y enfrentamientos previos a partir de los resultados
+de todo el grupo.
+
+Cada jornada que descarga el scraper trae los partidos del grupo entero y
+el almacén los guarda todos (`Almacen.partidos_grupo`). `ResultadosGrupo`
+los indexa por equipo una vez por grupo y calcula, sin peticiones extra,
+los índices que se cuelgan de cada partido pendiente:
+
+- `forma`: W/D/L de los últimos `N_FORMA` partidos del rival antes de esa
+  fecha, del más antiguo al más reciente (como la racha propia).
+- `goles`: [GF, GC] de esos mismos partidos y sus medias.
+- `previo`: el último enfrentamiento entre ambos equipos, si lo hubo.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+N_FORMA = 5
+
+
+class _Jugado(NamedTuple):
+    """Un partido jugado visto desde uno de los dos equipos."""
+
+    fecha: str
+    hora: str
+    gf: int
+    gc: int
+    rival: str
+    codacta: str
+
+
+def _goles(resultado: Optional[str]):
+    local, _, visitante = (resultado or "").partition("-")
+    try:
+        return int(local), int(visitante)
+    except ValueError:
+        return None
+
+
+def _desenlace(gf: int, gc: int) -> str:
+    return "W" if gf > gc else "L" if gf < gc else "D"
+
+
+class ResultadosGrupo:
+    """Resultados de un grupo indexados por equipo, ordenados por fecha."""
+
+    def __init__(self, partidos: List[Dict]):
+        self._partidos: Dict[str, Dict] = {}
+        self._por_equipo: Dict[str, List[_Jugado]] = defaultdict(list)
+        for p in partidos:
+            self._partidos[str(p["codacta"])] = p
+            goles = _goles(p.get("resultado"))
+            if goles is None or not p.get("fecha"):
+                continue
+            local, visitante = str(p["cod_local"]), str(p["cod_visitante"])
+            fecha, hora, acta = p["fecha"], p.get("hora") or "", str(p["codacta"])
+            self._por_equipo[local].append(_Jugado(fecha, hora, goles[0], goles[1], visitante, acta))
+            self._por_equipo[visitante].append(_Jugado(fecha, hora, goles[1], goles[0], local, acta))
+        for jugados in self._por_equipo.values():
+            jugados.sort()
+
+    def _antes_de(self, codequipo: str, fecha: str) -> List[_Jugado]:
+        jugados = self._por_equipo.get(str(codequipo), [])
+        return jugados[:bisect_left(jugados, (fecha,))]
+
+    def rival(self, codacta: str, codequipo: str) -> Optional[str]:
+        """codequipo del rival de `codequipo` en el partido `codacta`."""
+        p = self._partidos.get(str(codacta))
+        if p is None:
+            return None
+        return str(p["cod_visitante"] if str(p["cod_local"]) == str(codequipo) else p["cod_local"])
+
+    def indices(self, codequipo: str, codacta: str, fecha: Optional[str]) -> Optional[Dict]:
+        """
+        Forma, goles y último enfrentamiento del rival de `codequipo` en el
+        partido `codacta`, con lo jugado antes de `fecha`. None si el partido
+        no está en el grupo.
+        """
+        codrival = self.rival(codacta, codequipo)
+        if codrival is None:
+            return None
+        previos = self._antes_de(codrival, fecha or "9999")
+        ultimos = previos[-N_FORMA:]
+        enfrentamientos = [j for j in previos if j.rival == str(codequipo)]
+        previo = None
+        if enfrentamientos:
+            p = self._partidos[enfrentamientos[-1].codacta]
+            previo = {
+                "fecha": p["fecha"],
+                "local": p["local"],
+                "visitante": p["visitante"],
+                "resultado": p["resultado"],
+            }
+        n = len(ultimos)
+        return {
+            "codequipo": codrival,
+            "forma": [_desenlace(j.gf, j.gc) for j in ultimos],
+            "goles": [[j.gf, j.gc] for j in ultimos],
+            "gf_media": round(sum(j.gf for j in ultimos) / n, 1) if n else None,
+            "gc_media": round(sum(j.gc for j in ultimos) / n, 1) if n else None,
+            "previo": previo,
+        }
@@ -8,27 +8,57 @@ portal resultadosffcv.isquad.es) para generar el calendario, clasificación y
 plantilla de cada equipo configurado.
 """
 
+import argparse
 import base64
 import json
 import logging
+import os
 import re
+import subprocess
 import time
 import yaml
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import quote
 
 from ics import Calendar, Event
 from jinja2 import Environment, FileSystemLoader
 import requests
 
+import almacen
+import buscador
+import cambios
+import cassette
+import escudos
+import estilos
+import liga
+import parseo
+import perfilado
+import planificador
+import postproceso
+import pwa
+import resiliencia
+import renderizado
+import recursos
+import rivales
+import telemetria
+import transporte
+from modelos import FilaClasificacion, Jugador, Partido
+
 
 # Base de la API pública de la FFCV. Los IDs antiguos del portal isquad
 # (id_temp, id_modalidad, id_competicion, id_torneo, id_equipo) siguen siendo
 # válidos como cod_temporada, cod_competicion, cod_grupo y codequipo en la
-# nueva API JSON.
-FFCV_API_BASE = "https://ffcv.es/competiciones/api"
+# nueva API JSON. `FFCV_API_BASE` en el entorno permite apuntar a un stand-in
+# local (ver ffcv_stub.py).
+FFCV_API_BASE = os.environ.get("FFCV_API_BASE", "https://ffcv.es/competiciones/api").rstrip("/")
+
+# Host de las imágenes (escudos): la API las da como rutas absolutas del
+# sitio (`/pnfg/pimg/...`). `FFCV_WEB_BASE` lo cambia igual que la API.
+FFCV_WEB_BASE = os.environ.get("FFCV_WEB_BASE", "https://ffcv.es").rstrip("/")
 
 # El servidor bloquea User-Agents con patrón de scraping (curl/python-requests/etc.)
 # y devuelve {"error":"blocked","reason_code":"UA_BLOCKED"}. Hace falta UA real.
@@ -46,6 +76,19 @@ FFCV_HEADERS = {
 class FFCVAPIError(RuntimeError):
     """Error devuelto por la API FFCV o respuesta inesperada."""
 
+
+class PresupuestoAgotado(FFCVAPIError):
+    """El presupuesto del run ya no admite trabajo de esta prioridad."""
+
+
+class CircuitoAbierto(FFCVAPIError):
+    """La familia de endpoints está caída; se falla sin llegar a pedir."""
+
+
+# Fallos que no indican un problema del equipo sino del run: el trabajo no
+# crítico se aplaza al siguiente run en lugar de registrarse como error.
+_TRABAJO_APLAZABLE = (PresupuestoAgotado, CircuitoAbierto)
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -66,12 +109,13 @@ OUTPUT_DASHBOARD = BASE_DIR / "dashboard.html"
 OUTPUT_PLANTILLA = BASE_DIR / "plantilla.html"
 
 
-def load_club_config() -> Optional[Dict]:
+def load_club_config(path: Optional[Path] = None) -> Optional[Dict]:
     """
-    Carga `configs/_club.yaml` si existe. Si no, devuelve None (modo legacy:
-    sólo se procesan los equipos definidos en configs/equipo*.yaml).
+    Carga `configs/_club.yaml` (u otro config de club, en modo `--clubs`) si
+    existe. Si no, devuelve None (modo legacy: sólo se procesan los equipos
+    definidos en configs/equipo*.yaml).
     """
-    path = BASE_DIR / "configs" / "_club.yaml"
+    path = path or BASE_DIR / "configs" / "_club.yaml"
     if not path.exists():
         return None
     with open(path, "r", encoding="utf-8") as f:
@@ -102,6 +146,7 @@ def setup_globals(config: Dict):
     global PLANTILLA_IMAGES_DIR, OUTPUT_ICS, OUTPUT_JSON, OUTPUT_INDEX, OUTPUT_PLANTILLA
 
     CONFIG = config
+    parseo.configurar_temporada(config['sitio'].get('temporada'))
     TEAM_NAME = config['equipo']['nombre']
     TEAM_SHORT_NAME = config['equipo']['nombre_corto']
     GRUPO = config['equipo']['grupo']
@@ -130,16 +175,132 @@ def setup_globals(config: Dict):
 
 _SESSION: Optional[requests.Session] = None
 
+# Conexiones simultáneas por host del pool HTTP. Hoy las peticiones salen de
+# un solo hilo; el pool admite algunas más para el home y futuros workers.
+HTTP_WORKERS = 4
+
+# Revalidación ETag/Last-Modified. En memoria por defecto (sirve ya dentro de
+# un mismo run); main la carga y guarda en .cache/http.json.gz.
+CACHE_HTTP = transporte.CacheCondicional()
+
+# Métricas del run en curso (peticiones, reintentos, esperas, fases). main
+# las vuelca a .cache/run_report.json.
+TELEMETRIA = telemetria.Telemetria()
+
+# Presupuesto de peticiones/tiempo del run. Sin límites salvo que main lo
+# configure (--budget-requests/--budget-seconds o `presupuesto:` en _club.yaml).
+PRESUPUESTO = resiliencia.PresupuestoEjecucion()
+
+# Histórico SQLite de partidos, clasificaciones y actas. En memoria salvo que
+# main abra el de disco (historico.sqlite3).
+ALMACEN = almacen.Almacen()
+
+# Circuit breakers por familia de endpoints, compartidos por todos los equipos:
+# durante una caída del upstream el run deja de pagar 5 reintentos por equipo.
+CIRCUITOS = resiliencia.RegistroCircuitos()
+
+# Respuestas de grupo/temporada ya descargadas en este run. Dos equipos del
+# mismo grupo (del club o de clubes distintos con --clubs) piden las mismas
+# jornadas y clasificaciones: la segunda vez no sale a la red.
+MEMO = transporte.MemoRespuestas()
+
+# Tamaños de lo publicado (HTML y JSON compacto): antes y después del
+# postproceso y con gzip. main lo vuelca en .cache/run_report.json.
+TAMANOS = postproceso.InformeTamanos(BASE_DIR)
+
+# Minificar el HTML generado (main lo desactiva con --no-minify).
+MINIFICAR_HTML = True
+
+# Sprite de escudos por grupo para la clasificación (main lo activa con
+# --sprites-escudos; requiere Pillow).
+SPRITES_ESCUDOS = False
+
+# Caché de escudos de la raíz en curso (ver `_cache_escudos`).
+_ESCUDOS: Optional[escudos.CacheEscudos] = None
+
+# Páginas HTML pendientes de renderizar. process_team las encola y
+# `renderizar_paginas` las genera todas juntas; main fija los workers.
+RENDERIZADOR = renderizado.Renderizador(
+    TEMPLATES_DIR, BASE_DIR / ".cache" / "plantillas", informe=TAMANOS
+)
+
+# Club en curso con --clubs (nombre de su raíz de salida); prefija las
+# etiquetas de equipo en la telemetría, donde los slugs se repiten entre clubes.
+CLUB_ACTUAL: Optional[str] = None
+
+# Caché de coordenadas de campos. None = `DATA_DIR/campos.json`; con --clubs
+# es una sola para todos los clubes.
+CAMPOS_JSON: Optional[Path] = None
+
 
 def _get_session() -> requests.Session:
     """requests.Session compartida, con headers FFCV preconfigurados."""
-    global _SESSION
     if _SESSION is None:
-        _SESSION = requests.Session()
-        _SESSION.headers.update(FFCV_HEADERS)
+        instalar_sesion(transporte.crear_sesion(HTTP_WORKERS))
     return _SESSION
 
 
+def instalar_sesion(session: requests.Session) -> None:
+    """
+    Sustituye la sesión compartida (p.ej. por una de `cassette` para grabar o
+    reproducir un run). Le aplica los headers FFCV.
+    """
+    global _SESSION
+    session.headers.update(FFCV_HEADERS)
+    _SESSION = session
+
+
+def _dormir(segundos: float, motivo: str) -> None:
+    """time.sleep que además contabiliza la espera en la telemetría del run."""
+    TELEMETRIA.registrar_espera(motivo, segundos)
+    time.sleep(segundos)
+
+
+def _bytes_en_red(response: requests.Response) -> int:
+    """Bytes recibidos por la red (comprimidos si hubo Content-Encoding)."""
+    try:
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return len(response.content or b"")
+
+
+def _get_medido(
+    session: requests.Session,
+    path: str,
+    url: str,
+    params: Optional[Dict],
+    cabeceras: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """session.get que anota latencia, bytes y status en la telemetría."""
+    response: Optional[requests.Response] = None
+    t0 = time.perf_counter()
+    try:
+        response = session.get(url, params=params, timeout=30, headers=cabeceras or None)
+        return response
+    finally:
+        TELEMETRIA.registrar_peticion(
+            path,
+            time.perf_counter() - t0,
+            bytes_respuesta=_bytes_en_red(response) if response is not None else 0,
+            status=response.status_code if response is not None else None,
+            error=response is None or response.status_code >= 400,
+        )
+
+
+def _get_condicional(session: requests.Session, path: str, url: str, params: Optional[Dict]) -> requests.Response:
+    """
+    GET con If-None-Match / If-Modified-Since si hay validadores en CACHE_HTTP.
+    Un 304 vuelve como el 200 cacheado.
+    """
+    clave = cassette.clave_peticion(url, params)
+    response = _get_medido(session, path, url, params, CACHE_HTTP.cabeceras(clave))
+    resuelta = CACHE_HTTP.resolver(clave, response)
+    if resuelta is None:
+        # 304 sin cuerpo guardado (caché podada entre medias): pedir entera.
+        resuelta = _get_medido(session, path, url, params)
+    return resuelta
+
+
 def _es_respuesta_transitoria(data) -> Optional[str]:
     """
     Detecta respuestas del proxy FFCV que indican un fallo transitorio del
@@ -164,45 +325,95 @@ def _es_respuesta_transitoria(data) -> Optional[str]:
     return None
 
 
-def fetch_json(path: str, params: Optional[Dict] = None, max_retries: int = 5) -> Dict:
+def _esperar_backoff(
+    segundos: float,
+    motivo: str,
+    prioridad: str,
+    url: str,
+    circuito: resiliencia.CircuitBreaker,
+) -> None:
+    """
+    Duerme un backoff antes de reintentar. Corta los reintentos si el
+    circuito acaba de abrirse o si el presupuesto no da para la espera.
+    """
+    if circuito.estado == resiliencia.ABIERTO:
+        raise CircuitoAbierto(
+            f"Circuito '{circuito.nombre}' abierto; sin más reintentos en {url}"
+        )
+    if not PRESUPUESTO.puede_esperar(segundos, prioridad):
+        raise PresupuestoAgotado(
+            f"Sin presupuesto para esperar {segundos}s antes de reintentar {url} "
+            f"(prioridad {prioridad})"
+        )
+    _dormir(segundos, motivo)
+
+
+def fetch_json(
+    path: str,
+    params: Optional[Dict] = None,
+    max_retries: int = 5,
+    prioridad: str = resiliencia.CRITICA,
+) -> Dict:
     """
     Hace GET a un endpoint de la API FFCV y devuelve el JSON parseado.
 
     Reintenta con backoff incremental si el proxy degrada la respuesta o si el
     upstream isquad pierde la sesión — estos fallos son transitorios y suelen
-    resolverse en pocos segundos.
+    resolverse en pocos segundos. Las respuestas de grupo ya descargadas en
+    el run salen de `MEMO` sin petición.
 
     Args:
         path: ruta relativa al endpoint (p.ej. "filtros/jornadas_fetch.php").
               Si empieza por "http" se trata como URL absoluta.
         params: parámetros de query string.
         max_retries: número total de intentos.
+        prioridad: clase de trabajo frente al presupuesto del run
+            (resiliencia.CRITICA / ALTA / COSMETICA).
 
     Raises:
+        CircuitoAbierto: si el circuit breaker de la familia del endpoint
+            está abierto (o se abre durante los reintentos).
+        PresupuestoAgotado: si el presupuesto no admite la petición o el
+            backoff de un reintento.
         FFCVAPIError: si la API devuelve un error permanente, o tras agotar
             los reintentos en errores transitorios.
         requests.RequestException: errores de red persistentes.
     """
     url = path if path.startswith("http") else f"{FFCV_API_BASE}/{path.lstrip('/')}"
+    clave = cassette.clave_peticion(url, params)
+    memorizada = MEMO.obtener(clave)
+    if memorizada is not None:
+        return json.loads(memorizada)
     session = _get_session()
 
+    circuito = CIRCUITOS.para(path)
+
     last_motivo: Optional[str] = None
     last_exc: Optional[Exception] = None
 
     for attempt in range(1, max_retries + 1):
+        if not circuito.permitir():
+            raise CircuitoAbierto(f"Circuito '{circuito.nombre}' abierto: {url}")
+        if not PRESUPUESTO.admitir(prioridad):
+            circuito.neutro()
+            raise PresupuestoAgotado(
+                f"Presupuesto del run agotado para prioridad {prioridad}: {url}"
+            )
         try:
             logger.debug(f"GET {url} params={params} (intento {attempt}/{max_retries})")
-            response = session.get(url, params=params, timeout=30)
+            response = _get_condicional(session, path, url, params)
             response.raise_for_status()
             data = response.json()
 
             # Errores permanentes del backend: nombre raro, parámetro inválido, etc.
             # Distinguir de errores transitorios (manejados aparte abajo).
             if isinstance(data, dict) and data.get("error") and data.get("estado") != "0":
+                circuito.exito()  # el upstream responde, aunque sea con un error
                 raise FFCVAPIError(f"API FFCV {url}: {data}")
 
             motivo = _es_respuesta_transitoria(data)
             if motivo:
+                circuito.fallo()
                 last_motivo = motivo
                 backoff = min(2 ** attempt, 20)  # 2, 4, 8, 16, 20s
                 logger.warning(
@@ -210,8 +421,13 @@ def fetch_json(path: str, params: Optional[Dict] = None, max_retries: int = 5) -
                     f"reintento {attempt}/{max_retries} en {backoff}s"
                 )
                 if attempt < max_retries:
-                    time.sleep(backoff)
+                    TELEMETRIA.registrar_reintento(path, "transitoria")
+                    _esperar_backoff(backoff, "backoff_transitoria", prioridad, url, circuito)
                     continue
+            else:
+                circuito.exito()
+                CACHE_HTTP.anotar(clave, response)
+                MEMO.guardar(path, clave, response.text)
 
             return data
 
@@ -221,20 +437,28 @@ def fetch_json(path: str, params: Optional[Dict] = None, max_retries: int = 5) -
             last_exc = e
             status = getattr(e.response, "status_code", None)
             # 429 = rate limit: backoff agresivo (30s+).
+            if status is not None and status >= 500:
+                circuito.fallo()
+            else:
+                circuito.neutro()
             if status == 429:
                 espera = min(30 * attempt, 120)
                 logger.warning(f"429 Too Many Requests; durmiendo {espera}s antes de reintentar")
                 if attempt < max_retries:
-                    time.sleep(espera)
+                    TELEMETRIA.registrar_reintento(path, "429")
+                    _esperar_backoff(espera, "backoff_429", prioridad, url, circuito)
                     continue
             logger.warning(f"Error HTTP {status} en intento {attempt}: {e}")
             if attempt < max_retries:
-                time.sleep(5)
+                TELEMETRIA.registrar_reintento(path, "http")
+                _esperar_backoff(5, "backoff_error", prioridad, url, circuito)
         except (requests.RequestException, ValueError) as e:
+            circuito.fallo()
             last_exc = e
             logger.warning(f"Error en intento {attempt}: {e}")
             if attempt < max_retries:
-                time.sleep(5)
+                TELEMETRIA.registrar_reintento(path, "red")
+                _esperar_backoff(5, "backoff_error", prioridad, url, circuito)
 
     if last_motivo:
         raise FFCVAPIError(
@@ -496,7 +720,7 @@ def _resolver_grupos_de_categoria(
                     )
 
             # Pequeño respiro para no agitar al rate limiter
-            time.sleep(0.1)
+            _dormir(0.1, "cortesia")
 
     return resueltos
 
@@ -539,8 +763,15 @@ def cargar_o_descubrir_club_map(
     if str(cache.get("cod_temporada") or "") != str(cod_temporada):
         cache = {"equipos": []}
 
-    # Estado actual del club según la API
-    equipos_actuales = descubrir_equipos_del_club(clave_acceso, cod_temporada)
+    # Estado actual del club según la API. Con la API caída (circuito abierto)
+    # y un club_map válido de esta temporada, seguimos con el de caché.
+    try:
+        equipos_actuales = descubrir_equipos_del_club(clave_acceso, cod_temporada)
+    except _TRABAJO_APLAZABLE as e:
+        if not cache.get("equipos"):
+            raise
+        logger.warning(f"⏳ {e}; se reutiliza club_map.json de caché")
+        return cache
     actuales_codequipos = {str(e["codequipo"]) for e in equipos_actuales}
 
     # Eliminar de la caché los equipos que ya no están en competición
@@ -664,8 +895,11 @@ def _resolver_codcampo(codacta: str) -> Optional[str]:
     """Llama a ficha_partido_ajax.php y devuelve `codigo_campo` o None."""
     try:
         ficha = fetch_json(
-            "partidos/ficha_partido_ajax.php", {"cod_partido": codacta}
+            "partidos/ficha_partido_ajax.php", {"cod_partido": codacta},
+            prioridad=resiliencia.COSMETICA,
         )
+    except _TRABAJO_APLAZABLE:
+        raise
     except FFCVAPIError as e:
         logger.warning(f"ficha_partido_ajax codacta={codacta}: {e}")
         return None
@@ -677,8 +911,11 @@ def _coords_de_campo_ffcv(cod_campo: str) -> Optional[Dict]:
     """Llama a datos_campo.php y devuelve {lat, lon, direccion, localidad}."""
     try:
         data = fetch_json(
-            "instalaciones/datos_campo.php", {"codcampo": cod_campo}
+            "instalaciones/datos_campo.php", {"codcampo": cod_campo},
+            prioridad=resiliencia.COSMETICA,
         )
+    except _TRABAJO_APLAZABLE:
+        raise
     except FFCVAPIError as e:
         logger.warning(f"datos_campo codcampo={cod_campo}: {e}")
         return None
@@ -726,12 +963,19 @@ def resolver_coordenadas_campos(
             cache[nombre] = {"lat": None, "lon": None, "motivo": "sin_codacta"}
             logger.warning(f"  ⚠ [{idx}/{len(pendientes)}] {nombre} → sin codacta del partido")
             continue
-        cod_campo = _resolver_codcampo(str(codacta))
+        try:
+            cod_campo = _resolver_codcampo(str(codacta))
+            coords = _coords_de_campo_ffcv(cod_campo) if cod_campo else None
+        except _TRABAJO_APLAZABLE as e:
+            # Sin cachear: el siguiente run los volverá a ver como pendientes.
+            restantes = len(pendientes) - idx + 1
+            PRESUPUESTO.aplazar("campos")
+            logger.warning(f"⏳ {e}; aplazados {restantes} campo(s) al siguiente run")
+            break
         if not cod_campo:
             cache[nombre] = {"lat": None, "lon": None, "motivo": "sin_codcampo"}
             logger.warning(f"  ⚠ [{idx}/{len(pendientes)}] {nombre} → sin codcampo")
             continue
-        coords = _coords_de_campo_ffcv(cod_campo)
         if not coords:
             cache[nombre] = {"lat": None, "lon": None, "motivo": "sin_coords", "codigo_campo_ffcv": cod_campo}
             logger.warning(f"  ⚠ [{idx}/{len(pendientes)}] {nombre} → sin coords en datos_campo")
@@ -763,57 +1007,11 @@ def parse_spanish_date(date_str: str) -> Optional[datetime]:
     """
     Parsea fechas en formato español a datetime
     Ejemplos: "14-11-2025", "09/11/2025", "Sábado, 09 De Noviembre"
-    """
-    try:
-        # Limpiar la cadena
-        date_str = date_str.strip()
-
-        # Intentar formato "14-11-2025" o "14-11-25"
-        match = re.search(r'(\d{1,2})-(\d{1,2})-(\d{2,4})', date_str)
-        if match:
-            dia = match.group(1).zfill(2)
-            mes = match.group(2).zfill(2)
-            year = match.group(3)
-            # Si el año es de 2 dígitos, añadir "20"
-            if len(year) == 2:
-                year = "20" + year
-            fecha_str = f"{year}-{mes}-{dia}"
-            return datetime.strptime(fecha_str, "%Y-%m-%d")
-
-        # Diccionario de meses en español
-        meses = {
-            'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
-            'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
-            'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'
-        }
 
-        # Intentar parsear formato largo "Sábado, 09 De Noviembre"
-        match = re.search(r'(\d{1,2})\s+[Dd]e\s+(\w+)', date_str, re.IGNORECASE)
-        if match:
-            dia = match.group(1).zfill(2)
-            mes_nombre = match.group(2).lower()
-            mes = meses.get(mes_nombre)
-            if mes:
-                # Asumir año 2025 para la temporada actual
-                year = 2025
-                fecha_str = f"{year}-{mes}-{dia}"
-                return datetime.strptime(fecha_str, "%Y-%m-%d")
-
-        # Intentar formato corto "09/11/2025" o "09/11"
-        match = re.search(r'(\d{1,2})/(\d{1,2})(?:/(\d{4}))?', date_str)
-        if match:
-            dia = match.group(1).zfill(2)
-            mes = match.group(2).zfill(2)
-            year = match.group(3) if match.group(3) else "2025"
-            fecha_str = f"{year}-{mes}-{dia}"
-            return datetime.strptime(fecha_str, "%Y-%m-%d")
-
-        logger.warning(f"No se pudo parsear la fecha: {date_str}")
-        return None
-
-    except Exception as e:
-        logger.error(f"Error parseando fecha '{date_str}': {str(e)}")
-        return None
+    Delegado en `parseo.parse_fecha` (patrones precompilados, memoizado y con
+    el año inferido de la temporada configurada).
+    """
+    return parseo.parse_fecha(date_str)
 
 
 def _maps_url(campo: str) -> Optional[str]:
@@ -826,24 +1024,52 @@ def _maps_url(campo: str) -> Optional[str]:
 
 def _normalizar_resultado(resultado_raw: Optional[str]) -> Optional[str]:
     """Normaliza '1 - 3' o '1-3' a '1-3'. Devuelve None si no hay marcador."""
-    if not resultado_raw:
-        return None
-    match = re.match(r"^\s*(\d+)\s*-\s*(\d+)\s*$", resultado_raw)
-    if not match:
-        return None
-    return f"{match.group(1)}-{match.group(2)}"
+    return parseo.normalizar_resultado(resultado_raw)
+
+
+def _filas_jornada(jornada_data: Dict, cod_temporada: str, cod_grupo: str, codjornada) -> List[Dict]:
+    """
+    Partidos de una respuesta de resultados_por_grupo_jornada_data como filas
+    del almacén. Los que aún no tienen acta van con `almacen.clave_sin_acta`.
+    """
+    filas = []
+    for raw in jornada_data.get("partidos") or []:
+        fecha_dt = parse_spanish_date(raw.get("fecha") or "")
+        cod_local = str(raw.get("cod_equipo_local") or "")
+        cod_visitante = str(raw.get("cod_equipo_visitante") or "")
+        filas.append({
+            "codacta": str(raw.get("codacta") or "")
+                or almacen.clave_sin_acta(cod_grupo, codjornada, cod_local, cod_visitante),
+            "cod_temporada": cod_temporada,
+            "cod_grupo": str(cod_grupo),
+            "jornada": _try_int(codjornada),
+            "fecha": fecha_dt.strftime("%Y-%m-%d") if fecha_dt else None,
+            "hora": raw.get("hora") or None,
+            "cod_local": cod_local,
+            "cod_visitante": cod_visitante,
+            "local": raw.get("local"),
+            "visitante": raw.get("visitante"),
+            "campo": (raw.get("campo") or "").strip(),
+            "resultado": _normalizar_resultado(raw.get("resultado")),
+        })
+    return filas
 
 
-def obtener_partidos_via_api(cod_grupo: str, cod_equipo: str) -> List[Dict]:
+def obtener_partidos_via_api(cod_grupo: str, cod_equipo: str) -> List[Partido]:
     """
     Devuelve todos los partidos del equipo en su grupo iterando jornadas.
 
-    Cada partido conserva el shape histórico usado por los templates y el
-    generador .ics:
+    Cada `Partido` serializa (`a_json`) al shape histórico usado por los
+    templates y el JSON:
         {jornada, id_partido, fecha (YYYY-MM-DD), hora (HH:MM), local,
          visitante, campo, resultado (str "G-G" o None), es_local, victoria,
          maps_url}
+
+    Los del equipo salen de las respuestas de este run. Todos los de cada
+    jornada (también los de los rivales) se guardan además en ALMACEN, que
+    sustituye la jornada entera (`guardar_jornada`).
     """
+    cod_temporada = str(CONFIG["ids_ffcv"]["temporada"])
     logger.info(f"Obteniendo jornadas del grupo {cod_grupo}...")
     jornadas_data = fetch_json("filtros/jornadas_fetch.php", {"cod_grupo": cod_grupo})
     jornadas = jornadas_data.get("jornadas") or []
@@ -855,7 +1081,7 @@ def obtener_partidos_via_api(cod_grupo: str, cod_equipo: str) -> List[Dict]:
 
     logger.info(f"✓ {len(jornadas)} jornadas. Recorriendo partidos del equipo {cod_equipo}...")
 
-    partidos: List[Dict] = []
+    partidos: List[Partido] = []
     for jornada_meta in jornadas:
         codjornada = jornada_meta.get("codjornada")
         if not codjornada:
@@ -865,64 +1091,26 @@ def obtener_partidos_via_api(cod_grupo: str, cod_equipo: str) -> List[Dict]:
             "partidos/resultados_por_grupo_jornada_data.php",
             {"cod_grupo": cod_grupo, "cod_jornada": codjornada},
         )
-
-        for raw in jornada_data.get("partidos") or []:
-            cod_local = str(raw.get("cod_equipo_local") or "")
-            cod_visit = str(raw.get("cod_equipo_visitante") or "")
-            if cod_equipo not in (cod_local, cod_visit):
-                continue
-
-            fecha = None
-            fecha_dt = parse_spanish_date(raw.get("fecha") or "")
-            if fecha_dt:
-                fecha = fecha_dt.strftime("%Y-%m-%d")
-
-            campo = (raw.get("campo") or "").strip()
-            resultado = _normalizar_resultado(raw.get("resultado"))
-            es_local = cod_local == cod_equipo
-
-            victoria: Optional[bool] = None
-            if resultado:
-                gl, gv = (int(x) for x in resultado.split("-"))
-                goles_favor = gl if es_local else gv
-                goles_contra = gv if es_local else gl
-                if goles_favor > goles_contra:
-                    victoria = True
-                elif goles_favor < goles_contra:
-                    victoria = False
-                # empate → victoria = None
-
-            try:
-                jornada_num: Optional[int] = int(codjornada)
-            except (TypeError, ValueError):
-                jornada_num = None
-
-            partidos.append({
-                "jornada": jornada_num,
-                "id_partido": raw.get("codacta"),
-                "fecha": fecha,
-                "hora": raw.get("hora") or None,
-                "local": raw.get("local"),
-                "visitante": raw.get("visitante"),
-                "campo": campo,
-                "resultado": resultado,
-                "es_local": es_local,
-                "victoria": victoria,
-                "maps_url": _maps_url(campo),
-            })
+        filas = _filas_jornada(jornada_data, cod_temporada, cod_grupo, codjornada)
+        ALMACEN.guardar_jornada(cod_grupo, _try_int(codjornada), filas)
+        partidos.extend(
+            almacen.partido_de_fila(f, cod_equipo, _maps_url)
+            for f in filas
+            if cod_equipo in (f["cod_local"], f["cod_visitante"])
+        )
 
         # Pequeño respeto al servidor; jornadas son ~18, total <2s.
-        time.sleep(0.1)
+        _dormir(0.1, "cortesia")
 
     # Ordenar por jornada para que el resto del pipeline reciba los partidos
     # en el mismo orden que el HTML antiguo (de menor a mayor jornada).
-    partidos.sort(key=lambda p: (p.get("jornada") or 0, p.get("fecha") or ""))
+    partidos.sort(key=lambda p: (p.jornada or 0, p.fecha or ""))
 
     logger.info(f"✓ Extraídos {len(partidos)} partidos del equipo {cod_equipo}")
     return partidos
 
 
-def obtener_clasificacion_via_api(cod_grupo: str, cod_jornada: str) -> List[Dict]:
+def obtener_clasificacion_via_api(cod_grupo: str, cod_jornada: str) -> List[FilaClasificacion]:
     """
     Devuelve la tabla de clasificación del grupo en la jornada indicada.
 
@@ -937,10 +1125,17 @@ def obtener_clasificacion_via_api(cod_grupo: str, cod_jornada: str) -> List[Dict
     data = fetch_json(
         "clasificaciones/clasificaciones_ajax.php",
         {"cod_grupo": cod_grupo, "cod_jornada": cod_jornada},
+        prioridad=resiliencia.ALTA,
     )
+    clasificacion = _filas_clasificacion(data)
+    logger.info(f"✓ {len(clasificacion)} equipos en la clasificación")
+    return clasificacion
+
 
+def _filas_clasificacion(data: Dict) -> List[FilaClasificacion]:
+    """Filas de una respuesta de clasificaciones_ajax.php."""
     raw = data.get("clasificacion") or []
-    clasificacion: List[Dict] = []
+    clasificacion: List[FilaClasificacion] = []
     for item in raw:
         try:
             posicion = int(item.get("posicion") or 0)
@@ -953,23 +1148,21 @@ def obtener_clasificacion_via_api(cod_grupo: str, cod_jornada: str) -> List[Dict
             logger.warning(f"Fila de clasificación con datos no numéricos: {item} ({e})")
             continue
 
-        nombre = item.get("nombre") or ""
-        clasificacion.append({
-            "posicion": posicion,
-            "equipo": nombre,
-            "puntos": puntos,
-            "pj": pj,
-            "pg": pg,
-            "pe": pe,
-            "pp": pp,
+        clasificacion.append(FilaClasificacion(
+            posicion=posicion,
+            equipo=item.get("nombre") or "",
+            puntos=puntos,
+            pj=pj,
+            pg=pg,
+            pe=pe,
+            pp=pp,
             # Extras útiles para futuras vistas; ignorados por templates actuales.
-            "codequipo": item.get("codequipo"),
-            "gf": _try_int(item.get("goles_a_favor")),
-            "gc": _try_int(item.get("goles_en_contra")),
-            "racha": [r.get("tipo") for r in (item.get("racha_partidos") or [])],
-        })
-
-    logger.info(f"✓ {len(clasificacion)} equipos en la clasificación")
+            codequipo=item.get("codequipo"),
+            gf=_try_int(item.get("goles_a_favor")),
+            gc=_try_int(item.get("goles_en_contra")),
+            racha=[r.get("tipo") for r in (item.get("racha_partidos") or [])],
+            escudo=item.get("escudo") or None,
+        ))
     return clasificacion
 
 
@@ -981,7 +1174,7 @@ def _try_int(value) -> Optional[int]:
         return None
 
 
-def obtener_plantilla_via_api(cod_equipo: str) -> List[Dict]:
+def obtener_plantilla_via_api(cod_equipo: str) -> List[Jugador]:
     """
     Devuelve la plantilla del equipo desde la API.
 
@@ -991,12 +1184,14 @@ def obtener_plantilla_via_api(cod_equipo: str) -> List[Dict]:
     antiguo y queda fuera del alcance de la migración inicial.
     """
     logger.info(f"Obteniendo plantilla del equipo {cod_equipo}...")
-    data = fetch_json("equipos/ver_equipo.php", {"codequipo": cod_equipo})
+    data = fetch_json(
+        "equipos/ver_equipo.php", {"codequipo": cod_equipo}, prioridad=resiliencia.ALTA
+    )
 
     PLANTILLA_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
     images_relative_path = f"../{CONFIG['sitio']['images_dir']}"
 
-    plantilla: List[Dict] = []
+    plantilla: List[Jugador] = []
     for j in data.get("jugadores_equipo") or []:
         jugador_id = str(j.get("cod_jugador") or "").strip()
         nombre = (j.get("nombre") or "").strip()
@@ -1006,11 +1201,11 @@ def obtener_plantilla_via_api(cod_equipo: str) -> List[Dict]:
         foto_filename = f"jugador_{jugador_id}.png"
         foto_existe = (PLANTILLA_IMAGES_DIR / foto_filename).exists()
 
-        plantilla.append({
-            "id": jugador_id,
-            "nombre": nombre,
-            "foto": f"{images_relative_path}/{foto_filename}" if foto_existe else None,
-        })
+        plantilla.append(Jugador(
+            id=jugador_id,
+            nombre=nombre,
+            foto=f"{images_relative_path}/{foto_filename}" if foto_existe else None,
+        ))
 
     logger.info(f"✓ {len(plantilla)} jugadores en la plantilla")
     return plantilla
@@ -1048,7 +1243,48 @@ def _guardar_foto_jugador(codjugador: str, data_uri: str) -> bool:
     return True
 
 
-def obtener_dorsales_via_api(partidos: List[Dict]) -> Dict[str, str]:
+# Claves con las que el acta puede traer cada dato por jugador. No todas las
+# actas las traen (depende de la competición y de si el árbitro la cerró).
+_CLAVES_ACTA = {
+    "titular": ("titular", "es_titular"),
+    "goles": ("goles", "num_goles"),
+    "amarillas": ("amarillas", "tarjetas_amarillas"),
+    "rojas": ("rojas", "tarjetas_rojas"),
+    "minutos": ("minutos", "minutos_jugados"),
+}
+
+
+def _dato_acta(jugador: Dict, campo: str) -> Optional[int]:
+    for clave in _CLAVES_ACTA[campo]:
+        valor = jugador.get(clave)
+        if valor is None or valor == "":
+            continue
+        if campo == "titular" and isinstance(valor, str):
+            return int(valor.strip().upper() in ("1", "S", "SI", "SÍ", "TRUE"))
+        return _try_int(valor)
+    return None
+
+
+def _alineaciones_de_acta(acta: Dict) -> List[Dict]:
+    """Jugadores de ambos equipos de un acta, con lo que traiga de cada uno."""
+    alineaciones = []
+    for lado in ("local", "visitante"):
+        codequipo = str(acta.get(f"codigo_equipo_{lado}") or "")
+        for jugador in acta.get(f"jugadores_equipo_{lado}") or []:
+            codjugador = str(jugador.get("codjugador") or "").strip()
+            if not codjugador or not codequipo:
+                continue
+            alineaciones.append({
+                "codequipo": codequipo,
+                "codjugador": codjugador,
+                "nombre": (jugador.get("nombre_jugador") or "").strip(),
+                "dorsal": str(jugador.get("dorsal") or "").strip() or None,
+                **{campo: _dato_acta(jugador, campo) for campo in _CLAVES_ACTA},
+            })
+    return alineaciones
+
+
+def obtener_dorsales_via_api(partidos: List[Partido]) -> Dict[str, str]:
     """
     Obtiene los dorsales y cosecha las fotos de los jugadores del equipo a
     partir de las actas de los últimos partidos jugados consultando
@@ -1064,6 +1300,10 @@ def obtener_dorsales_via_api(partidos: List[Dict]) -> Dict[str, str]:
         Guarda las fotos base64 que vengan en cada acta en
         `PLANTILLA_IMAGES_DIR / jugador_<codjugador>.png` (skip si existe).
         Sin remove.bg, sin upscale: foto cruda tal como la entrega la FFCV.
+        Guarda las alineaciones en ALMACEN, de donde salen las estadísticas
+        de los jugadores. Con un histórico persistente pide además las actas
+        anteriores que aún no se hayan descargado (la primera vez, la
+        temporada entera; después, sólo huecos).
     """
     logger.info("Obteniendo dorsales y cosechando fotos (API)...")
 
@@ -1072,19 +1312,28 @@ def obtener_dorsales_via_api(partidos: List[Dict]) -> Dict[str, str]:
     procesados = 0
     max_partidos = 3  # últimos 3 partidos jugados, suficiente para cubrir la plantilla activa
 
-    partidos_con_resultado = [p for p in partidos if p.get("resultado") and p.get("id_partido")]
-    partidos_a_procesar = partidos_con_resultado[-max_partidos:]
+    partidos_con_resultado = [p for p in partidos if p.resultado and p.id_partido]
+    ultimos = partidos_con_resultado[-max_partidos:]
+    atrasados: List[Partido] = []
+    if ALMACEN.persistente:
+        anteriores = partidos_con_resultado[:-max_partidos]
+        sin_sumar = set(ALMACEN.actas_sin_sumar(p.id_partido for p in anteriores))
+        atrasados = [p for p in anteriores if p.id_partido in sin_sumar]
+    cod_temporada = str(CONFIG["ids_ffcv"]["temporada"])
 
-    for partido in partidos_a_procesar:
-        cod_partido = partido.get("id_partido")
-        if not cod_partido:
-            continue
+    # Primero los últimos: si el presupuesto corta, los dorsales ya están.
+    for idx, partido in enumerate(ultimos + atrasados):
+        cod_partido = partido.id_partido
 
         try:
             logger.info(
-                f"  Partido {partido.get('local')} vs {partido.get('visitante')} (codacta={cod_partido})"
+                f"  Partido {partido.local} vs {partido.visitante} (codacta={cod_partido})"
+            )
+            data = fetch_json(
+                "partidos/ficha_partido_ajax.php", {"cod_partido": cod_partido},
+                prioridad=resiliencia.COSMETICA,
             )
-            data = fetch_json("partidos/ficha_partido_ajax.php", {"cod_partido": cod_partido})
+            ALMACEN.guardar_acta(cod_partido, cod_temporada, _alineaciones_de_acta(data))
 
             # Sólo nos interesa el equipo cuyo cod coincide con el nuestro.
             for clave in ("jugadores_equipo_local", "jugadores_equipo_visitante"):
@@ -1098,7 +1347,8 @@ def obtener_dorsales_via_api(partidos: List[Dict]) -> Dict[str, str]:
                 for jugador in data.get(clave) or []:
                     nombre = (jugador.get("nombre_jugador") or "").strip()
                     dorsal = str(jugador.get("dorsal") or "").strip()
-                    if nombre and dorsal:
+                    # Dorsales sólo de los últimos partidos: los antiguos pueden estar desfasados.
+                    if nombre and dorsal and idx < len(ultimos):
                         dorsales_acumulados[nombre] = dorsal
 
                     codj = str(jugador.get("codjugador") or "").strip()
@@ -1106,8 +1356,13 @@ def obtener_dorsales_via_api(partidos: List[Dict]) -> Dict[str, str]:
                         fotos_guardadas += 1
 
             procesados += 1
-            time.sleep(0.5)
+            _dormir(0.5, "cortesia")
 
+        except _TRABAJO_APLAZABLE as e:
+            # Las fotos ya guardadas no se vuelven a pedir; el resto, otro día.
+            PRESUPUESTO.aplazar("actas")
+            logger.warning(f"⏳ {e}; actas aplazadas al siguiente run")
+            break
         except Exception as e:
             logger.warning(f"Error procesando acta codacta={cod_partido}: {e}")
             continue
@@ -1119,7 +1374,7 @@ def obtener_dorsales_via_api(partidos: List[Dict]) -> Dict[str, str]:
     return dorsales_acumulados
 
 
-def mapear_dorsales_a_plantilla(plantilla: List[Dict], dorsales: Dict[str, str]) -> List[Dict]:
+def mapear_dorsales_a_plantilla(plantilla: List[Jugador], dorsales: Dict[str, str]) -> List[Jugador]:
     """
     Mapea los dorsales extraídos de partidos a los jugadores de la plantilla
 
@@ -1135,7 +1390,7 @@ def mapear_dorsales_a_plantilla(plantilla: List[Dict], dorsales: Dict[str, str])
     dorsales_mapeados = 0
 
     for jugador in plantilla:
-        nombre_plantilla = jugador['nombre'].upper()
+        nombre_plantilla = jugador.nombre_mayus
 
         # Buscar coincidencia en dorsales
         # Los nombres en partidos vienen como "APELLIDO, NOMBRE"
@@ -1147,7 +1402,7 @@ def mapear_dorsales_a_plantilla(plantilla: List[Dict], dorsales: Dict[str, str])
             # Intentar diferentes estrategias de matching
             # 1. Coincidencia exacta
             if nombre_plantilla == nombre_partido_upper:
-                jugador['dorsal'] = dorsal
+                jugador.dorsal = dorsal
                 dorsales_mapeados += 1
                 logger.debug(f"Dorsal mapeado (exacto): {nombre_plantilla} -> {dorsal}")
                 break
@@ -1157,7 +1412,7 @@ def mapear_dorsales_a_plantilla(plantilla: List[Dict], dorsales: Dict[str, str])
             apellido_partido = nombre_partido_upper.split(',')[0].strip() if ',' in nombre_partido_upper else nombre_partido_upper.split()[0]
 
             if apellido_plantilla and apellido_partido and apellido_plantilla == apellido_partido:
-                jugador['dorsal'] = dorsal
+                jugador.dorsal = dorsal
                 dorsales_mapeados += 1
                 logger.debug(f"Dorsal mapeado (apellido): {nombre_plantilla} -> {dorsal}")
                 break
@@ -1166,7 +1421,7 @@ def mapear_dorsales_a_plantilla(plantilla: List[Dict], dorsales: Dict[str, str])
     return plantilla
 
 
-def generar_calendario_ics(partidos: List[Dict]) -> None:
+def generar_calendario_ics(partidos: List[Partido]) -> None:
     """
     Genera archivo .ics con todos los partidos
     """
@@ -1179,37 +1434,34 @@ def generar_calendario_ics(partidos: List[Dict]) -> None:
         event = Event()
 
         # Título del evento (limpio, sin caracteres problemáticos)
-        if partido.get('resultado'):
-            titulo = f"{partido['local']} {partido['resultado']} {partido['visitante']}"
+        if partido.resultado:
+            titulo = f"{partido.local} {partido.resultado} {partido.visitante}"
         else:
-            titulo = f"{partido['local']} vs {partido['visitante']}"
+            titulo = f"{partido.local} vs {partido.visitante}"
 
         # Limpiar título de caracteres problemáticos
         titulo = titulo.replace('\n', ' ').replace('\r', ' ')
         event.name = titulo
 
-        # Fecha y hora
-        if partido.get('fecha') and partido.get('hora'):
-            fecha_str = f"{partido['fecha']} {partido['hora']}"
-            try:
-                evento_dt = datetime.strptime(fecha_str, "%Y-%m-%d %H:%M")
-                event.begin = evento_dt
-                event.duration = {"hours": 1}  # Duración estimada de 1 hora
-            except ValueError:
-                logger.warning(f"No se pudo parsear fecha/hora: {fecha_str}")
+        # Fecha y hora (ya parseadas al construir el Partido)
+        if partido.fecha and partido.hora:
+            if not partido.tiene_hora:
+                logger.warning(f"No se pudo parsear fecha/hora: {partido.fecha} {partido.hora}")
                 continue
+            event.begin = partido.inicio
+            event.duration = {"hours": 1}  # Duración estimada de 1 hora
 
         # Descripción simplificada (sin URLs largas que puedan causar problemas)
-        campo = partido.get('campo', 'Por determinar')
+        campo = partido.campo
         descripcion = f"Campo: {campo}"
 
         # Añadir jornada si existe
-        if partido.get('jornada'):
-            descripcion = f"Jornada {partido['jornada']}\n{descripcion}"
+        if partido.jornada:
+            descripcion = f"Jornada {partido.jornada}\n{descripcion}"
 
         # URL de Maps como campo separado (más compatible)
-        if partido.get('maps_url'):
-            event.url = partido['maps_url']
+        if partido.maps_url:
+            event.url = partido.maps_url
 
         event.description = descripcion
 
@@ -1254,21 +1506,104 @@ def generar_json(data: Dict) -> None:
     logger.info(f"✓ JSON guardado en {OUTPUT_JSON}")
 
 
-def generar_html_desde_template(template_name: str, output_path: Path, context: Dict) -> None:
+_ENTORNO_JINJA: Optional[Environment] = None
+
+
+def _entorno_jinja() -> Environment:
+    """
+    Environment compartido: cada plantilla se compila una vez por proceso
+    (en `watch`, una vez por sesión) y se recompila sólo si cambia en disco.
+    """
+    global _ENTORNO_JINJA
+    if _ENTORNO_JINJA is None:
+        _ENTORNO_JINJA = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+    return _ENTORNO_JINJA
+
+
+# Claves del contexto del equipo que usa plantilla_template.html.
+_CONTEXTO_PLANTILLA = (
+    'equipo', 'grupo', 'logo', 'background', 'temporada', 'ultima_actualizacion', 'plantilla',
+)
+
+
+def publicar_recursos() -> Tuple[Dict[str, estilos.Hoja], recursos.Manifiesto]:
+    """
+    Copias con huella de `Images/` y de las hojas de `templates/estilos/` en
+    `BASE_DIR/assets/`. Devuelve las hojas por tipo de página y el manifiesto
+    con el que las plantillas resuelven `asset()`.
+    """
+    publicador = recursos.Recursos(BASE_DIR)
+    publicador.publicar_directorio("Images", recursos.EXTENSIONES_IMAGEN, excluir=escudos.servido_tal_cual)
+    hojas = estilos.publicar(TEMPLATES_DIR / "estilos", publicador, minificar=MINIFICAR_HTML)
+    publicador.guardar()
+    TAMANOS.anotar(
+        postproceso.Artefacto(str(h.ruta), h.bruto, len(datos), postproceso.tamano_gzip(datos))
+        for h in hojas.values()
+        for datos in [h.css.encode("utf-8")]
+    )
+    return hojas, publicador.manifiesto()
+
+
+def _cache_escudos() -> escudos.CacheEscudos:
+    """Caché de escudos de BASE_DIR (con --clubs cambia de un club a otro)."""
+    global _ESCUDOS
+    if _ESCUDOS is None or _ESCUDOS.raiz != BASE_DIR:
+        _ESCUDOS = escudos.CacheEscudos(BASE_DIR)
+    return _ESCUDOS
+
+
+# Respuestas que dicen que el escudo no existe (no se vuelve a pedir esta temporada).
+_ESCUDO_AUSENTE = (404, 410)
+
+
+def descargar_escudo(ruta: str) -> Optional[bytes]:
     """
-    Genera un archivo HTML desde un template Jinja2
+    Bytes del escudo `ruta` (relativa a FFCV_WEB_BASE o URL absoluta), o
+    None si el servidor dice que no existe (404/410). Cualquier otro error
+    HTTP se lanza: puede ser pasajero (408, 429) y el escudo se reintenta
+    en el siguiente run. Es trabajo cosmético frente al presupuesto del run.
     """
-    logger.info(f"Generando {output_path.name} desde template...")
+    url = ruta if "://" in ruta else f"{FFCV_WEB_BASE}/{ruta.lstrip('/')}"
+    if not PRESUPUESTO.admitir(resiliencia.COSMETICA):
+        raise PresupuestoAgotado(f"Presupuesto del run agotado para escudos: {url}")
+    response = _get_medido(_get_session(), "escudos", url, None)
+    if response.status_code in _ESCUDO_AUSENTE:
+        return None
+    response.raise_for_status()
+    return response.content
 
-    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
-    template = env.get_template(template_name)
 
-    html = template.render(**context)
+def actualizar_escudos() -> escudos.TablaEscudos:
+    """
+    Descarga los escudos anotados en este run que faltan en
+    `Images/escudos/` (ver `escudos.py`) y devuelve la tabla con la que las
+    plantillas los resuelven. Va antes de `publicar_recursos` para que los
+    nuevos salgan ya con huella.
+    """
+    cache = _cache_escudos()
+    with TELEMETRIA.fase("escudos"):
+        resumen = cache.actualizar(descargar_escudo, sprites=SPRITES_ESCUDOS)
+    if resumen["descargados"] or resumen["sprites"]:
+        logger.info(
+            f"🛡️  Escudos: {resumen['descargados']} descargado(s), "
+            f"{resumen['sprites']} sprite(s), {resumen['ficheros']} distintos en caché"
+        )
+    return cache.tabla(FFCV_WEB_BASE)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
 
-    logger.info(f"✓ HTML generado en {output_path}")
+def renderizar_paginas() -> None:
+    """
+    Etapa de renderizado: genera todas las páginas que `process_team` ha
+    encolado en RENDERIZADOR (en paralelo si son muchas).
+    """
+    tabla = actualizar_escudos()
+    with TELEMETRIA.fase("html"):
+        tanda = RENDERIZADOR.renderizar(*publicar_recursos(), tabla_escudos=tabla)
+    if tanda["paginas"]:
+        logger.info(
+            f"🖨️  {tanda['paginas']} páginas en {tanda['segundos']:.2f}s "
+            f"({tanda['paginas_por_segundo']} páginas/s, {tanda['workers']} proceso(s))"
+        )
 
 
 def generar_google_calendar_url(ics_url: str) -> str:
@@ -1278,27 +1613,21 @@ def generar_google_calendar_url(ics_url: str) -> str:
     return f"https://calendar.google.com/calendar/r?cid={quote(ics_url)}"
 
 
-def encontrar_proximo_partido(partidos: List[Dict]) -> Optional[Dict]:
+def encontrar_proximo_partido(partidos: List[Partido]) -> Optional[Partido]:
     """
     Encuentra el próximo partido pendiente (ordenado por fecha)
     """
     hoy = datetime.now().date()
 
     # Filtrar solo partidos futuros sin resultado
-    partidos_futuros = []
-    for partido in partidos:
-        if partido.get('fecha') and not partido.get('resultado'):
-            try:
-                fecha_partido = datetime.strptime(partido['fecha'], "%Y-%m-%d").date()
-                if fecha_partido >= hoy:
-                    partidos_futuros.append(partido)
-            except ValueError:
-                continue
+    partidos_futuros = [
+        p for p in partidos
+        if p.dia and not p.resultado and p.dia >= hoy
+    ]
 
     # Ordenar por fecha y hora
     if partidos_futuros:
-        partidos_futuros.sort(key=lambda x: (x.get('fecha', ''), x.get('hora', '')))
-        return partidos_futuros[0]
+        return min(partidos_futuros, key=lambda p: p.clave_orden)
 
     return None
 
@@ -1315,17 +1644,39 @@ def _hay_datos_previos(path: Path) -> bool:
     return bool(data.get("todos_partidos"))
 
 
+def _clasificacion_previa(path: Path) -> List[FilaClasificacion]:
+    """
+    Última clasificación guardada del grupo en ALMACEN o, si no hay, la del
+    último JSON escrito; vacía si no hay ninguna.
+    """
+    guardada = ALMACEN.clasificacion(COD_GRUPO)
+    if guardada:
+        return guardada
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            filas = json.load(f).get("clasificacion") or []
+        return [FilaClasificacion.desde_json(fila) for fila in filas]
+    except (json.JSONDecodeError, OSError, AttributeError, TypeError, ValueError):
+        return []
+
+
 def _cod_jornada_mas_reciente(cod_grupo: str) -> str:
     """
     Devuelve el `codjornada` con la `fecha_jornada` más reciente que no esté en
     el futuro. Si todas las jornadas son futuras (temporada no empezada) usa la
     primera; si todas son pasadas (temporada terminada) usa la última.
     """
-    data = fetch_json("filtros/jornadas_fetch.php", {"cod_grupo": cod_grupo})
+    data = fetch_json(
+        "filtros/jornadas_fetch.php", {"cod_grupo": cod_grupo}, prioridad=resiliencia.ALTA
+    )
     jornadas = data.get("jornadas") or []
     if not jornadas:
         raise FFCVAPIError(f"No hay jornadas para cod_grupo={cod_grupo}")
+    return _jornada_mas_reciente(jornadas)
 
+
+def _jornada_mas_reciente(jornadas: List[Dict]) -> str:
+    """`codjornada` más reciente no futura de una lista de jornadas_fetch.php."""
     hoy = datetime.now().date()
     seleccionada = None
     for j in jornadas:
@@ -1353,7 +1704,8 @@ def process_team(solo_json: bool = False):
     try:
         # 1. Calendario y partidos del equipo (itera jornadas del grupo).
         logger.info("\n[1/6] Obteniendo calendario vía API...")
-        partidos = obtener_partidos_via_api(COD_GRUPO, COD_EQUIPO)
+        with TELEMETRIA.fase("calendario"):
+            partidos = obtener_partidos_via_api(COD_GRUPO, COD_EQUIPO)
 
         # Circuit breaker: si la API devuelve cero partidos pero ya tenemos
         # datos previos válidos, abortar SIN sobrescribir. Esto evita repetir
@@ -1367,88 +1719,144 @@ def process_team(solo_json: bool = False):
             )
 
         # 2. Clasificación a fecha de la última jornada del grupo.
-        cod_jornada_actual = _cod_jornada_mas_reciente(COD_GRUPO)
-        logger.info(f"\n[2/6] Obteniendo clasificación (jornada {cod_jornada_actual})...")
-        clasificacion = obtener_clasificacion_via_api(COD_GRUPO, cod_jornada_actual)
+        # Si el presupuesto no llega, se reutiliza la del run anterior: los
+        # resultados (críticos) sí salen frescos.
+        with TELEMETRIA.fase("clasificacion"):
+            try:
+                cod_jornada_actual = _cod_jornada_mas_reciente(COD_GRUPO)
+                logger.info(f"\n[2/6] Obteniendo clasificación (jornada {cod_jornada_actual})...")
+                clasificacion = obtener_clasificacion_via_api(COD_GRUPO, cod_jornada_actual)
+                if _try_int(cod_jornada_actual) is not None:
+                    ALMACEN.guardar_clasificacion(COD_GRUPO, int(cod_jornada_actual), clasificacion)
+            except _TRABAJO_APLAZABLE as e:
+                PRESUPUESTO.aplazar("clasificacion")
+                clasificacion = _clasificacion_previa(OUTPUT_JSON)
+                logger.warning(
+                    f"⏳ {e}; se conserva la clasificación anterior ({len(clasificacion)} equipos)"
+                )
 
         # 3. Cosechar dorsales + fotos desde las actas de los últimos partidos.
         # Va antes de obtener_plantilla_via_api para que la plantilla recoja
         # las fotos recién guardadas en el mismo run.
         logger.info("\n[3/6] Cosechando dorsales y fotos desde actas...")
-        dorsales = obtener_dorsales_via_api(partidos)
+        with TELEMETRIA.fase("actas"):
+            dorsales = obtener_dorsales_via_api(partidos)
 
         # 4. Plantilla (nombres + fotos cacheadas en disco).
         logger.info("\n[3.5/6] Obteniendo plantilla vía API...")
-        plantilla = obtener_plantilla_via_api(COD_EQUIPO)
-        plantilla = mapear_dorsales_a_plantilla(plantilla, dorsales)
+        # Sin presupuesto: plantilla = None y la página de plantilla anterior
+        # se deja tal cual.
+        jugadores_nuevos: List[Jugador] = []
+        with TELEMETRIA.fase("plantilla"):
+            try:
+                plantilla = obtener_plantilla_via_api(COD_EQUIPO)
+                # Sin plantilla previa en el histórico todos serían "nuevos".
+                conocidos = ALMACEN.plantilla(COD_EQUIPO, CONFIG["ids_ffcv"]["temporada"])
+                if conocidos:
+                    jugadores_nuevos = [j for j in plantilla if j.id not in conocidos]
+                ALMACEN.guardar_plantilla(COD_EQUIPO, CONFIG["ids_ffcv"]["temporada"], plantilla)
+                plantilla = mapear_dorsales_a_plantilla(plantilla, dorsales)
+            except _TRABAJO_APLAZABLE as e:
+                PRESUPUESTO.aplazar("plantilla")
+                plantilla = None
+                logger.warning(f"⏳ {e}; plantilla aplazada al siguiente run")
+
+            # Totales por jugador de todas las actas sumadas hasta ahora.
+            estadisticas = ALMACEN.estadisticas_equipo(COD_EQUIPO, CONFIG["ids_ffcv"]["temporada"])
+            for jugador in plantilla or []:
+                jugador.estadisticas = estadisticas.get(jugador.id)
 
         # 5. Preparar datos derivados.
         logger.info("\n[4/6] Procesando datos...")
+        with TELEMETRIA.fase("derivados"):
+
+            # Encontrar próximo partido
+            proximo_partido = encontrar_proximo_partido(partidos)
+
+            # Partidos jugados = fecha ya pasó (independiente de si tiene resultado)
+            hoy = datetime.now().date()
+            partidos_jugados = [p for p in partidos if p.dia and p.dia < hoy]
+
+            # Últimos 5 resultados (solo mostrar los que tienen resultado para el dashboard)
+            partidos_con_resultado = [p for p in partidos_jugados if p.resultado]
+            ultimos_resultados = sorted(
+                partidos_con_resultado,
+                key=lambda p: p.fecha or '',
+                reverse=True
+            )[:5]
+
+            # Calcular racha visual (últimos 5 partidos), del más antiguo al más reciente
+            racha = [p.desenlace for p in reversed(ultimos_resultados)]
+
+            # Determinar posición del equipo y mensaje motivacional
+            posicion_equipo = None
+            total_equipos = len(clasificacion)
+            mensaje_motivacional = None
+
+            for equipo_data in clasificacion:
+                if str(equipo_data.codequipo) == COD_EQUIPO or TEAM_NAME in equipo_data.equipo:
+                    posicion_equipo = equipo_data.posicion
+                    break
+
+            # Si está en último lugar, añadir mensaje motivacional
+            if posicion_equipo and posicion_equipo == total_equipos:
+                mensaje_motivacional = "¡Cada partido es una oportunidad para mejorar! 💪 La temporada recién empieza."
+
+            # Escudos por nombre de equipo (como salen en partidos y
+            # clasificación); el propio, del club_map si la API no lo da.
+            escudos_equipos: Dict[str, str] = {}
+            cache_escudos = _cache_escudos()
+            for equipo_data in clasificacion:
+                escudo = equipo_data.escudo
+                if not escudo and str(equipo_data.codequipo) == COD_EQUIPO:
+                    escudo = CONFIG['equipo'].get('escudo')
+                if escudo:
+                    escudos_equipos[equipo_data.equipo] = escudo
+                    cache_escudos.anotar(escudo, CONFIG['ids_ffcv']['temporada'], COD_GRUPO)
+
+            # Frontera modelos → dicts: JSON y templates consumen el shape histórico.
+            proximo_json = proximo_partido.a_json() if proximo_partido else None
+            ultimos_json = [p.a_json() for p in ultimos_resultados]
+            clasificacion_json = [f.a_json() for f in clasificacion]
+            partidos_json = [p.a_json() for p in partidos]
+
+            # Forma del rival y enfrentamiento previo en cada partido pendiente,
+            # con los resultados del grupo que ya se han descargado.
+            grupo = rivales.ResultadosGrupo(ALMACEN.partidos_grupo(COD_GRUPO))
+            for partido, partido_json in zip(partidos, partidos_json):
+                if not partido.resultado and partido.id_partido:
+                    partido_json["rival"] = grupo.indices(COD_EQUIPO, partido.id_partido, partido.fecha)
+            if proximo_json and proximo_partido.id_partido:
+                proximo_json["rival"] = grupo.indices(
+                    COD_EQUIPO, proximo_partido.id_partido, proximo_partido.fecha
+                )
 
-        # Encontrar próximo partido
-        proximo_partido = encontrar_proximo_partido(partidos)
-
-        # Partidos jugados = fecha ya pasó (independiente de si tiene resultado)
-        hoy = datetime.now().date()
-        partidos_jugados = []
-        for p in partidos:
-            if p.get('fecha'):
-                try:
-                    fecha_partido = datetime.strptime(p['fecha'], '%Y-%m-%d').date()
-                    if fecha_partido < hoy:
-                        partidos_jugados.append(p)
-                except ValueError:
-                    pass
-
-        # Últimos 5 resultados (solo mostrar los que tienen resultado para el dashboard)
-        partidos_con_resultado = [p for p in partidos_jugados if p.get('resultado')]
-        ultimos_resultados = sorted(
-            partidos_con_resultado,
-            key=lambda x: x.get('fecha', ''),
-            reverse=True
-        )[:5]
-
-        # Calcular racha visual (últimos 5 partidos)
-        racha = []
-        for partido in ultimos_resultados:
-            if partido.get('victoria') is True:
-                racha.append('W')
-            elif partido.get('victoria') is False:
-                racha.append('L')
-            else:
-                racha.append('D')  # Empate
-        racha.reverse()  # Mostrar del más antiguo al más reciente
-
-        # Determinar posición del equipo y mensaje motivacional
-        posicion_equipo = None
-        total_equipos = len(clasificacion)
-        mensaje_motivacional = None
-
-        for equipo_data in clasificacion:
-            if TEAM_NAME in equipo_data.get('equipo', '') or 'Extramurs' in equipo_data.get('equipo', ''):
-                posicion_equipo = equipo_data.get('posicion')
-                break
-
-        # Si está en último lugar, añadir mensaje motivacional
-        if posicion_equipo and posicion_equipo == total_equipos:
-            mensaje_motivacional = "¡Cada partido es una oportunidad para mejorar! 💪 La temporada recién empieza."
-
-        # Estructura de datos completa
-        data = {
-            "equipo": TEAM_NAME,
-            "grupo": GRUPO,
-            "ultima_actualizacion": datetime.now().isoformat(),
-            "proximo_partido": proximo_partido,
-            "ultimos_resultados": ultimos_resultados,
-            "clasificacion": clasificacion,
-            "todos_partidos": partidos
-        }
+            # Estructura de datos completa
+            data = {
+                "equipo": TEAM_NAME,
+                "grupo": GRUPO,
+                "ultima_actualizacion": datetime.now().isoformat(),
+                "proximo_partido": proximo_json,
+                "ultimos_resultados": ultimos_json,
+                "clasificacion": clasificacion_json,
+                "todos_partidos": partidos_json,
+                "estadisticas_jugadores": [
+                    {"id": cod, **totales} for cod, totales in estadisticas.items()
+                ],
+            }
 
         # 6. Generar archivos.
         logger.info("\n[5/6] Generando archivos de salida...")
 
-        # JSON: siempre.
-        generar_json(data)
+        # JSON: siempre. Antes de pisarlo, lo que cambia respecto al anterior
+        # va al feed de cambios.
+        with TELEMETRIA.fase("json"):
+            anterior = _load_team_data(OUTPUT_JSON.stem)
+            generar_json(data)
+            eventos = cambios.diferencias(anterior, data, jugadores_nuevos)
+            if eventos:
+                cambios.publicar(DATA_DIR, OUTPUT_JSON.stem, eventos)
+                logger.info(f"🔔 {len(eventos)} cambio(s) publicados en {cambios.FEED}")
 
         if solo_json:
             # Modo discovery (Fase 2): los equipos sin UI propia se quedan aquí.
@@ -1458,7 +1866,8 @@ def process_team(solo_json: bool = False):
             return
 
         # Calendario ICS
-        generar_calendario_ics(partidos)
+        with TELEMETRIA.fase("ics"):
+            generar_calendario_ics(partidos)
 
         # URL del calendario desde configuración
         base_url = CONFIG['sitio']['url_base']
@@ -1469,44 +1878,47 @@ def process_team(solo_json: bool = False):
 
         # Calcular si el próximo partido es en menos de 24h
         partido_urgente = False
-        if proximo_partido and proximo_partido.get('fecha') and proximo_partido.get('hora'):
-            try:
-                fecha_hora_str = f"{proximo_partido['fecha']} {proximo_partido['hora']}"
-                fecha_hora_partido = datetime.strptime(fecha_hora_str, "%Y-%m-%d %H:%M")
-                tiempo_restante = fecha_hora_partido - datetime.now()
-                partido_urgente = tiempo_restante.total_seconds() < 86400  # 24 horas en segundos
-            except ValueError:
-                pass
+        if proximo_partido and proximo_partido.tiene_hora:
+            tiempo_restante = proximo_partido.inicio - datetime.now()
+            partido_urgente = tiempo_restante.total_seconds() < 86400  # 24 horas en segundos
 
         # Context para templates (con rutas relativas desde output_dir)
         context = {
             'equipo': TEAM_NAME,
+            'cod_equipo': COD_EQUIPO,
+            'cod_grupo': COD_GRUPO,
             'grupo': GRUPO,
             'logo': f"../{CONFIG['equipo']['logo']}" if CONFIG['equipo']['logo'] else '',
             'background': f"../{CONFIG['equipo']['background']}" if CONFIG['equipo'].get('background') else '',
             'temporada': CONFIG['sitio']['temporada'],
             'ultima_actualizacion': datetime.now().strftime("%d/%m/%Y - %H:%M"),
-            'proximo_partido': proximo_partido,
+            'proximo_partido': proximo_json,
             'partido_urgente': partido_urgente,
-            'ultimos_resultados': ultimos_resultados,
+            'ultimos_resultados': ultimos_json,
             'racha': racha,
-            'clasificacion': clasificacion,
+            'clasificacion': clasificacion_json,
             'posicion_equipo': posicion_equipo,
             'mensaje_motivacional': mensaje_motivacional,
             'total_partidos': len(partidos),
             'partidos_jugados': len(partidos_jugados),
-            'todos_partidos': partidos,  # Para el calendario interactivo
-            'plantilla': plantilla,
+            'todos_partidos': partidos_json,  # Para el calendario interactivo
+            'plantilla': [j.a_json() for j in plantilla or []],
+            'escudos_equipos': escudos_equipos,
             'ics_url': ics_url,
             'webcal_url': webcal_url,
             'google_calendar_url': google_calendar_url
         }
 
+        # Las páginas se renderizan todas juntas al final (`renderizar_paginas`).
         # Página principal (fusión de landing + dashboard)
-        generar_html_desde_template('dashboard_template.html', OUTPUT_INDEX, context)
+        RENDERIZADOR.encolar('dashboard_template.html', OUTPUT_INDEX, context)
 
-        # Página de plantilla
-        generar_html_desde_template('plantilla_template.html', OUTPUT_PLANTILLA, context)
+        # Página de plantilla: sólo lo que usa, sin partidos ni clasificación.
+        if plantilla is not None:
+            RENDERIZADOR.encolar(
+                'plantilla_template.html', OUTPUT_PLANTILLA,
+                {k: context[k] for k in _CONTEXTO_PLANTILLA},
+            )
 
         # 7. Resumen final.
         logger.info("\n[6/6] Proceso completado exitosamente!")
@@ -1514,7 +1926,7 @@ def process_team(solo_json: bool = False):
         logger.info(f"✓ Partidos scrapeados: {len(partidos)}")
         logger.info(f"✓ Partidos jugados: {len(partidos_jugados)}")
         logger.info(f"✓ Equipos en clasificación: {len(clasificacion)}")
-        logger.info(f"✓ Jugadores en plantilla: {len(plantilla)}")
+        logger.info(f"✓ Jugadores en plantilla: {len(plantilla) if plantilla is not None else 'aplazada'}")
         logger.info(f"✓ Archivos generados:")
         logger.info(f"  - {OUTPUT_JSON}")
         logger.info(f"  - {OUTPUT_ICS}")
@@ -1522,11 +1934,20 @@ def process_team(solo_json: bool = False):
         logger.info(f"  - {OUTPUT_PLANTILLA}")
         logger.info("=" * 60)
 
+    except _TRABAJO_APLAZABLE:
+        # No es un fallo del equipo: sin presupuesto o con la API caída se
+        # conservan los datos previos.
+        raise
     except Exception as e:
         logger.error(f"\n❌ Error crítico: {str(e)}", exc_info=True)
         raise
 
 
+def _logo_club(club_config: Dict) -> str:
+    """Ruta del logo del club relativa a su raíz de salida."""
+    return club_config["club"].get("logo") or "Images/extramurs.jpg"
+
+
 def build_config_descubrimiento(equipo: Dict, club_config: Dict) -> Dict:
     """
     Construye un config sintético compatible con setup_globals/process_team a
@@ -1562,10 +1983,12 @@ def build_config_descubrimiento(equipo: Dict, club_config: Dict) -> Dict:
             # queremos slug directamente (alevin-a.json, etc.).
             "nombre_corto": slug,
             "grupo": equipo.get("nombre_grupo") or "",
-            # Por defecto usa el logo del club; configs/<slug>.yaml puede
-            # sobreescribirlo cuando un equipo quiera escudo propio.
-            "logo": "Images/extramurs.jpg",
+            # Por defecto usa el logo del club (`club.logo` en su config);
+            # configs/<slug>.yaml puede sobreescribirlo cuando un equipo
+            # quiera escudo propio.
+            "logo": _logo_club(club_config),
             "background": background,
+            "escudo": equipo.get("escudo") or "",
         },
         "ids_ffcv": {
             "temporada": club_config["temporada"]["codigo"],
@@ -1581,37 +2004,110 @@ def build_config_descubrimiento(equipo: Dict, club_config: Dict) -> Dict:
     }
 
 
-def procesar_club(club_config: Dict) -> List[Dict]:
+# Espera máxima (s) antes de la segunda vuelta de equipos saltados por un
+# circuito abierto. Si el enfriamiento pendiente es mayor, no hay segunda vuelta.
+ESPERA_MAX_CIRCUITO = 120
+
+
+def _procesar_equipo_club(equipo: Dict, club_config: Dict) -> str:
+    """
+    Procesa un equipo del club_map. Devuelve 'ok', 'saltado' (error de API,
+    se conservan los datos previos), 'circuito_abierto' o 'error'.
+    """
+    slug = equipo["slug"]
+    etiqueta = f"{CLUB_ACTUAL}.{slug}" if CLUB_ACTUAL else slug
+    try:
+        with TELEMETRIA.equipo(etiqueta) as registro:
+            try:
+                cfg = build_config_descubrimiento(equipo, club_config)
+                setup_globals(cfg)
+                process_team()
+            except FFCVAPIError as e:
+                registro["estado"] = "saltado"
+                registro["error"] = str(e)
+                raise
+    except CircuitoAbierto as e:
+        logger.warning(f"Saltando {slug}: {e}")
+        return "circuito_abierto"
+    except FFCVAPIError as e:
+        logger.warning(f"Saltando {slug} por error de API: {e}")
+        return "saltado"
+    except Exception as e:
+        logger.error(f"Error procesando {slug}: {e}", exc_info=True)
+        return "error"
+    return "ok"
+
+
+def _club_map_en_cache(cod_temporada: str) -> Optional[Dict]:
+    """club_map.json de disco si es de esta temporada y tiene equipos."""
+    club_map = _load_team_data("club_map")
+    if not club_map or str(club_map.get("cod_temporada") or "") != str(cod_temporada):
+        return None
+    return club_map if club_map.get("equipos") else None
+
+
+def procesar_club(club_config: Dict, solo_pendientes: bool = False) -> List[Dict]:
     """
     Bucle Fase 2: descubre los equipos del club y genera `data/<slug>.json`
-    para cada uno. Devuelve la lista de equipos del club_map para que el
+    para cada uno. Devuelve la lista de equipos procesados para que el
     llamador pueda usar la info en pasos posteriores (Fase 3+).
-    """
-    club_map = cargar_o_descubrir_club_map(
-        clave_acceso=str(club_config["club"]["clave_acceso"]),
-        cod_temporada=str(club_config["temporada"]["codigo"]),
-        cache_path=DATA_DIR / "club_map.json",
-    )
 
-    equipos = club_map.get("equipos") or []
-    logger.info(f"\n🔭 Procesando {len(equipos)} equipos del club via discovery...\n")
+    Con `solo_pendientes` (modo `--due`) usa el club_map de caché sin
+    redescubrir y sólo procesa los equipos que el planificador marca como
+    pendientes según su calendario.
+    """
+    parseo.configurar_temporada(club_config["temporada"].get("nombre"))
+    cod_temporada = str(club_config["temporada"]["codigo"])
+    club_map = _club_map_en_cache(cod_temporada) if solo_pendientes else None
+    if club_map is None:
+        with TELEMETRIA.fase("descubrimiento"):
+            club_map = cargar_o_descubrir_club_map(
+                clave_acceso=str(club_config["club"]["clave_acceso"]),
+                cod_temporada=cod_temporada,
+                cache_path=DATA_DIR / "club_map.json",
+            )
+
+    ALMACEN.guardar_club_map(club_map)
 
+    equipos = club_map.get("equipos") or []
+    if solo_pendientes:
+        estados = planificador.planificar((e["slug"] for e in equipos), _load_team_data)
+        equipos = [e for e in equipos if estados[e["slug"]].pendiente]
+        for e in equipos:
+            logger.info(f"🗓️  {e['slug']}: {estados[e['slug']].motivo}")
+        logger.info(f"\n🗓️  {len(equipos)}/{len(estados)} equipo(s) pendientes de refresco\n")
+    else:
+        logger.info(f"\n🔭 Procesando {len(equipos)} equipos del club via discovery...\n")
+
+    # Equipos saltados con un circuito abierto: tendrán una segunda vuelta
+    # cuando toque sonda, en lugar de perder el run entero por un bache.
+    pendientes: List[Dict] = []
     for idx, equipo in enumerate(equipos, 1):
-        slug = equipo["slug"]
         logger.info("-" * 60)
         logger.info(
-            f"[{idx}/{len(equipos)}] {slug:25s} ({equipo.get('categoria')})"
+            f"[{idx}/{len(equipos)}] {equipo['slug']:25s} ({equipo.get('categoria')})"
         )
         logger.info("-" * 60)
-        try:
-            cfg = build_config_descubrimiento(equipo, club_config)
-            setup_globals(cfg)
-            process_team()
-        except FFCVAPIError as e:
-            logger.warning(f"Saltando {slug} por error de API: {e}")
-        except Exception as e:
-            logger.error(f"Error procesando {slug}: {e}", exc_info=True)
+        if _procesar_equipo_club(equipo, club_config) == "circuito_abierto":
+            pendientes.append(equipo)
+
+    if pendientes:
+        espera = CIRCUITOS.segundos_hasta_sonda()
+        if espera > ESPERA_MAX_CIRCUITO or not PRESUPUESTO.puede_esperar(espera, resiliencia.CRITICA):
+            logger.warning(
+                f"🔌 {len(pendientes)} equipo(s) sin procesar por circuito abierto; "
+                f"conservan los datos anteriores"
+            )
+        else:
+            logger.info(
+                f"\n🔌 Segunda vuelta para {len(pendientes)} equipo(s) tras {espera:.0f}s "
+                f"de enfriamiento del circuito..."
+            )
+            _dormir(espera, "espera_circuito")
+            for equipo in pendientes:
+                _procesar_equipo_club(equipo, club_config)
 
+    renderizar_paginas()
     return equipos
 
 
@@ -1640,17 +2136,7 @@ def _orden_default_equipos(equipos: List[Dict]) -> List[Dict]:
 
 
 def _parse_partido_dt(partido: Dict) -> Optional[datetime]:
-    fecha = partido.get("fecha")
-    hora = partido.get("hora") or "00:00"
-    if not fecha:
-        return None
-    try:
-        return datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M")
-    except ValueError:
-        try:
-            return datetime.strptime(fecha, "%Y-%m-%d")
-        except ValueError:
-            return None
+    return Partido.desde_json(partido).inicio
 
 
 def _load_team_data(slug: str) -> Optional[Dict]:
@@ -1706,7 +2192,7 @@ def construir_context_home(club_config: Dict, club_map: Dict) -> Dict:
         posicion = None
         total_equipos_grupo = len(clasif)
         for fila in clasif:
-            if "Extramurs" in (fila.get("equipo") or ""):
+            if str(fila.get("codequipo")) == str(equipo["codequipo"]):
                 posicion = fila.get("posicion")
                 break
 
@@ -1755,7 +2241,7 @@ def construir_context_home(club_config: Dict, club_map: Dict) -> Dict:
 
     # Resolver coordenadas de campos vía API FFCV (con caché en disco)
     coords_campos = resolver_coordenadas_campos(
-        todos_partidos_futuros, DATA_DIR / "campos.json"
+        todos_partidos_futuros, CAMPOS_JSON or DATA_DIR / "campos.json"
     )
 
     # Enriquecer próximos con coords; agrupar por campo para los marcadores
@@ -1786,6 +2272,7 @@ def construir_context_home(club_config: Dict, club_map: Dict) -> Dict:
 
     return {
         "club_nombre": club_config["club"]["nombre"],
+        "club_logo": _logo_club(club_config),
         "temporada": club_config["temporada"]["nombre"],
         "url_base": club_config["sitio"]["url_base"],
         "ultima_actualizacion": datetime.now().strftime("%d/%m/%Y - %H:%M"),
@@ -1801,13 +2288,28 @@ def generar_home(club_config: Dict, club_map: Dict) -> None:
     logger.info("\n🏠 Generando home global del club...")
     context = construir_context_home(club_config, club_map)
 
-    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
-    template = env.get_template("home_template.html")
-    html = template.render(**context)
-
+    cache_escudos = _cache_escudos()
+    for tarjeta in context["tarjetas"]:
+        cache_escudos.anotar(tarjeta["escudo"], club_config["temporada"]["codigo"])
+    tabla = actualizar_escudos()
+    hojas, manifiesto = publicar_recursos()
+    entorno = _entorno_jinja()
+    entorno.globals["asset"] = recursos.funcion_asset(manifiesto)
+    entorno.globals.update(escudos.funciones_jinja(manifiesto, tabla))
     out_path = BASE_DIR / "index.html"
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(html)
+    html = entorno.get_template("home_template.html").render(**context, _destino=str(out_path))
+    bruto = len(html.encode("utf-8"))
+    html = estilos.aplicar(html, out_path, hojas)
+    if MINIFICAR_HTML:
+        html = postproceso.minificar_html(html)
+    datos = html.encode("utf-8")
+
+    with open(out_path, "wb") as f:
+        f.write(datos)
+    TAMANOS.anotar([postproceso.Artefacto(
+        str(out_path), bruto, len(datos), postproceso.tamano_gzip(datos),
+        css=estilos.bytes_css_en_linea(html),
+    )])
 
     logger.info(
         f"✓ Home generado: {out_path} "
@@ -1818,30 +2320,796 @@ def generar_home(club_config: Dict, club_map: Dict) -> None:
     )
 
 
-def main():
+def _escribir_agenda(club_map: Dict, cargar) -> Dict:
+    """`data/schedule.json` con la agenda de refrescos de todos los equipos."""
+    agenda = planificador.escribir_agenda(
+        DATA_DIR / "schedule.json",
+        planificador.planificar((e["slug"] for e in club_map.get("equipos") or []), cargar),
+    )
+    logger.info(
+        f"🗓️  Próximo refresco: {agenda['proximo_refresco'] or '—'} "
+        f"({', '.join(agenda['equipos_proximo_refresco']) or 'ningún equipo'})"
+    )
+    return agenda
+
+
+def compactar_datos(directorio: Optional[Path] = None) -> None:
+    """
+    `data/min/*.json`: copia compacta (sin indentación) de cada JSON de
+    `data/`, la que se sirve al navegador. Los de `data/` siguen con
+    `indent=2` para que los diffs del repo se lean.
+    """
+    directorio = directorio or DATA_DIR
+    if not directorio.exists():
+        return
+    TAMANOS.anotar(postproceso.escribir_compactos(
+        directorio, directorio / "min"
+    ))
+    # Versiones anteriores publicaban las compactas con huella
+    # (`assets/data/min/`); ninguna página las pedía.
+    publicador = recursos.Recursos(directorio.parent)
+    if publicador.retirar(f"{directorio.name}/"):
+        publicador.guardar()
+
+
+def _url_campo(nombre: str, coords: Dict) -> Optional[str]:
+    if coords.get("lat") and coords.get("lon"):
+        return f"https://www.google.com/maps/search/?api=1&query={coords['lat']},{coords['lon']}"
+    return _maps_url(nombre)
+
+
+def generar_indice_busqueda(club_config: Dict, club_map: Dict) -> None:
+    """
+    `data/buscar/`: índice de búsqueda de la home (ver `buscador.py`) con
+    los equipos del club, los jugadores de sus plantillas (del histórico),
+    los rivales de la clasificación y los partidos, y los campos donde
+    juegan.
+    """
+    cod_temporada = str(club_config["temporada"]["codigo"])
+    coords_campos = _cargar_cache_campos(CAMPOS_JSON or DATA_DIR / "campos.json")
+    equipos: List[buscador.Documento] = []
+    jugadores: List[buscador.Documento] = []
+    rivales_vistos: Dict[Tuple[str, str], buscador.Documento] = {}
+    campos: Dict[str, List[str]] = {}
+
+    for equipo in club_map.get("equipos") or []:
+        slug = equipo["slug"]
+        etiqueta = " ".join(
+            p for p in (equipo.get("categoria"), (equipo.get("letra") or "").upper()) if p
+        ) or equipo.get("nombre_equipo") or slug
+        nombre_grupo = equipo.get("nombre_grupo") or ""
+        equipos.append(buscador.Documento(
+            buscador.EQUIPO, equipo.get("nombre_equipo") or slug,
+            " · ".join(p for p in (etiqueta, nombre_grupo) if p), f"{slug}/",
+            texto=f"{equipo.get('nombre_equipo') or ''} {etiqueta} {slug.replace('-', ' ')}",
+        ))
+        for codjugador, nombre in ALMACEN.nombres_plantilla(equipo["codequipo"], cod_temporada).items():
+            jugadores.append(buscador.Documento(
+                buscador.JUGADOR, nombre, etiqueta, f"{slug}/plantilla.html#{codjugador}",
+            ))
+        if equipo.get("campo_juego"):
+            campos.setdefault(equipo["campo_juego"], []).append(etiqueta)
+
+        data = _load_team_data(slug) or {}
+        propios = {
+            f.get("equipo") for f in data.get("clasificacion") or []
+            if str(f.get("codequipo")) == str(equipo["codequipo"])
+        }
+        nombres_rivales = [
+            f.get("equipo") for f in data.get("clasificacion") or []
+            if f.get("equipo") not in propios
+        ]
+        for partido in data.get("todos_partidos") or []:
+            nombres_rivales.append(partido.get("local") if not partido.get("es_local") else partido.get("visitante"))
+            if partido.get("campo"):
+                campos.setdefault(partido["campo"], [])
+        for nombre in nombres_rivales:
+            if nombre and (nombre, slug) not in rivales_vistos:
+                rivales_vistos[(nombre, slug)] = buscador.Documento(
+                    buscador.RIVAL, nombre, f"Rival de {etiqueta}", f"{slug}/",
+                )
+
+    documentos_campos = []
+    for nombre, etiquetas in sorted(campos.items()):
+        coords = coords_campos.get(nombre) or {}
+        detalle = ", ".join(p for p in (coords.get("direccion"), coords.get("localidad")) if p)
+        if etiquetas:
+            detalle = " · ".join(p for p in (detalle, "Campo de " + ", ".join(etiquetas)) if p)
+        documentos_campos.append(buscador.Documento(
+            buscador.CAMPO, nombre, detalle, _url_campo(nombre, coords) or "",
+            texto=f"{nombre} {coords.get('localidad') or ''}",
+        ))
+
+    resumen = buscador.escribir(
+        DATA_DIR / buscador.DIR_BUSCAR,
+        equipos + jugadores + list(rivales_vistos.values()) + documentos_campos,
+    )
+    logger.info(
+        f"🔎 Índice de búsqueda: {resumen['documentos']} documentos en "
+        f"{resumen['fragmentos']} fragmentos ({resumen['bytes'] / 1024:.1f} KB, "
+        f"{resumen['escritos']} reescritos)"
+    )
+
+
+def generar_service_worker(club_map: Dict) -> None:
+    """`sw.js` con la lista de precache de lo publicado tras el run (ver `pwa.py`)."""
+    entradas = pwa.lista_precache(
+        BASE_DIR,
+        (e["slug"] for e in club_map.get("equipos") or []),
+        recursos.Recursos(BASE_DIR).manifiesto().rutas,
+    )
+    destino = BASE_DIR / pwa.NOMBRE
+    if pwa.escribir(destino, _entorno_jinja().get_template("sw_template.js"), entradas):
+        logger.info(f"📴 Service worker actualizado: {len(entradas)} entradas en precache")
+    datos = destino.read_bytes()
+    TAMANOS.anotar([postproceso.Artefacto(str(destino), len(datos), len(datos), postproceso.tamano_gzip(datos))])
+
+
+def _jornadas_en_juego(equipos: Dict[str, Dict], datos: Dict[str, Optional[Dict]], ahora: datetime) -> Dict:
+    """(cod_grupo, codjornada) → slugs del club con un partido en juego en ella."""
+    jornadas: Dict = {}
+    for slug, equipo in equipos.items():
+        for partido in planificador.partidos_en_juego(datos.get(slug), ahora):
+            if partido.get("jornada") is None:
+                continue
+            clave = (str(equipo["cod_grupo"]), str(partido["jornada"]))
+            jornadas.setdefault(clave, set()).add(slug)
+    return jornadas
+
+
+def _hay_resultado_nuevo(equipo: Dict, data: Optional[Dict], jornada_api: Dict) -> bool:
+    """¿Trae la jornada un resultado que `data` (el JSON del equipo) aún no tiene?"""
+    conocidos = {
+        str(p.get("id_partido")): p.get("resultado")
+        for p in (data or {}).get("todos_partidos") or []
+    }
+    codequipo = str(equipo["codequipo"])
+    for raw in jornada_api.get("partidos") or []:
+        if codequipo not in (str(raw.get("cod_equipo_local")), str(raw.get("cod_equipo_visitante"))):
+            continue
+        resultado = _normalizar_resultado(raw.get("resultado"))
+        if resultado and conocidos.get(str(raw.get("codacta"))) != resultado:
+            return True
+    return False
+
+
+def _ejecutar_al_cambiar(comando: Optional[str], slugs: List[str]) -> None:
+    """Lanza el comando de `watch --al-cambiar` (p.ej. commit + push)."""
+    if not comando:
+        return
+    entorno = dict(os.environ, EQUIPOS_ACTUALIZADOS=" ".join(slugs))
+    resultado = subprocess.run(comando, shell=True, cwd=BASE_DIR, env=entorno)
+    if resultado.returncode != 0:
+        logger.warning(f"--al-cambiar terminó con código {resultado.returncode}")
+
+
+def vigilar(club_config: Dict, horas: float = 8.0, al_cambiar: Optional[str] = None) -> None:
+    """
+    Modo `watch`: proceso residente durante una ventana de partidos.
+
+    Mantiene en memoria el club_map, el JSON de cada equipo, las plantillas
+    compiladas, la sesión HTTP y la caché condicional. En cada ciclo sondea
+    sólo las jornadas con partidos del club en juego y, si aparece un
+    resultado, regenera esos equipos y la home. También refresca los
+    equipos que el planificador marque (partido inminente, sin datos...).
+    Termina al cabo de `horas` o cuando no queda nada que vigilar.
+    """
+    parseo.configurar_temporada(club_config["temporada"].get("nombre"))
+    club_map = _club_map_en_cache(str(club_config["temporada"]["codigo"]))
+    if club_map is None:
+        procesar_club(club_config)
+        club_map = _load_team_data("club_map") or {}
+        with TELEMETRIA.fase("home"):
+            generar_home(club_config, club_map)
+    equipos = {e["slug"]: e for e in club_map.get("equipos") or []}
+    datos = {slug: _load_team_data(slug) for slug in equipos}
+
+    limite = time.monotonic() + horas * 3600
+    sin_cambios = 0
+    logger.info(f"\n👀 Vigilando {len(equipos)} equipos durante {horas:g} h como máximo\n")
+    while True:
+        # El presupuesto (si lo hay) se aplica a cada ciclo, no a la sesión, y
+        # cada ciclo vuelve a pedir las jornadas en lugar de leerlas de la memo.
+        PRESUPUESTO.iniciar()
+        MEMO.vaciar()
+        ahora = planificador.ahora_local()
+        estados = planificador.planificar(equipos, datos.get, ahora)
+        # Los resultados pendientes los detecta el sondeo de jornadas.
+        afectados = {
+            slug for slug, e in estados.items()
+            if e.pendiente and e.motivo != "resultado_pendiente"
+        }
+
+        jornadas = _jornadas_en_juego(equipos, datos, ahora)
+        for (cod_grupo, cod_jornada), slugs in sorted(jornadas.items()):
+            try:
+                jornada_api = fetch_json(
+                    "partidos/resultados_por_grupo_jornada_data.php",
+                    {"cod_grupo": cod_grupo, "cod_jornada": cod_jornada},
+                )
+            except FFCVAPIError as e:
+                logger.warning(f"👀 Jornada {cod_jornada} de {cod_grupo} sin sondear: {e}")
+                continue
+            afectados.update(
+                slug for slug in slugs
+                if _hay_resultado_nuevo(equipos[slug], datos[slug], jornada_api)
+            )
+
+        if afectados:
+            logger.info(f"👀 Cambios en {len(afectados)} equipo(s): {', '.join(sorted(afectados))}")
+            for slug in sorted(afectados):
+                _procesar_equipo_club(equipos[slug], club_config)
+                datos[slug] = _load_team_data(slug)
+            renderizar_paginas()
+            with TELEMETRIA.fase("home"):
+                generar_home(club_config, club_map)
+            _escribir_agenda(club_map, datos.get)
+            compactar_datos()
+            generar_service_worker(club_map)
+            try:
+                CACHE_HTTP.guardar()
+            except OSError as e:
+                logger.warning(f"No se pudo guardar la caché HTTP: {e}")
+            _ejecutar_al_cambiar(al_cambiar, sorted(afectados))
+            sin_cambios = 0
+        elif jornadas:
+            sin_cambios += 1
+
+        # Siguiente ciclo: sondeo adaptativo si hay partidos en juego; si no,
+        # hasta el próximo instante en que algún equipo esté pendiente.
+        ahora = planificador.ahora_local()
+        en_juego = [
+            p for slug in equipos for p in planificador.partidos_en_juego(datos[slug], ahora)
+        ]
+        if en_juego:
+            espera = planificador.intervalo_sondeo(en_juego, ahora, sin_cambios)
+        else:
+            proximo, _ = planificador.proximo_refresco(
+                planificador.planificar(equipos, datos.get, ahora)
+            )
+            if proximo is None:
+                logger.info("👀 Nada más que vigilar")
+                return
+            espera = max(proximo - ahora, planificador.SONDEO_MIN)
+
+        segundos = espera.total_seconds()
+        if time.monotonic() + segundos >= limite:
+            logger.info(f"👀 Fin de la vigilancia ({horas:g} h)")
+            return
+        logger.info(
+            f"👀 {len(en_juego)} partido(s) en juego; siguiente sondeo en {segundos / 60:.0f} min"
+        )
+        _dormir(segundos, "vigilancia")
+
+
+# ---------------------------------------------------------------------------
+# Modo liga: todos los grupos de una temporada, con salida fragmentada
+# ---------------------------------------------------------------------------
+
+# Grupos en vuelo por worker: acota la memoria a unos pocos grupos a la vez.
+GRUPOS_EN_VUELO_POR_WORKER = 2
+
+
+def _grupos_de_liga(
+    cod_temporada: str,
+    competiciones: Optional[List[str]] = None,
+    categorias: Optional[List[str]] = None,
+) -> Iterator[Dict]:
+    """
+    Recorre (perezosamente) los grupos de la temporada, opcionalmente sólo
+    de esas competiciones o categorías. Una competición caída se salta.
+    """
+    por_categoria = _resolver_competiciones_por_categoria(cod_temporada)
+    for cod_categoria, comps in sorted(por_categoria.items()):
+        if categorias and cod_categoria not in categorias:
+            continue
+        for comp in comps:
+            if competiciones and comp["codigo"] not in competiciones:
+                continue
+            try:
+                data = fetch_json("filtros/grupos_fetch.php", {"cod_competicion": comp["codigo"]})
+            except FFCVAPIError as e:
+                logger.warning(f"🏟️  Saltando competición {comp['codigo']} ({comp['nombre']}): {e}")
+                continue
+            for grupo in data.get("grupos") or []:
+                if grupo.get("codigo"):
+                    yield {
+                        "cod_grupo": str(grupo["codigo"]),
+                        "nombre": grupo.get("nombre"),
+                        "cod_competicion": comp["codigo"],
+                        "competicion": comp["nombre"],
+                        "cod_categoria": cod_categoria,
+                    }
+
+
+def _descargar_grupo(grupo: Dict, cod_temporada: str) -> Dict:
+    """Jornadas, partidos y última clasificación de un grupo, ya guardados en ALMACEN."""
+    cod_grupo = grupo["cod_grupo"]
+    with TELEMETRIA.fase("liga_grupo"):
+        jornadas = fetch_json("filtros/jornadas_fetch.php", {"cod_grupo": cod_grupo}).get("jornadas") or []
+        if not jornadas:
+            raise FFCVAPIError(f"La API no devolvió jornadas para cod_grupo={cod_grupo}")
+        partidos: List[Dict] = []
+        for jornada_meta in jornadas:
+            codjornada = jornada_meta.get("codjornada")
+            if not codjornada:
+                continue
+            jornada_data = fetch_json(
+                "partidos/resultados_por_grupo_jornada_data.php",
+                {"cod_grupo": cod_grupo, "cod_jornada": codjornada},
+            )
+            filas = _filas_jornada(jornada_data, cod_temporada, cod_grupo, codjornada)
+            ALMACEN.guardar_jornada(cod_grupo, _try_int(codjornada), filas)
+            partidos.extend(filas)
+        cod_jornada = _jornada_mas_reciente(jornadas)
+        clasificacion = _filas_clasificacion(fetch_json(
+            "clasificaciones/clasificaciones_ajax.php",
+            {"cod_grupo": cod_grupo, "cod_jornada": cod_jornada},
+            prioridad=resiliencia.ALTA,
+        ))
+        if _try_int(cod_jornada) is not None:
+            ALMACEN.guardar_clasificacion(cod_grupo, int(cod_jornada), clasificacion)
+    return {
+        **grupo,
+        "cod_temporada": cod_temporada,
+        "jornadas": len(jornadas),
+        "clasificacion": [f.a_json() for f in clasificacion],
+        "partidos": [
+            {k: v for k, v in p.items() if k not in ("cod_temporada", "cod_grupo")}
+            for p in partidos
+        ],
+    }
+
+
+def procesar_liga(
+    cod_temporada: str,
+    salida: Path,
+    competiciones: Optional[List[str]] = None,
+    categorias: Optional[List[str]] = None,
+    workers: int = HTTP_WORKERS,
+    desde_cero: bool = False,
+) -> Dict:
+    """
+    Modo `liga`: descarga todos los grupos de la temporada (o de las
+    competiciones/categorías indicadas) con `workers` hilos y escribe la
+    salida fragmentada de `liga.SalidaLiga` en `salida`.
+
+    Como mucho hay `GRUPOS_EN_VUELO_POR_WORKER × workers` grupos descargados
+    a la vez; cada uno se escribe y se olvida en cuanto termina, y se anota
+    en el checkpoint. Un run interrumpido retoma donde lo dejó si se relanza
+    con los mismos filtros. Devuelve el índice escrito.
+    """
+    filtro = {
+        "cod_temporada": str(cod_temporada),
+        "competiciones": sorted(competiciones or []),
+        "categorias": sorted(categorias or []),
+    }
+    fragmentos = liga.SalidaLiga(salida)
+    checkpoint = liga.Checkpoint.cargar(salida / "checkpoint.json", filtro)
+    if desde_cero or not checkpoint.completados:
+        checkpoint.completados.clear()
+        fragmentos.limpiar_clubes()
+    else:
+        logger.info(f"🏟️  Reanudando: {len(checkpoint.completados)} grupo(s) ya escritos")
+
+    escritos = fallidos = equipos = 0
+    en_vuelo: Dict = {}
+    grupos = liga.pendientes(_grupos_de_liga(cod_temporada, competiciones, categorias), checkpoint)
+    max_en_vuelo = max(1, workers) * GRUPOS_EN_VUELO_POR_WORKER
+
+    def recoger(hechos) -> None:
+        nonlocal escritos, fallidos, equipos
+        for futuro in hechos:
+            grupo = en_vuelo.pop(futuro)
+            try:
+                datos = futuro.result()
+            except FFCVAPIError as e:
+                fallidos += 1
+                logger.warning(f"🏟️  Grupo {grupo['cod_grupo']} ({grupo['nombre']}) sin descargar: {e}")
+                continue
+            with TELEMETRIA.fase("liga_fragmentos"):
+                equipos += fragmentos.escribir_grupo(datos, _slugify)
+            checkpoint.marcar(grupo["cod_grupo"])
+            escritos += 1
+            logger.info(
+                f"🏟️  [{len(checkpoint.completados)}] {grupo['competicion']} · {grupo['nombre']}: "
+                f"{len(datos['partidos'])} partidos"
+            )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for grupo in grupos:
+            if len(en_vuelo) >= max_en_vuelo:
+                hechos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                recoger(hechos)
+            en_vuelo[pool.submit(_descargar_grupo, grupo, str(cod_temporada))] = grupo
+        recoger(wait(en_vuelo).done)
+
+    with TELEMETRIA.fase("liga_fragmentos"):
+        indice = fragmentos.consolidar(str(cod_temporada), checkpoint.completados)
+    logger.info(
+        f"🏟️  Liga: {escritos} grupo(s) nuevos, {len(indice['grupos'])} en total, "
+        f"{len(indice['clubes'])} clubes, {equipos} equipos en este run → {salida}"
+    )
+    if fallidos:
+        # El checkpoint se conserva: el siguiente run sólo pide lo que falta.
+        logger.warning(f"🏟️  {fallidos} grupo(s) pendientes; relanza para completarlos")
+    else:
+        checkpoint.borrar()
+    return indice
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extramurs Calendar Automation")
+    transporte = parser.add_mutually_exclusive_group()
+    transporte.add_argument(
+        "--record", metavar="CASSETTE", type=Path,
+        help="graba todas las respuestas de la API en un cassette .json.gz",
+    )
+    transporte.add_argument(
+        "--replay", metavar="CASSETTE", type=Path,
+        help="sirve las respuestas desde un cassette, sin red",
+    )
+    parser.add_argument(
+        "--replay-latency", metavar="SEG", default=None,
+        help="latencia artificial por petición en --replay: '0.05' o rango '0.02-0.2'",
+    )
+    parser.add_argument(
+        "--profile", metavar="DIR", nargs="?", type=Path, const=Path("profiles"),
+        help="perfila cada fase con cProfile; escribe .pstats por equipo y pilas "
+             "colapsadas en DIR (por defecto profiles/)",
+    )
+    parser.add_argument(
+        "--profile-mem", action="store_true",
+        help="con --profile, mide además el pico de memoria por fase (tracemalloc)",
+    )
+    parser.add_argument(
+        "--budget-requests", metavar="N", type=int, default=None,
+        help="máximo de peticiones a la API en el run (prioriza resultados)",
+    )
+    parser.add_argument(
+        "--budget-seconds", metavar="SEG", type=float, default=None,
+        help="tiempo máximo del run; lo cosmético se aplaza antes que lo crítico",
+    )
+    parser.add_argument(
+        "--due", action="store_true",
+        help="refresca sólo los equipos con partidos recién terminados o inminentes",
+    )
+    parser.add_argument(
+        "--no-http-cache", action="store_true",
+        help="no usar ni actualizar la caché de revalidación ETag/Last-Modified",
+    )
+    parser.add_argument(
+        "--render-workers", metavar="N", type=int, default=None,
+        help="procesos para renderizar las páginas (por defecto, uno por CPU)",
+    )
+    parser.add_argument(
+        "--no-minify", action="store_true",
+        help="escribe el HTML tal cual sale de las plantillas (para depurarlas)",
+    )
+    parser.add_argument(
+        "--sprites-escudos", action="store_true",
+        help="junta los escudos de cada grupo en un sprite para la clasificación (requiere Pillow)",
+    )
+    parser.add_argument(
+        "--clubs", metavar="CONFIG", nargs="+", type=Path, default=None,
+        help="procesa varios clubes en un solo run (un YAML como configs/_club.yaml "
+             "por club); cada uno escribe su sitio en `sitio.raiz`",
+    )
+    comandos = parser.add_subparsers(dest="comando", metavar="{watch,liga}")
+    watch = comandos.add_parser(
+        "watch", help="proceso residente que sondea las jornadas en juego",
+    )
+    watch.add_argument(
+        "--horas", metavar="H", type=float, default=8.0,
+        help="duración máxima de la vigilancia (por defecto 8)",
+    )
+    watch.add_argument(
+        "--al-cambiar", metavar="CMD", default=None,
+        help="comando a ejecutar tras cada regeneración (p.ej. commit y push); "
+             "recibe los slugs en $EQUIPOS_ACTUALIZADOS",
+    )
+    modo_liga = comandos.add_parser(
+        "liga", help="todos los grupos de una temporada, con salida por grupo y por club",
+    )
+    modo_liga.add_argument(
+        "--temporada", metavar="COD", default=None,
+        help="cod_temporada (por defecto, la de configs/_club.yaml)",
+    )
+    modo_liga.add_argument(
+        "--competicion", metavar="COD", action="append", default=None,
+        help="limita el run a esta competición (repetible)",
+    )
+    modo_liga.add_argument(
+        "--categoria", metavar="COD", action="append", default=None,
+        help="limita el run a esta categoría (repetible)",
+    )
+    modo_liga.add_argument(
+        "--salida", metavar="DIR", type=Path, default=Path("liga"),
+        help="directorio de los fragmentos (por defecto liga/)",
+    )
+    modo_liga.add_argument(
+        "--workers", metavar="N", type=int, default=HTTP_WORKERS,
+        help=f"grupos descargándose a la vez (por defecto {HTTP_WORKERS})",
+    )
+    modo_liga.add_argument(
+        "--desde-cero", action="store_true",
+        help="ignora el checkpoint de un run anterior interrumpido",
+    )
+    args = parser.parse_args(argv)
+    # `--clubs a.yaml watch` deja "watch" dentro de la lista de configs.
+    if args.clubs and (args.comando == "watch" or Path("watch") in args.clubs):
+        parser.error("watch vigila un solo club; no admite --clubs")
+    if args.clubs and (args.comando == "liga" or Path("liga") in args.clubs):
+        parser.error("liga no trabaja por clubes; no admite --clubs")
+    return args
+
+
+def configurar_circuitos(club_config: Dict) -> None:
+    """Circuit breakers nuevos para el run, con `circuito: {umbral, enfriamiento}` de _club.yaml."""
+    global CIRCUITOS
+    cfg = club_config.get("circuito") or {}
+    CIRCUITOS = resiliencia.RegistroCircuitos(
+        umbral=int(cfg.get("umbral", 4)),
+        enfriamiento=float(cfg.get("enfriamiento", 60)),
+        enfriamiento_max=float(cfg.get("enfriamiento_max", 600)),
+    )
+
+
+def configurar_presupuesto(club_config: Dict, args: argparse.Namespace) -> None:
+    """
+    Fija el presupuesto del run desde `presupuesto: {peticiones, segundos}`
+    de _club.yaml; los flags --budget-* tienen prioridad.
+    """
+    global PRESUPUESTO
+    cfg = club_config.get("presupuesto") or {}
+    PRESUPUESTO = resiliencia.PresupuestoEjecucion(
+        max_peticiones=args.budget_requests or cfg.get("peticiones"),
+        max_segundos=args.budget_seconds or cfg.get("segundos"),
+        reservas=cfg.get("reservas"),
+    )
+    if PRESUPUESTO.limitado:
+        logger.info(
+            f"💰 Presupuesto del run: {PRESUPUESTO.max_peticiones or '∞'} peticiones, "
+            f"{PRESUPUESTO.max_segundos or '∞'} s"
+        )
+
+
+def _escribir_run_report() -> None:
+    """
+    Vuelca la telemetría del run a `.cache/run_report.json` y resume en el
+    log. Va en `.cache/` y no en `data/`: cambia en cada run y no es para
+    publicar ni versionar.
+    """
+    path = BASE_DIR / ".cache" / "run_report.json"
+    # El de versiones anteriores, que se versionaba y publicaba con data/.
+    (DATA_DIR / "run_report.json").unlink(missing_ok=True)
+    try:
+        reporte = TELEMETRIA.escribir_reporte(path, extra={
+            "presupuesto": PRESUPUESTO.resumen(),
+            "circuitos": CIRCUITOS.resumen(),
+            "memo": MEMO.resumen(),
+            "renderizado": RENDERIZADOR.resumen(),
+            "tamanos": TAMANOS.resumen(),
+        })
+    except OSError as e:
+        logger.warning(f"No se pudo escribir {path}: {e}")
+        return
+
+    totales = reporte["totales"]
+    reintentos = sum(totales["reintentos"].values())
+    logger.info(
+        f"📊 Run report: {path} — {totales['peticiones']} peticiones, "
+        f"{totales['bytes'] / 1024:.0f} KB, {reintentos} reintentos, "
+        f"{totales['segundos_en_espera']:.1f}s en espera"
+    )
+    tamanos = reporte["tamanos"]["totales"]
+    if tamanos["ficheros"]:
+        ahorro = 1 - tamanos["final"] / tamanos["bruto"] if tamanos["bruto"] else 0
+        logger.info(
+            f"   📦 {tamanos['ficheros']} artefactos: {tamanos['bruto'] / 1024:.0f} KB → "
+            f"{tamanos['final'] / 1024:.0f} KB (-{ahorro:.0%}), {tamanos['gzip'] / 1024:.0f} KB con gzip, "
+            f"{tamanos['css'] / 1024:.0f} KB de CSS en línea"
+        )
+    abiertos = {f: c["aperturas"] for f, c in reporte["circuitos"].items() if c["aperturas"]}
+    if abiertos:
+        logger.info(f"   🔌 Aperturas de circuito por familia: {abiertos}")
+    if reporte["presupuesto"]["aplazadas"]:
+        logger.info(f"   ⏳ Aplazado al siguiente run: {reporte['presupuesto']['aplazadas']}")
+    lentos = sorted(
+        reporte["endpoints"].items(),
+        key=lambda kv: kv[1]["latencia_ms"]["p95"] or 0,
+        reverse=True,
+    )[:3]
+    for nombre, st in lentos:
+        logger.info(
+            f"   {nombre:35s} p50={st['latencia_ms']['p50']}ms "
+            f"p95={st['latencia_ms']['p95']}ms ({st['peticiones']} peticiones)"
+        )
+
+
+def raiz_club(club_config: Dict) -> Path:
+    """
+    Raíz de salida de un club en modo `--clubs`: `sitio.raiz` de su config
+    (relativa al repo) o `sitios/<clave_acceso>`.
+    """
+    raiz = club_config["sitio"].get("raiz") or f"sitios/{club_config['club']['clave_acceso']}"
+    return BASE_DIR / raiz
+
+
+@contextmanager
+def _en_raiz_club(club_config: Dict) -> Iterator[Path]:
+    """
+    Redirige BASE_DIR/DATA_DIR a la raíz del club mientras dura el bloque.
+    Sesión, cachés, memo, circuitos, presupuesto e histórico no se tocan:
+    son del run, no del club.
+    """
+    global BASE_DIR, DATA_DIR, CLUB_ACTUAL
+    previos = BASE_DIR, DATA_DIR, CLUB_ACTUAL
+    raiz = raiz_club(club_config)
+    raiz.mkdir(parents=True, exist_ok=True)
+    BASE_DIR, DATA_DIR, CLUB_ACTUAL = raiz, raiz / "data", raiz.name
+    try:
+        yield raiz
+    finally:
+        BASE_DIR, DATA_DIR, CLUB_ACTUAL = previos
+
+
+def ejecutar_club(club_config: Dict, solo_pendientes: bool = False) -> None:
+    """Un run completo de un club: equipos, home y agenda de refrescos."""
+    procesados = procesar_club(club_config, solo_pendientes=solo_pendientes)
+
+    # Releer el club_map ya escrito para alimentar la home (en caso de que
+    # algún equipo haya quedado sin resolver y se haya saltado durante el
+    # procesado, evitamos referenciarlo en las tarjetas).
+    with open(DATA_DIR / "club_map.json", "r", encoding="utf-8") as f:
+        club_map = json.load(f)
+    if procesados or not solo_pendientes:
+        with TELEMETRIA.fase("home"):
+            generar_home(club_config, club_map)
+    else:
+        logger.info("🗓️  Ningún equipo pendiente: la home no se regenera")
+
+    _escribir_agenda(club_map, _load_team_data)
+    generar_indice_busqueda(club_config, club_map)
+    compactar_datos()
+    generar_service_worker(club_map)
+
+
+def ejecutar_clubes(clubes: List[Dict], solo_pendientes: bool = False) -> None:
+    """
+    Modo `--clubs`: un club detrás de otro en el mismo proceso, cada uno en
+    su raíz. Comparten la capa HTTP, `MEMO` (los grupos donde coinciden se
+    descargan una vez), la caché condicional, el histórico y `campos.json`.
+    Un club que falla no impide procesar los demás.
+    """
+    global CAMPOS_JSON
+    CAMPOS_JSON = DATA_DIR / "campos.json"
+    fallidos: List[str] = []
+    try:
+        for idx, club_config in enumerate(clubes, 1):
+            with _en_raiz_club(club_config) as raiz:
+                logger.info("=" * 60)
+                logger.info(f"🏟️  [{idx}/{len(clubes)}] {club_config['club']['nombre']} → {raiz}")
+                logger.info("=" * 60)
+                try:
+                    ejecutar_club(club_config, solo_pendientes)
+                except Exception as e:
+                    logger.error(f"❌ Club {club_config['club']['nombre']}: {e}", exc_info=True)
+                    fallidos.append(club_config["club"]["nombre"])
+    finally:
+        CAMPOS_JSON = None
+    # campos.json compartido, en el data/ de la raíz.
+    compactar_datos()
+    if fallidos:
+        raise RuntimeError(f"{len(fallidos)}/{len(clubes)} club(es) con error: {', '.join(fallidos)}")
+
+
+def main(argv: Optional[List[str]] = None):
     """
     Función principal - procesa todos los equipos configurados
     """
+    global ALMACEN, CACHE_HTTP, MEMO, RENDERIZADOR, TAMANOS, MINIFICAR_HTML, SPRITES_ESCUDOS
+    args = _parse_args(argv)
+    TELEMETRIA.reiniciar()
+    MEMO = transporte.MemoRespuestas()
+    TAMANOS = postproceso.InformeTamanos(BASE_DIR)
+    MINIFICAR_HTML = not args.no_minify
+    SPRITES_ESCUDOS = args.sprites_escudos
+    if SPRITES_ESCUDOS and not escudos.PIL_DISPONIBLE:
+        logger.warning("--sprites-escudos requiere Pillow (pip install pillow); se sirven sueltos")
+    perfilando = bool(args.profile or args.profile_mem)
+    # cProfile no ve dentro del pool de procesos: perfilando, la fase "html"
+    # sólo mediría la espera. Se renderiza en el propio proceso.
+    if perfilando and (args.render_workers or 0) > 1:
+        logger.warning("--profile renderiza en un solo proceso; se ignora --render-workers")
+    RENDERIZADOR = renderizado.Renderizador(
+        TEMPLATES_DIR, BASE_DIR / ".cache" / "plantillas",
+        workers=1 if perfilando else args.render_workers,
+        minificar=MINIFICAR_HTML, informe=TAMANOS,
+    )
+
+    perfilador: Optional[perfilado.Perfilador] = None
+    if perfilando:
+        perfilador = perfilado.Perfilador(
+            BASE_DIR / (args.profile or Path("profiles")), memoria=args.profile_mem
+        )
+        TELEMETRIA.ganchos.append(perfilador)
+        logger.info(f"🔬 Perfilado activo → {perfilador.directorio}")
+
     logger.info("=" * 60)
     logger.info("🏆 Extramurs Calendar Automation - Multi-Team Scraper")
     logger.info("=" * 60)
 
+    grabacion: Optional[cassette.Cassette] = None
+    if args.record:
+        grabacion = cassette.Cassette(args.record)
+        instalar_sesion(cassette.SesionGrabadora(grabacion))
+        logger.info(f"⏺  Grabando respuestas en {args.record}")
+    elif args.replay:
+        instalar_sesion(cassette.SesionReproductora(
+            cassette.Cassette.cargar(args.replay),
+            latencia=cassette.parse_latencia(args.replay_latency),
+            error_cls=FFCVAPIError,
+        ))
+        logger.info(f"▶  Reproduciendo respuestas desde {args.replay}")
+
+    salida_liga = BASE_DIR / args.salida if args.comando == "liga" else None
+
+    # Con cassettes la caché condicional se desactiva: un cassette debe
+    # contener cuerpos completos, no 304 que dependan de otra caché. Vive en
+    # .cache/ y no en data/ para no publicarla ni versionarla. En modo liga
+    # también: guardaría en memoria el cuerpo de cada jornada de la temporada.
+    if args.record or args.replay or args.no_http_cache or salida_liga:
+        CACHE_HTTP = transporte.CacheCondicional(activa=False)
+    else:
+        CACHE_HTTP = transporte.CacheCondicional.cargar(BASE_DIR / ".cache" / "http.json.gz")
+    # El histórico sí se versiona, pero sólo con datos reales de la API. La
+    # liga tiene el suyo junto a sus fragmentos.
+    if args.record or args.replay:
+        ALMACEN = almacen.Almacen()
+    else:
+        ALMACEN = almacen.Almacen(
+            salida_liga / "liga.sqlite3" if salida_liga else BASE_DIR / "historico.sqlite3"
+        )
+
     try:
-        club_config = load_club_config()
-        if not club_config:
-            raise RuntimeError(
-                "Falta configs/_club.yaml: define {club: {clave_acceso, ...}, "
-                "temporada: {codigo}, sitio: {url_base}} para arrancar el discovery."
+        if args.clubs:
+            clubes = []
+            for path in args.clubs:
+                config = load_club_config(path)
+                if not config:
+                    raise RuntimeError(f"No existe el config de club {path}")
+                clubes.append(config)
+            club_config = clubes[0]
+        else:
+            club_config = load_club_config()
+            if args.comando == "liga" and not club_config:
+                club_config = {}
+            elif not club_config:
+                raise RuntimeError(
+                    "Falta configs/_club.yaml: define {club: {clave_acceso, ...}, "
+                    "temporada: {codigo}, sitio: {url_base}} para arrancar el discovery."
+                )
+        # Presupuesto y circuitos son del run: con --clubs manda el primer config.
+        configurar_presupuesto(club_config, args)
+        configurar_circuitos(club_config)
+
+        if args.comando == "watch":
+            vigilar(club_config, horas=args.horas, al_cambiar=args.al_cambiar)
+        elif args.comando == "liga":
+            cod_temporada = args.temporada or (club_config.get("temporada") or {}).get("codigo")
+            if not cod_temporada:
+                raise RuntimeError("liga necesita --temporada (o configs/_club.yaml)")
+            parseo.configurar_temporada((club_config.get("temporada") or {}).get("nombre"))
+            procesar_liga(
+                str(cod_temporada), salida_liga,
+                competiciones=args.competicion, categorias=args.categoria,
+                workers=args.workers, desde_cero=args.desde_cero,
             )
-
-        procesar_club(club_config)
-
-        # Releer el club_map ya escrito para alimentar la home (en caso de que
-        # algún equipo haya quedado sin resolver y se haya saltado durante el
-        # procesado, evitamos referenciarlo en las tarjetas).
-        with open(DATA_DIR / "club_map.json", "r", encoding="utf-8") as f:
-            club_map = json.load(f)
-        generar_home(club_config, club_map)
+        elif args.clubs:
+            ejecutar_clubes(clubes, solo_pendientes=args.due)
+        else:
+            ejecutar_club(club_config, solo_pendientes=args.due)
 
         logger.info("\n" + "=" * 60)
         logger.info("✅ Procesamiento completado")
@@ -1851,6 +3119,20 @@ def main():
         logger.error(f"\n❌ Error crítico: {str(e)}", exc_info=True)
         raise
 
+    finally:
+        # También en runs fallidos: el cassette parcial sirve para reproducir el fallo.
+        if grabacion is not None:
+            grabacion.guardar()
+        try:
+            CACHE_HTTP.guardar()
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché HTTP: {e}")
+        ALMACEN.cerrar()
+        _escribir_run_report()
+        if perfilador is not None:
+            TELEMETRIA.ganchos.remove(perfilador)
+            perfilador.escribir()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Telemetría de un run: peticiones por endpoint, reintentos, esperas y tiempos
+por equipo y fase.
+
+`fetch_json` anota cada intento (latencia, bytes, status) y cada reintento
+con su causa; los sleeps del scraper pasan por `registrar_espera`; y
+`process_team` envuelve sus fases en `fase()`. Al final de `main` se vuelca
+todo a `.cache/run_report.json` con `escribir_reporte`.
+
+Las latencias se guardan como histograma de buckets fijos (no como lista),
+así la memoria no crece con el número de peticiones.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Límites superiores (ms) de los buckets del histograma de latencias.
+BUCKETS_MS: List[float] = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# Causas de reintento que distingue fetch_json.
+CAUSAS_REINTENTO = ("transitoria", "429", "http", "red")
+
+
+def nombre_endpoint(path: str) -> str:
+    """'partidos/ficha_partido_ajax.php' → 'ficha_partido_ajax'."""
+    return path.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1].replace(".php", "")
+
+
+class _Histograma:
+    __slots__ = ("cuentas", "total", "suma_ms", "max_ms")
+
+    def __init__(self):
+        self.cuentas = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+
+    def anotar(self, ms: float) -> None:
+        for i, limite in enumerate(BUCKETS_MS):
+            if ms <= limite:
+                self.cuentas[i] += 1
+                break
+        else:
+            self.cuentas[-1] += 1
+        self.total += 1
+        self.suma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Cota superior del bucket que contiene el percentil `p` (0..100)."""
+        if not self.total:
+            return None
+        objetivo = self.total * p / 100
+        acumulado = 0
+        for i, n in enumerate(self.cuentas):
+            acumulado += n
+            if acumulado >= objetivo:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def a_json(self) -> Dict:
+        etiquetas = [f"<={int(b)}" for b in BUCKETS_MS] + [f">{int(BUCKETS_MS[-1])}"]
+        return {
+            "media": round(self.suma_ms / self.total, 1) if self.total else None,
+            "p50": self.percentil(50),
+            "p95": self.percentil(95),
+            "max": round(self.max_ms, 1),
+            "histograma": {e: n for e, n in zip(etiquetas, self.cuentas) if n},
+        }
+
+
+class _StatsEndpoint:
+    __slots__ = ("peticiones", "errores", "bytes", "latencia", "reintentos", "status")
+
+    def __init__(self):
+        self.peticiones = 0
+        self.errores = 0
+        self.bytes = 0
+        self.latencia = _Histograma()
+        self.reintentos: Dict[str, int] = {c: 0 for c in CAUSAS_REINTENTO}
+        self.status: Dict[str, int] = {}
+
+
+class Telemetria:
+    """Acumulador de métricas de un run. Seguro entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Observadores de equipos y fases (p.ej. perfilado.Perfilador). Cada
+        # uno implementa inicio_equipo/fin_equipo/inicio_fase/fin_fase.
+        self.ganchos: List = []
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.inicio = datetime.now()
+            self._t0 = time.perf_counter()
+            self.endpoints: Dict[str, _StatsEndpoint] = {}
+            self.esperas: Dict[str, float] = {}
+            self.equipos: Dict[str, Dict] = {}
+            self.fases_globales: Dict[str, float] = {}
+        self._local = threading.local()
+
+    # -- peticiones -------------------------------------------------------
+
+    def _endpoint(self, path: str) -> _StatsEndpoint:
+        nombre = nombre_endpoint(path)
+        stats = self.endpoints.get(nombre)
+        if stats is None:
+            stats = self.endpoints[nombre] = _StatsEndpoint()
+        return stats
+
+    def registrar_peticion(
+        self,
+        path: str,
+        segundos: float,
+        bytes_respuesta: int = 0,
+        status: Optional[int] = None,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self._endpoint(path)
+            stats.peticiones += 1
+            stats.bytes += bytes_respuesta
+            stats.latencia.anotar(segundos * 1000)
+            if status is not None:
+                stats.status[str(status)] = stats.status.get(str(status), 0) + 1
+            if error:
+                stats.errores += 1
+
+    def registrar_reintento(self, path: str, causa: str) -> None:
+        with self._lock:
+            reintentos = self._endpoint(path).reintentos
+            reintentos[causa] = reintentos.get(causa, 0) + 1
+
+    def registrar_espera(self, motivo: str, segundos: float) -> None:
+        with self._lock:
+            self.esperas[motivo] = self.esperas.get(motivo, 0.0) + segundos
+
+    # -- equipos y fases --------------------------------------------------
+
+    @contextmanager
+    def equipo(self, slug: str) -> Iterator[Dict]:
+        """Marca el equipo en curso; las fases abiertas dentro se le atribuyen."""
+        registro = {"estado": "ok", "segundos": 0.0, "fases": {}}
+        with self._lock:
+            self.equipos[slug] = registro
+        self._local.equipo = slug
+        for gancho in self.ganchos:
+            gancho.inicio_equipo(slug)
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        except BaseException as e:
+            # Respetar un estado más preciso fijado por el llamador ('saltado').
+            if registro["estado"] == "ok":
+                registro["estado"] = "error"
+                registro["error"] = str(e)
+            raise
+        finally:
+            registro["segundos"] = round(time.perf_counter() - t0, 3)
+            self._local.equipo = None
+            for gancho in self.ganchos:
+                gancho.fin_equipo(slug)
+
+    @contextmanager
+    def fase(self, nombre: str) -> Iterator[None]:
+        """Cronometra una fase; se suma al equipo en curso y al total global."""
+        for gancho in self.ganchos:
+            gancho.inicio_fase(nombre)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - t0
+            for gancho in self.ganchos:
+                gancho.fin_fase(nombre, segundos)
+            slug = getattr(self._local, "equipo", None)
+            with self._lock:
+                self.fases_globales[nombre] = self.fases_globales.get(nombre, 0.0) + segundos
+                if slug:
+                    fases = self.equipos[slug]["fases"]
+                    fases[nombre] = round(fases.get(nombre, 0.0) + segundos, 3)
+
+    # -- reporte ----------------------------------------------------------
+
+    def reporte(self) -> Dict:
+        with self._lock:
+            endpoints = {}
+            tot_peticiones = tot_bytes = tot_errores = 0
+            tot_reintentos = {c: 0 for c in CAUSAS_REINTENTO}
+            for nombre, st in sorted(self.endpoints.items()):
+                endpoints[nombre] = {
+                    "peticiones": st.peticiones,
+                    "errores": st.errores,
+                    "bytes": st.bytes,
+                    "status": dict(st.status),
+                    "reintentos": dict(st.reintentos),
+                    "latencia_ms": st.latencia.a_json(),
+                }
+                tot_peticiones += st.peticiones
+                tot_bytes += st.bytes
+                tot_errores += st.errores
+                for c, n in st.reintentos.items():
+                    tot_reintentos[c] = tot_reintentos.get(c, 0) + n
+
+            return {
+                "inicio": self.inicio.isoformat(),
+                "fin": datetime.now().isoformat(),
+                "segundos_total": round(time.perf_counter() - self._t0, 3),
+                "totales": {
+                    "peticiones": tot_peticiones,
+                    "errores": tot_errores,
+                    "bytes": tot_bytes,
+                    "reintentos": tot_reintentos,
+                    "segundos_en_espera": round(sum(self.esperas.values()), 3),
+                    "esperas_por_motivo": {k: round(v, 3) for k, v in sorted(self.esperas.items())},
+                },
+                "fases": {k: round(v, 3) for k, v in self.fases_globales.items()},
+                "endpoints": endpoints,
+                "equipos": self.equipos,
+            }
+
+    def escribir_reporte(self, path: Path, extra: Optional[Dict] = None) -> Dict:
+        """Escribe el reporte en `path`; `extra` añade secciones de otros módulos."""
+        reporte = self.reporte()
+        reporte.update(extra or {})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        return reporte
@@ -0,0 +1,124 @@
+// Service worker generado por scraper.py (pwa.py) en cada run: no editar
+// sw.js a mano, sino templates/sw_template.js.
+//
+// - Precache: páginas del club y recursos con huella. Cada entrada lleva su
+//   revisión; al instalar una versión nueva sólo se descargan las que han
+//   cambiado, el resto se copia de la caché anterior.
+// - Páginas: primero la caché (abren al instante y sin red); se actualizan
+//   cuando el scraper publica un sw.js nuevo.
+// - assets/ e Images/escudos/: nombres con huella, inmutables → caché primero.
+// - data/: stale-while-revalidate.
+
+const VERSION = '{{ version }}';
+const PRECACHE = {{ precache }};
+
+const PREFIJO = 'ffcv:' + self.registration.scope + ':';
+const CACHE_PAGINAS = PREFIJO + 'precache:' + VERSION;
+const CACHE_RECURSOS = PREFIJO + 'recursos';
+const CACHE_DATOS = PREFIJO + 'datos';
+
+function absoluta(url) {
+  return new URL(url, self.registration.scope).href;
+}
+
+function claveRevision(entrada) {
+  const url = absoluta(entrada.url);
+  return entrada.revision ? url + '?__rev=' + entrada.revision : url;
+}
+
+// URL absoluta → clave en CACHE_PAGINAS.
+const CLAVES = new Map(PRECACHE.map(function (e) { return [absoluta(e.url), claveRevision(e)]; }));
+
+self.addEventListener('install', function (event) {
+  event.waitUntil((async function () {
+    const cache = await caches.open(CACHE_PAGINAS);
+    const anteriores = (await caches.keys()).filter(function (k) {
+      return k.startsWith(PREFIJO + 'precache:') && k !== CACHE_PAGINAS;
+    });
+    for (const entrada of PRECACHE) {
+      const clave = claveRevision(entrada);
+      if (await cache.match(clave)) continue;
+      let respuesta = null;
+      for (const nombre of anteriores) {
+        respuesta = await (await caches.open(nombre)).match(clave);
+        if (respuesta) break;
+      }
+      if (!respuesta) {
+        respuesta = await fetch(absoluta(entrada.url), { cache: 'no-cache' });
+        if (!respuesta.ok) throw new Error('precache ' + entrada.url + ': ' + respuesta.status);
+      }
+      await cache.put(clave, respuesta);
+    }
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', function (event) {
+  event.waitUntil((async function () {
+    const claves = await caches.keys();
+    await Promise.all(claves
+      .filter(function (k) { return k.startsWith(PREFIJO + 'precache:') && k !== CACHE_PAGINAS; })
+      .map(function (k) { return caches.delete(k); }));
+    await self.clients.claim();
+  })());
+});
+
+async function desdePrecache(request) {
+  let url = request.url.split('#')[0].split('?')[0];
+  if (url.endsWith('/')) url += 'index.html';
+  const clave = CLAVES.get(url);
+  if (!clave) return null;
+  return (await caches.open(CACHE_PAGINAS)).match(clave);
+}
+
+async function primeroCache(request, nombreCache) {
+  const cache = await caches.open(nombreCache);
+  const guardada = await cache.match(request);
+  if (guardada) return guardada;
+  const respuesta = await fetch(request);
+  if (respuesta.ok) cache.put(request, respuesta.clone());
+  return respuesta;
+}
+
+async function staleWhileRevalidate(event, nombreCache) {
+  const cache = await caches.open(nombreCache);
+  const guardada = await cache.match(event.request);
+  const red = fetch(event.request).then(function (respuesta) {
+    if (respuesta.ok) cache.put(event.request, respuesta.clone());
+    return respuesta;
+  });
+  if (guardada) {
+    event.waitUntil(red.catch(function () {}));
+    return guardada;
+  }
+  return red;
+}
+
+self.addEventListener('fetch', function (event) {
+  const request = event.request;
+  if (request.method !== 'GET' || !request.url.startsWith(self.registration.scope)) return;
+  const ruta = request.url.slice(self.registration.scope.length);
+
+  if (ruta.startsWith('data/')) {
+    event.respondWith(staleWhileRevalidate(event, CACHE_DATOS));
+  } else if (ruta.startsWith('assets/') || ruta.startsWith('Images/escudos/')) {
+    event.respondWith((async function () {
+      return (await desdePrecache(request)) || primeroCache(request, CACHE_RECURSOS);
+    })());
+  } else {
+    event.respondWith((async function () {
+      const precache = await desdePrecache(request);
+      if (precache) return precache;
+      try {
+        return await fetch(request);
+      } catch (error) {
+        // Sin red y sin la página en caché: al menos la home del club.
+        if (request.mode === 'navigate') {
+          const home = await desdePrecache(new Request(self.registration.scope));
+          if (home) return home;
+        }
+        throw error;
+      }
+    })());
+  }
+});
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Capa HTTP del scraper: sesión con pool de conexiones dimensionado, compresión
+negociada y revalidación condicional.
+
+- `crear_sesion(workers)`: `requests.Session` con un `HTTPAdapter` cuyo pool
+  admite `workers` conexiones simultáneas por host y sin reintentos propios
+  (los reintentos los decide `fetch_json`). Anuncia `gzip, deflate` y `br`
+  sólo si hay un decodificador Brotli instalado (`brotli` o `brotlicffi`,
+  opcionales): urllib3 no sabría descomprimirlo de otro modo.
+- `CacheCondicional`: guarda el cuerpo de cada respuesta que traiga `ETag` o
+  `Last-Modified` y, en el siguiente run, pide con `If-None-Match` /
+  `If-Modified-Since`. Un 304 se sirve desde la caché como si fuera un 200,
+  así que `fetch_json` no distingue un caso del otro. Se persiste como JSON
+  con gzip fuera de `data/` (no se publica).
+- `MemoRespuestas`: cuerpos ya descargados en este run, por petición. Las
+  respuestas de grupo y temporada (jornadas, clasificaciones, actas,
+  campos...) son las mismas para todos los equipos y clubes que las piden;
+  con la memo cada una se descarga una sola vez por run.
+"""
+
+import gzip
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+try:  # Decodificador Brotli opcional; urllib3 lo usa si está instalado.
+    import brotli  # noqa: F401
+    BROTLI_DISPONIBLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_DISPONIBLE = True
+    except ImportError:
+        BROTLI_DISPONIBLE = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_DISPONIBLE else "gzip, deflate"
+
+CACHE_VERSION = 1
+
+# Entradas de la caché condicional no usadas en estos días se descartan al guardar.
+DIAS_RETENCION = 14
+
+# Familias de endpoints cuya respuesta no depende del club que la pide.
+PREFIJOS_COMPARTIDOS: Tuple[str, ...] = (
+    "filtros/",
+    "clasificaciones/",
+    "partidos/",
+    "instalaciones/",
+)
+
+# Tope de la memo por run (cuerpos de texto). Las actas traen fotos en
+# base64, así que se acota por tamaño y no por número de entradas.
+MEMO_MAX_BYTES = 64 * 1024 * 1024
+
+
+def crear_sesion(workers: int = 1) -> requests.Session:
+    """Session con pool de `workers` conexiones por host y Accept-Encoding explícito."""
+    session = requests.Session()
+    adaptador = HTTPAdapter(
+        pool_connections=4,  # hosts distintos: ffcv.es y, como mucho, el stand-in
+        pool_maxsize=max(1, workers),
+        max_retries=0,
+        pool_block=False,
+    )
+    session.mount("https://", adaptador)
+    session.mount("http://", adaptador)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+class CacheCondicional:
+    """
+    Cuerpos y validadores de las respuestas GET, indexados por
+    `cassette.clave_peticion`. Seguro entre hilos. Con `path=None` vive sólo
+    en memoria; con `activa=False` no añade cabeceras ni guarda nada.
+    """
+
+    def __init__(self, path: Optional[Path] = None, activa: bool = True):
+        self.path = Path(path) if path else None
+        self.activa = activa
+        self._entradas: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.revalidadas = 0
+
+    @classmethod
+    def cargar(cls, path: Path) -> "CacheCondicional":
+        cache = cls(path)
+        if not path.exists():
+            return cache
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            logger.warning(f"Caché HTTP ilegible ({e}); se empieza de cero")
+            return cache
+        if data.get("version") == CACHE_VERSION:
+            cache._entradas = data.get("entradas") or {}
+        logger.info(f"✓ Caché HTTP: {len(cache._entradas)} respuestas con validadores")
+        return cache
+
+    def guardar(self) -> None:
+        if not self.activa or self.path is None:
+            return
+        limite = (date.today() - timedelta(days=DIAS_RETENCION)).isoformat()
+        with self._lock:
+            entradas = {k: v for k, v in self._entradas.items() if v.get("visto", "") >= limite}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "entradas": entradas},
+                f, ensure_ascii=False, separators=(",", ":"),
+            )
+
+    def cabeceras(self, clave: str) -> Dict[str, str]:
+        """Cabeceras condicionales para la petición, si hay validadores guardados."""
+        if not self.activa:
+            return {}
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if not entrada:
+            return {}
+        cabeceras = {}
+        if entrada.get("etag"):
+            cabeceras["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabeceras["If-Modified-Since"] = entrada["last_modified"]
+        return cabeceras
+
+    def resolver(self, clave: str, response: requests.Response) -> Optional[requests.Response]:
+        """
+        Convierte un 304 en la respuesta 200 cacheada. Devuelve None si llega
+        un 304 sin cuerpo guardado (hay que repetir sin condicionales).
+        """
+        if response.status_code != 304:
+            return response
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            entrada["visto"] = date.today().isoformat()
+            self.revalidadas += 1
+        cacheada = requests.Response()
+        cacheada.status_code = 200
+        cacheada.reason = "OK (304 revalidado)"
+        cacheada._content = entrada["body"].encode("utf-8")
+        cacheada.encoding = "utf-8"
+        cacheada.headers.update(response.headers)
+        cacheada.url = response.url
+        return cacheada
+
+    def anotar(self, clave: str, response: requests.Response) -> None:
+        """Guarda una respuesta válida si trae validadores (las demás no sirven)."""
+        if not self.activa or response.status_code != 200:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._entradas[clave] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body": response.text,
+                "visto": date.today().isoformat(),
+            }
+
+
+class MemoRespuestas:
+    """
+    Cuerpos de las respuestas sanas del run en curso, indexados por
+    `cassette.clave_peticion`. Sólo guarda rutas de `PREFIJOS_COMPARTIDOS`
+    y descarta las menos usadas al pasar de `max_bytes`. Seguro entre hilos.
+    """
+
+    def __init__(self, max_bytes: int = MEMO_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entradas: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+
+    @staticmethod
+    def compartible(path: str) -> bool:
+        return path.lstrip("/").startswith(PREFIJOS_COMPARTIDOS)
+
+    def obtener(self, clave: str) -> Optional[str]:
+        with self._lock:
+            cuerpo = self._entradas.get(clave)
+            if cuerpo is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+            return cuerpo
+
+    def guardar(self, path: str, clave: str, cuerpo: str) -> None:
+        if not self.compartible(path) or len(cuerpo) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._entradas[clave] = cuerpo
+            self._bytes += len(cuerpo)
+            while self._bytes > self.max_bytes:
+                _, viejo = self._entradas.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def vaciar(self) -> None:
+        """Olvida todo (nuevo run o nuevo ciclo de `watch`)."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+            }